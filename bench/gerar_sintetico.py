@@ -0,0 +1,109 @@
+# bench/gerar_sintetico.py
+# Gera uma planilha sintética com a aba `ocorrencias` no formato REDS
+# (mesmas colunas que o loader e os scripts de dimensão usam).
+import argparse
+from pathlib import Path
+
+import numpy as np
+import xlsxwriter
+
+COLUMNS = [
+    "NUMERO_REDS", "DATA_FATO", "HORARIO_FATO",
+    "CODIGO_MUNICIPIO", "MUNICIPIO", "BAIRRO", "LATITUDE", "LONGITUDE",
+    "CODIGO_NATUREZA_PRINCIPAL", "DESCR_NATUREZA_PRINCIPAL", "TENTADO_CONSUMADO_PRINCIPAL",
+    "CODIGO_NATUREZA_SECUNDARIA1", "DESCR_NATUREZA_SECUNDARIA1", "TENTADO_CONSUMADO_SECUNDARIA1",
+    "CODIGO_NATUREZA_SECUNDARIA2", "DESCR_NATUREZA_SECUNDARIA2", "TENTADO_CONSUMADO_SECUNDARIA2",
+    "UNID_AREA_NIVEL_5", "CODIGO_UNID_AREA_NIVEL_6", "UNID_AREA_NIVEL_6", "SETOR", "SUB_SETOR",
+    "CODIGO_CAUSA_PRESUMIDA", "CAUSA_PRESUMIDA", "DESCRICAO_MEIO_UTILIZADO",
+    "ANO_FATO", "MES_NUMERICO", "MES_DESCRICAO", "DIA_DA_SEMANA_NUMERICO", "DIA_DA_SEMANA_FATO",
+    "FAIXA_HORA_1", "FAIXA_HORA_6",
+    "QTDE_PRISAO", "IMV_TOTAL", "ICVPE_TOTAL", "ICVPA_TOTAL",
+]
+MESES = ["JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL", "MAIO", "JUNHO", "JULHO",
+         "AGOSTO", "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"]
+DIAS = ["DOMINGO", "SEGUNDA-FEIRA", "TERÇA-FEIRA", "QUARTA-FEIRA", "QUINTA-FEIRA", "SEXTA-FEIRA", "SÁBADO"]
+CHUNK = 50000
+
+def gerar(path: Path, linhas: int, municipios=20, bairros=50, naturezas=150, unidades=40,
+          setores=30, causas=25, meios=20, anos=(2020, 2024), seed=42):
+    """Escreve `linhas` ocorrências; as cardinalidades controlam o tamanho das dimensões.
+
+    `bairros` é por município. Com a mesma seed o arquivo sai idêntico.
+    """
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb = xlsxwriter.Workbook(str(path), {"constant_memory": True})
+    ws = wb.add_worksheet("ocorrencias")
+    ws.write_row(0, 0, COLUMNS)
+
+    # centros dos municípios (faixa de MG) para as coordenadas
+    cen_lat = rng.uniform(-22.5, -15.0, municipios)
+    cen_lon = rng.uniform(-50.5, -40.5, municipios)
+    n_anos = anos[1] - anos[0] + 1
+
+    row = 1
+    for ini in range(0, linhas, CHUNK):
+        n = min(CHUNK, linhas - ini)
+        mun = rng.integers(0, municipios, n)
+        bai = rng.integers(0, bairros, n)
+        nat = rng.zipf(1.6, n) % naturezas          # poucas naturezas concentram a maioria
+        sec1 = rng.integers(-naturezas, naturezas, n)  # negativos = sem natureza secundária
+        sec2 = rng.integers(-3 * naturezas, naturezas, n)
+        uni = rng.integers(0, unidades, n)
+        setor = rng.integers(0, setores, n)
+        sub = rng.integers(0, 4, n)
+        causa = rng.integers(-causas, causas, n)
+        meio = rng.integers(-meios, meios, n)
+        ano = anos[0] + rng.integers(0, n_anos, n)
+        mes = rng.integers(1, 13, n)
+        dia = rng.integers(1, 29, n)
+        hora = rng.integers(0, 24, n)
+        dsem = rng.integers(1, 8, n)
+        lat = cen_lat[mun] + rng.normal(0, 0.05, n)
+        lon = cen_lon[mun] + rng.normal(0, 0.05, n)
+        prisao = rng.poisson(0.3, n)
+        imv = rng.binomial(1, 0.02, n)
+        icvpe = rng.binomial(1, 0.2, n)
+        icvpa = rng.binomial(1, 0.1, n)
+        tc = rng.choice(["C", "T"], n, p=[0.9, 0.1])
+
+        for i in range(n):
+            m, u = int(mun[i]), int(uni[i])
+            s1, s2 = int(sec1[i]), int(sec2[i])
+            ws.write_row(row, 0, [
+                f"{ano[i]}-{ini + i:09d}-001",
+                f"{ano[i]}-{mes[i]:02d}-{dia[i]:02d}", f"{hora[i]:02d}:{(ini + i) % 60:02d}",
+                3100000 + m, f"MUNICIPIO {m:03d}", f"BAIRRO {int(bai[i]):03d}",
+                f"{lat[i]:.6f}".replace(".", ","), f"{lon[i]:.6f}".replace(".", ","),
+                f"N{int(nat[i]):04d}", f"NATUREZA {int(nat[i]):04d}", tc[i],
+                f"N{s1:04d}" if s1 >= 0 else None, f"NATUREZA {s1:04d}" if s1 >= 0 else None, tc[i] if s1 >= 0 else None,
+                f"N{s2:04d}" if s2 >= 0 else None, f"NATUREZA {s2:04d}" if s2 >= 0 else None, tc[i] if s2 >= 0 else None,
+                f"{u % 10 + 1} RPM", 10000 + u, f"{u + 1} BPM",
+                f"SETOR {int(setor[i]):03d}", f"SUBSETOR {int(setor[i]):03d}-{int(sub[i])}",
+                f"C{int(causa[i]):03d}" if causa[i] >= 0 else None,
+                f"CAUSA {int(causa[i]):03d}" if causa[i] >= 0 else None,
+                f"MEIO {int(meio[i]):03d}" if meio[i] >= 0 else None,
+                int(ano[i]), int(mes[i]), MESES[mes[i] - 1], int(dsem[i]), DIAS[dsem[i] - 1],
+                f"{hora[i]:02d}", f"{hora[i] // 6 * 6:02d}-{hora[i] // 6 * 6 + 5:02d}",
+                int(prisao[i]), int(imv[i]), int(icvpe[i]), int(icvpa[i]),
+            ])
+            row += 1
+        print(f"[info] {row - 1}/{linhas} linhas geradas")
+    wb.close()
+    return path
+
+def main():
+    ap = argparse.ArgumentParser(description="Gera planilha REDS sintética para benchmark.")
+    ap.add_argument("saida", type=Path)
+    ap.add_argument("--linhas", type=int, default=100000)
+    ap.add_argument("--municipios", type=int, default=20)
+    ap.add_argument("--bairros", type=int, default=50, help="bairros por município")
+    ap.add_argument("--naturezas", type=int, default=150)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    gerar(args.saida, args.linhas, municipios=args.municipios, bairros=args.bairros,
+          naturezas=args.naturezas, seed=args.seed)
+    print(f"✔ {args.saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# bench/perf_consultas.py
+# Regressão de desempenho das consultas que a interface e os painéis mandam ao Neo4j.
+#   - catálogo: texto de cada consulta (o mesmo que a API — e por ela o index.html —, o
+#     catálogo de facetas e os painéis montam) com parâmetros representativos da base sintética;
+#   - base reproduzível: planilha de gerar_sintetico.py (seed fixa) carregada pelo loader;
+#   - PROFILE de cada consulta: db hits, linhas, operadores do plano (alerta para varredura
+#     de rótulo e produto cartesiano) e colunas que vieram sempre nulas (padrão que não casa);
+#   - latência p50/p95/p99 em N execuções depois do aquecimento;
+#   - comparação com bench/consultas_baseline.json: regressão -> código de saída 1.
+import argparse
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from neo4j import GraphDatabase  # noqa: E402
+
+from gerar_sintetico import gerar  # noqa: E402
+from run_bench import DEFAULT_XLSX, git_rev, wipe  # noqa: E402
+from busca import CONSULTA as BUSCA, lucene  # noqa: E402
+from catalogo_facetas import FACETAS  # noqa: E402
+from servico_consultas import ler_filtros, montar_consulta  # noqa: E402
+import consultas_painel as painel  # noqa: E402
+from schema_neo4j import URI, USER, PASS  # noqa: E402
+
+RESULTS = Path(__file__).resolve().parent / "consultas.jsonl"
+BASELINE = Path(__file__).resolve().parent / "consultas_baseline.json"
+
+TOL_HITS = 0.10   # db hits acima da baseline que já contam como regressão
+TOL_LAT = 0.50    # p95 acima da baseline (latência oscila mais que db hits)
+MIN_MS = 5.0      # ... e pelo menos tantos ms a mais
+
+# operador -> alerta (o nome vem como "NodeByLabelScan@neo4j")
+ALERTAS = {
+    "AllNodesScan": "varre todos os nós",
+    "NodeByLabelScan": "varre o rótulo",
+    "CartesianProduct": "produto cartesiano",
+}
+
+# consulta -> (operador que o plano tem de ter, operadores proibidos); a tabela paginada
+# tem de sair do índice de NUMERO_REDS já ordenada ("Node[Unique]IndexSeekByRange", sem Sort)
+PLANOS = {
+    "painel_tabela": ("IndexSeekByRange", {"Sort", "PartialSort", "Top", "PartialTop", "NodeByLabelScan"}),
+}
+
+# valores que existem na base sintética (gerar_sintetico.py, seed 42)
+ANO = 2024
+MUNICIPIO = ("3100007", "MUNICIPIO 007")
+NATUREZA = ("N0001", "NATUREZA 0001")  # a mais frequente (zipf)
+BUSCA_TERMO = "bairro 012"
+
+def consulta_grafo(**params):
+    """(texto, parâmetros) que /api/grafo roda para os parâmetros de URL que o index.html
+    envia (buildParams): o mesmo ler_filtros + montar_consulta do GrafoHandler, então não
+    há cópia da consulta da página para manter em dia."""
+    return montar_consulta(ler_filtros(lambda n: None if params.get(n) is None else str(params[n])))
+
+def catalogo():
+    """[{nome, origem, cypher, params, nao_nulos}]; nao_nulos: colunas que têm de vir
+    preenchidas em alguma linha (senão o padrão do MATCH não casa com o modelo)."""
+    out = [
+        # o index.html só chama /api/grafo: uma entrada por forma de consulta da API
+        ("api_sem_filtro", "servico_consultas", *consulta_grafo(limit=200), ["o", "d", "r"]),
+        ("api_ano", "servico_consultas", *consulta_grafo(ano=ANO, limit=200), ["o", "d", "r"]),
+        ("api_ano_municipio_natureza", "servico_consultas",
+         *consulta_grafo(ano=ANO, municipio=MUNICIPIO[0], natureza=NATUREZA[1], limit=200), ["o", "d", "mun"]),
+        ("api_busca", "servico_consultas", *consulta_grafo(busca=BUSCA_TERMO, limit=200), ["o", "d"]),
+        ("busca_dimensoes", "busca", BUSCA, {"q": lucene(BUSCA_TERMO), "limite": 20}, ["id"]),
+    ]
+    out += [(f"facetas_{nome}", "catalogo_facetas", q, {}, ["n"]) for nome, q in FACETAS.items()]
+    filtros = {"ano": ANO, "municipio": MUNICIPIO[0], "natureza": None}
+    tabela = painel.pagina(filtros)
+    out += [
+        ("painel_serie_mensal", "painel", painel.SERIE_MENSAL, filtros, ["ocorrencias"]),
+        ("painel_top_naturezas", "painel", painel.TOP_NATUREZAS, {**filtros, "n": 15}, ["natureza"]),
+        ("painel_top_bairros", "painel", painel.TOP_BAIRROS, {**filtros, "n": 20}, ["bairro"]),
+        ("painel_celulas", "painel", painel.CELULAS, {**filtros, "nivel": 2, "limite": 5000}, ["lat"]),
+        ("painel_tabela", "painel", tabela[0], {**tabela[1], "after": "", "n": 50}, ["bairro", "natureza"]),
+    ]
+    return [{"nome": n, "origem": o, "cypher": q, "params": p, "nao_nulos": nn} for n, o, q, p, nn in out]
+
+# ---------- medição ----------
+
+def _operadores(plano, out=None):
+    """Percorre o plano do PROFILE: (db hits somados, [(operador, detalhes)])."""
+    out = [] if out is None else out
+    op = plano.get("operatorType", "").split("@")[0]
+    out.append((op, (plano.get("args") or {}).get("Details", "")))
+    hits = plano.get("dbHits", 0)
+    for filho in plano.get("children", []):
+        h, _ = _operadores(filho, out)
+        hits += h
+    return hits, out
+
+def perfilar(session, c):
+    """Um PROFILE: linhas, db hits, operadores, alertas, colunas sempre nulas e avisos."""
+    result = session.run("PROFILE " + c["cypher"], **c["params"])
+    linhas, preenchidas = 0, set()
+    for rec in result:
+        linhas += 1
+        preenchidas.update(k for k in c["nao_nulos"] if rec.get(k) is not None)
+    summary = result.consume()
+    hits, ops = _operadores(summary.profile or {})
+    alertas = sorted({f"{op}({det})" if det else op for op, det in ops if op in ALERTAS})
+    if c["nome"] in PLANOS:
+        exige, proibe = PLANOS[c["nome"]]
+        if not any(exige in op for op, _ in ops):
+            alertas.append(f"sem {exige}")
+        alertas += sorted({op for op, _ in ops if op in proibe and op not in ALERTAS})
+    return {
+        "linhas": linhas,
+        "db_hits": hits,
+        "operadores": sorted({op for op, _ in ops}),
+        "alertas": alertas,
+        "sempre_nulas": [k for k in c["nao_nulos"] if k not in preenchidas] if linhas else [],
+        "avisos": sorted({n.get("code", "") for n in summary.notifications or []}),
+    }
+
+def cronometrar(session, c, aquecer, repeticoes):
+    for _ in range(aquecer):
+        session.run(c["cypher"], **c["params"]).consume()
+    ms = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        session.run(c["cypher"], **c["params"]).consume()
+        ms.append((time.perf_counter() - t0) * 1000)
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]).tolist()
+    return {"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2)}
+
+def medir(driver, consultas, aquecer=3, repeticoes=20):
+    out = {}
+    with driver.session(default_access_mode="READ") as session:
+        for c in consultas:
+            try:
+                r = {**perfilar(session, c), **cronometrar(session, c, aquecer, repeticoes)}
+            except Exception as e:  # consulta quebrada também é regressão
+                r = {"erro": f"{type(e).__name__}: {e}"}
+            out[c["nome"]] = {"origem": c["origem"], **r}
+            if "erro" in r:
+                print(f"[bench] {c['nome']}: ERRO {r['erro']}")
+            else:
+                print(f"[bench] {c['nome']}: {r['linhas']} linhas, {r['db_hits']} db hits, "
+                      f"p50 {r['p50_ms']} ms, p95 {r['p95_ms']} ms"
+                      + (f"  ! {', '.join(r['alertas'])}" if r["alertas"] else ""))
+    return out
+
+def base_dados(driver):
+    """Identidade da base medida (só compara linhas se for a mesma)."""
+    with driver.session(default_access_mode="READ") as session:
+        return {"ocorrencias": session.run("MATCH (o:Ocorrencia) RETURN count(o) AS n").single()["n"]}
+
+# ---------- comparação ----------
+
+def comparar(atual, base, mesma_base=True):
+    """-> (regressões, observações). Regressões fazem o script sair com código 1."""
+    reg, obs = [], []
+    for nome, r in atual["consultas"].items():
+        if "erro" in r:
+            reg.append(f"{nome}: falhou ({r['erro']})")
+            continue
+        if r["sempre_nulas"]:
+            reg.append(f"{nome}: colunas sempre nulas {r['sempre_nulas']} (padrão não casa com o modelo?)")
+        if r["linhas"] == 0:
+            reg.append(f"{nome}: nenhuma linha")
+        b = (base or {}).get("consultas", {}).get(nome)
+        if not b or "erro" in b:
+            obs.append(f"{nome}: sem baseline")
+            continue
+        if r["db_hits"] > b["db_hits"] * (1 + TOL_HITS):
+            reg.append(f"{nome}: db hits {b['db_hits']} -> {r['db_hits']}")
+        elif r["db_hits"] < b["db_hits"] * (1 - TOL_HITS):
+            obs.append(f"{nome}: db hits {b['db_hits']} -> {r['db_hits']} (melhorou)")
+        if r["p95_ms"] > b["p95_ms"] * (1 + TOL_LAT) and r["p95_ms"] - b["p95_ms"] > MIN_MS:
+            reg.append(f"{nome}: p95 {b['p95_ms']} -> {r['p95_ms']} ms")
+        novos = sorted(set(r["alertas"]) - set(b["alertas"]))
+        if novos:
+            reg.append(f"{nome}: plano novo com {', '.join(novos)}")
+        avisos = sorted(set(r["avisos"]) - set(b["avisos"]))
+        if avisos:
+            reg.append(f"{nome}: avisos novos do servidor {avisos}")
+        if mesma_base and r["linhas"] != b["linhas"]:
+            reg.append(f"{nome}: linhas {b['linhas']} -> {r['linhas']} (resultado mudou)")
+        if set(r["operadores"]) != set(b["operadores"]):
+            obs.append(f"{nome}: operadores mudaram "
+                       f"(+{sorted(set(r['operadores']) - set(b['operadores']))} "
+                       f"-{sorted(set(b['operadores']) - set(r['operadores']))})")
+    return reg, obs
+
+def semear(driver, linhas, seed):
+    """Apaga o banco e carrega a planilha sintética pelo loader (mesmo caminho da produção)."""
+    path = Path(str(DEFAULT_XLSX).format(linhas=linhas)).with_stem(f"sintetico_{linhas}_s{seed}")
+    if not path.exists():
+        gerar(path, linhas, seed=seed)
+    wipe(driver)
+    subprocess.run([sys.executable, str(ROOT / "src" / "load_to_neo4j.py"), "--input", str(path)],
+                   cwd=ROOT, check=True)
+
+def main():
+    ap = argparse.ArgumentParser(description="PROFILE + latência das consultas da interface, "
+                                             "comparados com a baseline.")
+    ap.add_argument("--semear", action="store_true",
+                    help="APAGA o banco e carrega a base sintética antes de medir (só no container local)")
+    ap.add_argument("--linhas", type=int, default=50000, help="linhas da base sintética")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--aquecer", type=int, default=3, help="execuções descartadas por consulta")
+    ap.add_argument("--repeticoes", type=int, default=20, help="execuções medidas por consulta")
+    ap.add_argument("--so", nargs="*", help="só as consultas cujo nome contém um destes trechos")
+    ap.add_argument("--baseline", type=Path, default=BASELINE)
+    ap.add_argument("--gravar-baseline", action="store_true", help="grava o resultado como nova baseline")
+    args = ap.parse_args()
+
+    consultas = [c for c in catalogo() if not args.so or any(s in c["nome"] for s in args.so)]
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        if args.semear:
+            semear(driver, args.linhas, args.seed)
+        atual = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "git": git_rev(),
+            "base": {**base_dados(driver), "linhas": args.linhas, "seed": args.seed},
+            "repeticoes": args.repeticoes,
+            "consultas": medir(driver, consultas, args.aquecer, args.repeticoes),
+        }
+    finally:
+        driver.close()
+    with RESULTS.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(atual, ensure_ascii=False) + "\n")
+
+    base = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    mesma = base is not None and base.get("base") == atual["base"]
+    if base is not None and not mesma:
+        print(f"[warn] base medida {atual['base']} difere da baseline {base.get('base')}; "
+              "linhas não são comparadas")
+    reg, obs = comparar(atual, base, mesma)
+    for o in obs:
+        print(f"[info] {o}")
+    for r in reg:
+        print(f"[REGRESSAO] {r}")
+    if args.gravar_baseline:
+        args.baseline.write_text(json.dumps(atual, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"✔ baseline gravada em {args.baseline}")
+    elif reg:
+        print(f"✘ {len(reg)} regressões em {len(consultas)} consultas")
+        sys.exit(1)
+    else:
+        print(f"✔ {len(consultas)} consultas sem regressão")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# bench/run_bench.py
+# Mede cada fase da carga (dimensões, ocorrências lidas/preparadas/gravadas) contra um
+# Neo4j local e acrescenta o resultado em bench/results.jsonl.
+# As ocorrências passam pelo mesmo caminho do loader, lote a lote: parse_batches ->
+# ParallelWriter -> write_oc_batch (cache de elementId) -> etapa de resumos, sem guardar a
+# planilha. Rodar com e sem --no-rollups mostra quanto a etapa de resumos custa à vazão.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from neo4j import GraphDatabase  # noqa: E402
+
+from gerar_sintetico import gerar  # noqa: E402
+from modelo import OC_REL_SPECS, dim_frames  # noqa: E402
+from preparo import records  # noqa: E402
+from popular_dimensoes_v2 import dimensoes_da_planilha  # noqa: E402
+from schema_neo4j import ensure_schema  # noqa: E402
+from instrumentacao import Metricas  # noqa: E402
+from escrita_paralela import ParallelWriter  # noqa: E402
+from cache_dimensoes import CacheDimensoes  # noqa: E402
+from load_to_neo4j import (URI, USER, PASS, BATCH, WORKERS, merge_nodes, relate_many,  # noqa: E402
+                           write_batched, parse_batches, write_oc_batch, estagio_resumos,
+                           ao_gravar, fechar_escritores)
+
+RESULTS = Path(__file__).resolve().parent / "results.jsonl"
+DEFAULT_XLSX = ROOT / "data" / "bench" / "sintetico_{linhas}.xlsx"
+AMOSTRA_RSS = 0.05  # segundos entre amostras de RSS durante uma fase
+
+def rss_mb():
+    """RSS atual do processo (não o pico acumulado de ru_maxrss); None fora do Linux."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+
+class AmostradorRSS:
+    """RSS no início e no fim de uma fase e o pico amostrado (thread) enquanto ela roda."""
+
+    def __init__(self, intervalo=AMOSTRA_RSS):
+        self.intervalo = intervalo
+        self.ini = self.fim = self.pico = None
+        self._parar = threading.Event()
+        self._t = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            v = rss_mb()
+            if v is not None and (self.pico is None or v > self.pico):
+                self.pico = v
+
+    def __enter__(self):
+        self.ini = self.pico = rss_mb()
+        if self.ini is not None:
+            self._t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        if self._t.is_alive():
+            self._t.join()
+        self.fim = rss_mb()
+        if self.fim is not None and (self.pico is None or self.fim > self.pico):
+            self.pico = self.fim
+
+    def campos(self):
+        delta = round(self.fim - self.ini, 1) if self.ini is not None else None
+        return {"rss_ini_mb": self.ini, "rss_fim_mb": self.fim, "rss_delta_mb": delta,
+                "rss_pico_mb": self.pico}
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class CountingSession:
+    """Sessão que conta as transações de escrita enviadas."""
+
+    def __init__(self, session):
+        self.session = session
+        self.tx = 0
+
+    def execute_write(self, fn, *args, **kwargs):
+        self.tx += 1
+        return self.session.execute_write(fn, *args, **kwargs)
+
+class Bench:
+    def __init__(self):
+        self.phases = {}
+
+    def phase(self, name, fn, rows_of=len, tx_of=None):
+        """tx_of: função sem argumentos que devolve o nº de transações até agora."""
+        tx0 = tx_of() if tx_of else 0
+        t0 = time.perf_counter()
+        with AmostradorRSS() as rss:
+            out = fn()
+        dt = time.perf_counter() - t0
+        rows = rows_of(out)
+        p = self.phases[name] = {
+            "s": round(dt, 3),
+            "rows": rows,
+            "rows_s": round(rows / dt, 1) if dt else None,
+            "tx": (tx_of() - tx0) if tx_of else 0,
+            **rss.campos(),
+        }
+        print(f"[bench] {name}: {dt:.2f}s, {rows} linhas, {p['rows_s']} linhas/s, {p['tx']} tx, "
+              f"RSS {p['rss_ini_mb']} -> {p['rss_fim_mb']} MB (pico {p['rss_pico_mb']})")
+        return out
+
+    def subfases(self, m: Metricas, rows):
+        """Tempo de cada fase interna do loader (leitura, preparo, merge, relações, resumos).
+        As de gravação somam o tempo de todos os workers."""
+        out = {}
+        for name, p in m.snapshot()["phases"].items():
+            out[name] = {"s": p["wall"], "cpu": p["cpu"],
+                         "rows_s": round(rows / p["wall"], 1) if p["wall"] else None}
+        return out
+
+def wipe(driver):
+    with driver.session() as s:
+        s.run("MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS").consume()
+
+def ocorrencias(path, m, writer=None, resumidor=None):
+    """Lê, prepara e (com writer) grava as ocorrências lote a lote; devolve as linhas lidas.
+    Só os lotes nas filas dos workers ficam em memória."""
+    lidas = 0
+    for lote in parse_batches(path, metricas=m):
+        lidas += lote.fim - lote.ini
+        if writer is not None:
+            writer.submit(lote.oc_rows, lote.rel_rows, on_done=ao_gravar(resumidor, lote.oc_rows))
+    return lidas
+
+def run(path: Path, usar_neo4j=True, limpar=False, workers=WORKERS, resumos=True):
+    b = Bench()
+    m = Metricas("bench")
+    dims = b.phase("dim_build", lambda: dimensoes_da_planilha(path),
+                   rows_of=lambda ds: sum(len(df) for df in ds.values()))
+
+    if not usar_neo4j:
+        lidas = b.phase("ocorrencias", lambda: ocorrencias(path, m), rows_of=lambda n: n)
+    else:
+        driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+        try:
+            if limpar:
+                wipe(driver)
+            ensure_schema(driver)
+            with driver.session() as raw:
+                s = CountingSession(raw)
+
+                def upsert_dims():
+                    nodes, rels = dim_frames(dims)
+                    n = 0
+                    for _, label, keys, df in nodes:
+                        write_batched(s, merge_nodes, records(df), label, keys)
+                        n += len(df)
+                    for rel, a_label, a_keys, b_label, b_keys, df in rels:
+                        write_batched(s, relate_many, records(df), a_label, a_keys, b_label, b_keys, rel)
+                    return n
+
+                b.phase("dim_upsert", upsert_dims, rows_of=lambda n: n, tx_of=lambda: s.tx)
+                cache = CacheDimensoes()
+                b.phase("id_cache", lambda: cache.preload(raw, sorted({lb for _, lb in OC_REL_SPECS})),
+                        rows_of=lambda _: sum(len(c) for c in cache.caches.values()))
+            del dims
+
+            def gravar():
+                writer = ParallelWriter(driver, max(1, workers),
+                                        partial(write_oc_batch, metricas=m, cache=cache, resumos=resumos))
+                resumidor = estagio_resumos(driver, m) if resumos else None
+                erro = None
+                try:
+                    return ocorrencias(path, m, writer, resumidor)
+                except BaseException as e:
+                    erro = e
+                    raise
+                finally:
+                    fechar_escritores([writer, *filter(None, [resumidor])], erro)
+
+            lidas = b.phase("ocorrencias", gravar, rows_of=lambda n: n, tx_of=lambda: m.tx)
+        finally:
+            driver.close()
+
+    result = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "git": git_rev(),
+        "arquivo": path.name,
+        "linhas": lidas,
+        "batch": BATCH,
+        "workers": workers if usar_neo4j else 0,
+        "resumos": resumos and usar_neo4j,
+        "neo4j": usar_neo4j,
+        "rss_pico_mb": max((p["rss_pico_mb"] for p in b.phases.values() if p["rss_pico_mb"] is not None),
+                           default=None),
+        "phases": b.phases,
+        "subfases": b.subfases(m, lidas),
+    }
+    with RESULTS.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return result
+
+def historico(n=10):
+    if not RESULTS.exists():
+        print("[info] sem resultados ainda")
+        return
+    lines = [json.loads(x) for x in RESULTS.read_text(encoding="utf-8").splitlines() if x.strip()]
+    names = ["dim_build", "dim_upsert", "ocorrencias"]
+    print("ts                   git      linhas   " + "  ".join(f"{p:>11}" for p in names) + "   rss_pico_mb")
+    for r in lines[-n:]:
+        rates = [r["phases"].get(p, {}).get("rows_s") for p in names]
+        # resultados antigos (fases separadas, ru_maxrss) guardavam peak_rss_mb
+        print(f"{r['ts']:<20} {r['git'] or '-':<8} {r['linhas']:>7}   "
+              + "  ".join(f"{v if v is not None else '-':>11}" for v in rates)
+              + f"   {r.get('rss_pico_mb', r.get('peak_rss_mb'))}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark da carga REDS -> Neo4j (linhas/s por fase).")
+    ap.add_argument("--xlsx", type=Path, help="planilha a medir (padrão: sintética em data/bench/)")
+    ap.add_argument("--linhas", type=int, default=50000, help="linhas da planilha sintética")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--sem-neo4j", action="store_true", help="mede só dimensões e leitura/preparo")
+    ap.add_argument("--workers", type=int, default=WORKERS,
+                    help=f"threads gravando Ocorrencias, como no loader (padrão {WORKERS})")
+    ap.add_argument("--no-rollups", action="store_true", help="grava sem a etapa de resumos por lote")
+    ap.add_argument("--limpar", action="store_true",
+                    help="APAGA todo o banco antes de medir (use só no container local)")
+    ap.add_argument("--historico", action="store_true", help="mostra os últimos resultados e sai")
+    args = ap.parse_args()
+
+    if args.historico:
+        historico()
+        return
+    path = args.xlsx or Path(str(DEFAULT_XLSX).format(linhas=args.linhas))
+    if not path.exists():
+        gerar(path, args.linhas, seed=args.seed)
+    run(path, usar_neo4j=not args.sem_neo4j, limpar=args.limpar, workers=args.workers,
+        resumos=not args.no_rollups)
+    print(f"✔ resultado acrescentado em {RESULTS}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# src/analises_gds.py
+# Análises com o Graph Data Science sobre o grafo carregado:
+#   - coocorrencia: Bairro <-> NaturezaPrincipal com peso = nº de ocorrências, montada a
+#     partir dos ResumoBairro (não varre Ocorrencias). COOCORRE (não direcionada) para
+#     comunidades/centralidade; PERFIL (Bairro -> Natureza) para similaridade entre bairros;
+#   - hierarquia: UnidadeN6 -> UnidadeN5 e SubSetor -> Setor (PERTENCE_A).
+# Cada projeção é criada uma vez e reaproveitada por todos os algoritmos; o nome leva a
+# versão dos rótulos de que ela depende (versao_carga.versao_de), então só é refeita quando
+# uma carga mexeu nesses rótulos. Os resultados voltam ao banco em lotes de LOTE linhas.
+import argparse
+import re
+
+from neo4j import GraphDatabase
+
+from schema_neo4j import URI, USER, PASS
+from versao_carga import versao_de
+
+LOTE = 5000     # linhas por transação na gravação dos resultados
+FETCH = 5000    # registros por ida ao servidor na leitura dos streams
+
+# nome -> (rótulos/relações de que depende, Cypher que cria a projeção com o nome $g)
+PROJECOES = {
+    "coocorrencia": (["ResumoBairro", "Bairro", "NaturezaPrincipal"], """
+        MATCH (r:ResumoBairro)
+        WITH r.municipio_cod AS mc, r.bairro AS bn, r.natureza AS nc, sum(r.ocorrencias) AS peso
+        MATCH (b:Bairro {municipio_cod: mc, nome: bn})
+        MATCH (n:NaturezaPrincipal {codigo: nc})
+        UNWIND ['COOCORRE', 'PERFIL'] AS tipo
+        WITH gds.graph.project($g, b, n, {
+               sourceNodeLabels: 'Bairro', targetNodeLabels: 'NaturezaPrincipal',
+               relationshipType: tipo, relationshipProperties: {peso: toFloat(peso)}
+             }, {undirectedRelationshipTypes: ['COOCORRE']}) AS g
+        RETURN g.graphName AS nome, g.nodeCount AS nos, g.relationshipCount AS relacoes
+    """),
+    "hierarquia": (["UnidadeN5", "UnidadeN6", "Setor", "SubSetor", "PERTENCE_A"], """
+        CALL gds.graph.project($g, ['UnidadeN5', 'UnidadeN6', 'Setor', 'SubSetor'],
+                               {PERTENCE_A: {orientation: 'UNDIRECTED'}})
+        YIELD graphName AS nome, nodeCount AS nos, relationshipCount AS relacoes
+        RETURN nome, nos, relacoes
+    """),
+}
+
+# nome -> (projeção, procedimento, coluna do resultado, configuração, propriedade gravada)
+ANALISES = {
+    "comunidades": ("coocorrencia", "gds.louvain", "communityId",
+                    {"relationshipTypes": ["COOCORRE"], "relationshipWeightProperty": "peso"}, "comunidade"),
+    "centralidade": ("coocorrencia", "gds.pageRank", "score",
+                     {"relationshipTypes": ["COOCORRE"], "relationshipWeightProperty": "peso"}, "pagerank"),
+    "similaridade": ("coocorrencia", "gds.nodeSimilarity", "similarity",
+                     {"relationshipTypes": ["PERFIL"], "relationshipWeightProperty": "peso",
+                      "topK": 5, "similarityCutoff": 0.3}, "SEMELHANTE_A"),
+    "hierarquia": ("hierarquia", "gds.wcc", "componentId", {}, "componente_hierarquia"),
+    "grau_hierarquia": ("hierarquia", "gds.degree", "score", {}, "grau_hierarquia"),
+}
+_NOME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")  # propriedades/tipos vão no texto da consulta
+
+def _versao_nome(v):
+    return v or "0"
+
+def projecao(session, nome, cache=None):
+    """Nome da projeção em memória atualizada para `nome`; cria (e apaga as antigas) se preciso."""
+    if cache is not None and nome in cache:
+        return cache[nome]
+    rotulos, q = PROJECOES[nome]
+    atual = f"{nome}_{_versao_nome(versao_de(rotulos))}"
+    existentes = [rec["graphName"] for rec in session.run("CALL gds.graph.list() YIELD graphName")]
+    if atual in existentes:
+        print(f"[info] projeção {atual} reaproveitada")
+    else:
+        for g in existentes:
+            if g.startswith(f"{nome}_"):
+                session.run("CALL gds.graph.drop($g, false) YIELD graphName", g=g).consume()
+                print(f"[info] projeção {g} descartada (carga nova)")
+        rec = session.run(q, g=atual).single()
+        print(f"[ok] projeção {rec['nome']}: {rec['nos']} nós, {rec['relacoes']} relações")
+    if cache is not None:
+        cache[nome] = atual
+    return atual
+
+def _gravar_lotes(driver, registros, q):
+    """Consome um stream de dicts e grava em transações de LOTE linhas."""
+    total = 0
+    with driver.session() as session:
+        lote = []
+        for row in registros:
+            lote.append(row)
+            if len(lote) >= LOTE:
+                session.execute_write(lambda tx, rows: tx.run(q, rows=rows).consume(), lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            session.execute_write(lambda tx, rows: tx.run(q, rows=rows).consume(), lote)
+            total += len(lote)
+    return total
+
+def _stream_nos(session, g, proc, coluna, config, modo, prop):
+    if modo == "mutate":
+        session.run("CALL gds.graph.nodeProperties.drop($g, [$p], {failIfMissing: false})", g=g, p=prop).consume()
+        session.run(f"CALL {proc}.mutate($g, $cfg)", g=g, cfg={**config, "mutateProperty": prop}).consume()
+        q = ("CALL gds.graph.nodeProperty.stream($g, $p) YIELD nodeId, propertyValue "
+             "RETURN elementId(gds.util.asNode(nodeId)) AS id, propertyValue AS valor")
+        return session.run(q, g=g, p=prop)
+    q = (f"CALL {proc}.stream($g, $cfg) YIELD nodeId, {coluna} "
+         f"RETURN elementId(gds.util.asNode(nodeId)) AS id, {coluna} AS valor")
+    return session.run(q, g=g, cfg=config)
+
+# com topK um par pode vir num sentido só (b está no topK de a, mas a não no de b):
+# agrupa pelo par sem ordem ({menor, maior}) e fica o maior score
+_UM_POR_PAR = ("WITH CASE WHEN a < b THEN a ELSE b END AS x, CASE WHEN a < b THEN b ELSE a END AS y, "
+               "max(score) AS score "
+               "RETURN elementId(gds.util.asNode(x)) AS a, elementId(gds.util.asNode(y)) AS b, score")
+
+def _stream_pares(session, g, proc, coluna, config, modo, tipo):
+    if modo == "mutate":
+        tipos = session.run("CALL gds.graph.list($g) YIELD schemaWithOrientation "
+                            "RETURN keys(schemaWithOrientation.relationships) AS t", g=g).single()["t"]
+        if tipo in tipos:
+            session.run("CALL gds.graph.relationships.drop($g, $t)", g=g, t=tipo).consume()
+        session.run(f"CALL {proc}.mutate($g, $cfg)", g=g,
+                    cfg={**config, "mutateRelationshipType": tipo, "mutateProperty": "score"}).consume()
+        q = ("CALL gds.graph.relationshipProperty.stream($g, 'score', [$t]) "
+             "YIELD sourceNodeId AS a, targetNodeId AS b, propertyValue AS score " + _UM_POR_PAR)
+        return session.run(q, g=g, t=tipo)
+    q = (f"CALL {proc}.stream($g, $cfg) YIELD node1 AS a, node2 AS b, {coluna} AS score "
+         + _UM_POR_PAR)
+    return session.run(q, g=g, cfg=config)
+
+def _apagar_relacoes(driver, tipo):
+    q = f"MATCH ()-[r:{tipo}]->() WITH r LIMIT $n DELETE r RETURN count(*) AS n"
+    with driver.session() as session:
+        while session.execute_write(lambda tx: tx.run(q, n=LOTE).single()["n"]):
+            pass
+
+def rodar(driver, nome, modo="stream", cache=None):
+    """Roda uma análise de ANALISES e grava o resultado. Devolve quantas linhas gravou."""
+    proj, proc, coluna, config, saida = ANALISES[nome]
+    if not _NOME.match(saida):
+        raise ValueError(f"nome inválido para gravar: {saida}")
+    with driver.session(fetch_size=FETCH) as session:
+        g = projecao(session, proj, cache)
+        if proc == "gds.nodeSimilarity":
+            _apagar_relacoes(driver, saida)
+            stream = _stream_pares(session, g, proc, coluna, config, modo, saida)
+            q = (f"UNWIND $rows AS row "
+                 f"MATCH (a) WHERE elementId(a) = row.a MATCH (b) WHERE elementId(b) = row.b "
+                 f"MERGE (a)-[r:{saida}]->(b) SET r.score = row.score")
+        else:
+            stream = _stream_nos(session, g, proc, coluna, config, modo, saida)
+            q = f"UNWIND $rows AS row MATCH (n) WHERE elementId(n) = row.id SET n.{saida} = row.valor"
+        n = _gravar_lotes(driver, (rec.data() for rec in stream), q)
+    print(f"[ok] {nome}: {n} resultados gravados em {saida} ({modo})")
+    return n
+
+def main():
+    ap = argparse.ArgumentParser(description="Análises GDS (comunidades, centralidade, similaridade).")
+    ap.add_argument("analises", nargs="*", metavar="ANALISE",
+                    help=f"quais rodar (padrão: todas): {', '.join(ANALISES)}")
+    ap.add_argument("--modo", choices=["stream", "mutate"], default="stream",
+                    help="stream: resultado direto; mutate: guarda na projeção e lê de lá")
+    ap.add_argument("--listar", action="store_true", help="mostra as projeções em memória e sai")
+    ap.add_argument("--drop", action="store_true", help="só descarta as projeções em memória e sai")
+    args = ap.parse_args()
+    desconhecidas = set(args.analises) - set(ANALISES)
+    if desconhecidas:
+        ap.error(f"análise desconhecida: {', '.join(sorted(desconhecidas))}")
+
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        if args.listar:
+            with driver.session() as session:
+                q = ("CALL gds.graph.list() YIELD graphName, nodeCount, relationshipCount, memoryUsage "
+                     "RETURN graphName, nodeCount, relationshipCount, memoryUsage ORDER BY graphName")
+                for rec in session.run(q):
+                    print(rec.data())
+            return
+        if args.drop:
+            with driver.session() as session:
+                for nome in PROJECOES:
+                    session.run("CALL gds.graph.list() YIELD graphName WHERE graphName STARTS WITH $p "
+                                "CALL gds.graph.drop(graphName) YIELD graphName AS g RETURN g",
+                                p=f"{nome}_").consume()
+            print("✔ Projeções descartadas.")
+            return
+        cache = {}
+        for nome in args.analises or ANALISES:
+            rodar(driver, nome, args.modo, cache)
+    finally:
+        driver.close()
+    print("✔ Análises concluídas.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# src/app_streamlit.py
+# Interface exploratória (streamlit run src/app_streamlit.py).
+# Desempenho:
+#   - um driver (pool de conexões) por processo, em st.cache_resource;
+#   - resultados lidos em blocos de FETCH registros e montados direto em Arrow
+#     (DataFrame com dtypes pyarrow, sem passar por listas de dicts);
+#   - cada seção tem a sua função em st.cache_data (TTL), com a versão dos dados na
+#     chave: mudar um filtro só consulta o que depende dele, e uma carga nova invalida tudo;
+#   - séries, rankings e o mapa de calor vêm dos resumos (resumos.py), não das Ocorrencias;
+#   - a tabela de ocorrências é paginada no servidor por NUMERO_REDS (keyset) e roda num
+#     st.fragment: trocar de página não reexecuta o resto da página.
+import json
+import os
+
+import altair as alt
+import pandas as pd
+import pyarrow as pa
+import pydeck as pdk
+import streamlit as st
+from neo4j import GraphDatabase
+
+from schema_neo4j import URI, USER, PASS
+from catalogo_facetas import PASTA as CATALOGO, FACETAS
+from versao_carga import Observador
+from espacial import NIVEIS
+import consultas_painel as painel
+
+FETCH = int(os.getenv("APP_FETCH_SIZE", "2000"))   # registros por ida ao servidor
+TTL = int(os.getenv("APP_CACHE_TTL", "600"))       # segundos
+POOL = int(os.getenv("APP_POOL_SIZE", "10"))       # conexões Bolt do app
+MAPA_MAX = 5000                                     # células no mapa
+PAGINAS = [50, 100, 500]
+TODOS = "(todos)"
+
+@st.cache_resource
+def get_driver():
+    return GraphDatabase.driver(URI, auth=(USER, PASS), max_connection_pool_size=POOL)
+
+def _bloco(keys, linhas):
+    return pa.table({k: [lin[i] for lin in linhas] for i, k in enumerate(keys)})
+
+def consultar(q, **params):
+    """Roda uma leitura e devolve um DataFrame com dtypes Arrow, em blocos de FETCH."""
+    with get_driver().session(default_access_mode="READ", fetch_size=FETCH) as session:
+        result = session.run(q, **params)
+        keys = result.keys()
+        blocos, linhas = [], []
+        for rec in result:
+            linhas.append(rec.values())
+            if len(linhas) >= FETCH:
+                blocos.append(_bloco(keys, linhas))
+                linhas = []
+        if linhas or not blocos:
+            blocos.append(_bloco(keys, linhas))
+    # um bloco só com nulos numa coluna tem tipo null; promove para o tipo dos outros
+    tabela = pa.concat_tables(blocos, promote_options="default")
+    return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+
+# ---------- filtros (catálogo de facetas; consulta ao banco só se não houver) ----------
+
+@st.cache_data(ttl=TTL)
+def facetas(versao):
+    atual = CATALOGO / "atual.json"
+    if atual.exists():
+        arq = CATALOGO / json.loads(atual.read_text(encoding="utf-8"))["arquivo"]
+        if arq.exists():
+            return json.loads(arq.read_text(encoding="utf-8"))
+    return {nome: consultar(FACETAS[nome]).to_dict("records")
+            for nome in ("anos", "municipios", "naturezas_principais")}
+
+def ler_filtros(cat):
+    st.sidebar.header("Filtros")
+    anos = [TODOS] + [a["ano"] for a in cat["anos"]]
+    ano = st.sidebar.selectbox("Ano", anos)
+    muns = {m["cod"]: m["nome"] for m in cat["municipios"]}
+    mun = st.sidebar.selectbox("Município", [TODOS, *muns], format_func=lambda c: muns.get(c, c))
+    nats = {n["codigo"]: f'{n["codigo"]} - {n["descricao"]}' for n in cat["naturezas_principais"]}
+    nat = st.sidebar.selectbox("Natureza principal", [TODOS, *nats], format_func=lambda c: nats.get(c, c))
+    return {
+        "ano": None if ano == TODOS else int(ano),
+        "municipio": None if mun == TODOS else mun,
+        "natureza": None if nat == TODOS else nat,
+    }
+
+# ---------- agregados (resumos) ----------
+
+@st.cache_data(ttl=TTL)
+def serie_mensal(versao, ano, municipio, natureza):
+    return consultar(painel.SERIE_MENSAL, ano=ano, municipio=municipio, natureza=natureza)
+
+@st.cache_data(ttl=TTL)
+def top_naturezas(versao, ano, municipio, n=15):
+    return consultar(painel.TOP_NATUREZAS, ano=ano, municipio=municipio, natureza=None, n=n)
+
+@st.cache_data(ttl=TTL)
+def top_bairros(versao, ano, municipio, natureza, n=20):
+    return consultar(painel.TOP_BAIRROS, ano=ano, municipio=municipio, natureza=natureza, n=n)
+
+@st.cache_data(ttl=TTL)
+def celulas(versao, ano, municipio, natureza, nivel, limite=MAPA_MAX):
+    """Células da grade (ResumoCelula) com a contagem do período/natureza."""
+    return consultar(painel.CELULAS, ano=ano, municipio=municipio, natureza=natureza,
+                     nivel=nivel, limite=limite)
+
+# ---------- ocorrências (tabela paginada) ----------
+
+@st.cache_data(ttl=TTL)
+def pagina(versao, ano, municipio, natureza, after, n):
+    """Próximas `n` ocorrências depois de NUMERO_REDS `after` (consultas_painel.pagina)."""
+    q, params = painel.pagina({"ano": ano, "municipio": municipio, "natureza": natureza})
+    return consultar(q, after=after, n=n, **params)
+
+@st.fragment
+def tabela(versao, f):
+    st.subheader("Ocorrências")
+    n = st.selectbox("Por página", PAGINAS, key="por_pagina")
+    # pilha de cursores (último NUMERO_REDS de cada página); filtros novos voltam ao início
+    chave = (versao, tuple(f.values()), n)
+    if st.session_state.get("cursor_chave") != chave:
+        st.session_state.cursor_chave = chave
+        st.session_state.cursores = [""]
+    cursores = st.session_state.cursores
+    df = pagina(versao, f["ano"], f["municipio"], f["natureza"], cursores[-1], n)
+    st.dataframe(df, hide_index=True, use_container_width=True)
+
+    c1, c2, c3 = st.columns([1, 1, 4])
+    if c1.button("◀ Anterior", disabled=len(cursores) == 1):
+        cursores.pop()
+        st.rerun(scope="fragment")
+    if c2.button("Próxima ▶", disabled=len(df) < n):
+        cursores.append(df["NUMERO_REDS"].iloc[-1])
+        st.rerun(scope="fragment")
+    c3.caption(f"página {len(cursores)}")
+
+# ---------- página ----------
+
+def main():
+    st.set_page_config(page_title="REDS – exploração", layout="wide")
+    st.title("Ocorrências REDS")
+    versao = Observador().atual()
+    f = ler_filtros(facetas(versao))
+    args = (versao, f["ano"], f["municipio"], f["natureza"])
+
+    serie = serie_mensal(*args)
+    k = st.columns(5)
+    for col, (rotulo, campo) in zip(k, [("Ocorrências", "ocorrencias"), ("Prisões", "prisao"),
+                                        ("IMV", "imv"), ("ICVPE", "icvpe"), ("ICVPA", "icvpa")]):
+        col.metric(rotulo, f"{int(serie[campo].sum()):,}".replace(",", "."))
+
+    if len(serie):
+        serie = serie.assign(periodo=pd.to_datetime(
+            serie["ano"].astype("int64").astype(str) + "-" + serie["mes"].astype("int64").astype(str) + "-01"))
+        st.altair_chart(alt.Chart(serie).mark_line(point=True).encode(
+            x=alt.X("periodo:T", title="mês"), y=alt.Y("ocorrencias:Q", title="ocorrências"),
+            tooltip=["periodo:T", "ocorrencias:Q", "prisao:Q"]), use_container_width=True)
+    else:
+        st.info("Sem resumos para esses filtros (rode src/resumos.py se a carga foi feita com --no-rollups).")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.subheader("Naturezas mais frequentes")
+        nat = top_naturezas(versao, f["ano"], f["municipio"])
+        st.altair_chart(alt.Chart(nat).mark_bar().encode(
+            x=alt.X("ocorrencias:Q"), y=alt.Y("natureza:N", sort="-x", title=None)), use_container_width=True)
+    with c2:
+        st.subheader("Bairros")
+        if f["municipio"] is None:
+            st.caption("Escolha um município para ver os bairros.")
+        else:
+            st.dataframe(top_bairros(*args), hide_index=True, use_container_width=True)
+
+    # mapa de calor pelas células pré-agregadas; só consulta quando pedido
+    if st.checkbox("Mostrar mapa"):
+        nivel = st.radio("Célula", sorted(NIVEIS), index=1, horizontal=True,
+                         format_func=lambda n: f"{NIVEIS[n] * 111:g} km")
+        cel = celulas(*args, nivel)
+        if len(cel):
+            cel = cel.astype("float64")
+            st.pydeck_chart(pdk.Deck(
+                initial_view_state=pdk.ViewState(latitude=float(cel["lat"].mean()),
+                                                 longitude=float(cel["lon"].mean()), zoom=9, pitch=40),
+                layers=[pdk.Layer("ColumnLayer", data=cel, get_position=["lon", "lat"],
+                                  get_elevation="ocorrencias", elevation_scale=NIVEIS[nivel] * 2000,
+                                  radius=NIVEIS[nivel] * 111_000 / 2, get_fill_color=[200, 30, 0, 160],
+                                  extruded=True, pickable=True)],
+                tooltip={"text": "{ocorrencias} ocorrências"}))
+        else:
+            st.caption("Nenhuma célula para esses filtros (ocorrências sem coordenadas?).")
+
+    tabela(versao, f)
+
+if __name__ == "__main__":  # streamlit run executa o arquivo como __main__
+    main()
@@ -0,0 +1,52 @@
+# src/busca.py
+# Busca textual nas dimensões: chave normalizada (minúsculas, sem acento, só letras e
+# dígitos) gravada em `chave_busca` pelo loader e índice full-text sobre ela.
+# "AGRESSÃO" e "agressao" viram a mesma chave; o termo digitado passa pela mesma dobra.
+import re
+import unicodedata
+
+import pandas as pd
+
+INDICE = "dimensoes_busca"  # criado por schema_neo4j.ensure_schema (FULLTEXT)
+
+# rótulo (os mesmos do índice) -> propriedade de onde sai a chave
+ORIGEM = {
+    "Bairro": "nome", "Municipio": "nome",
+    "NaturezaPrincipal": "descricao", "NaturezaSecundaria": "descricao",
+    "Causa": "descricao", "Meio": "descricao",
+}
+
+def dobrar(texto):
+    """Um texto -> chave de busca (mesma regra de chave_busca, para o termo digitado)."""
+    s = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", " ", s.lower()).strip()
+
+def chave_busca(s: pd.Series) -> pd.Series:
+    """Versão vetorizada de dobrar() para uma coluna inteira."""
+    out = (s.astype("string").str.normalize("NFKD")
+           .str.encode("ascii", "ignore").str.decode("ascii").astype("string")
+           .str.lower().str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip())
+    return out.replace({"": pd.NA})
+
+def lucene(termo):
+    """Termo digitado -> consulta Lucene: cada palavra como prefixo, todas obrigatórias.
+    Só letras/dígitos sobram da dobra, então não há o que escapar. None se ficar vazio."""
+    palavras = dobrar(termo).split()
+    return " AND ".join(f"{p}*" for p in palavras) or None
+
+# dimensões que casam com $q (Lucene), com o nº de ocorrências de cada uma
+CONSULTA = f"""
+CALL db.index.fulltext.queryNodes('{INDICE}', $q, {{limit: $limite}}) YIELD node AS d, score
+RETURN elementId(d) AS id, labels(d)[0] AS rotulo, coalesce(d.descricao, d.nome) AS texto,
+       d.chave_busca AS chave, score,
+       CASE WHEN d:Municipio THEN COUNT {{ (d)<-[:FICA_EM]-(:Bairro)<-[:OCORRE_EM]-() }}
+            ELSE COUNT {{ (d)<-[]-(:Ocorrencia) }} END AS ocorrencias
+ORDER BY score DESC
+"""
+
+def buscar(tx, termo, limite=20):
+    """Nós de dimensão que casam com o termo, pelo índice full-text, com o nº de ocorrências."""
+    consulta = lucene(termo)
+    if consulta is None:
+        return []
+    return [rec.data() for rec in tx.run(CONSULTA, q=consulta, limite=limite)]
@@ -0,0 +1,85 @@
+# src/cache_dimensoes.py
+# Cache em processo: chave de dimensão -> elementId do nó. Preenchido logo após o
+# upsert das dimensões; as relações Ocorrencia->dimensão passam a ser criadas por ID
+# (NodeByElementIdSeek) em vez de um MATCH por propriedade a cada aresta.
+#
+# elementId só é estável enquanto o nó existir; durante a carga as dimensões não são
+# apagadas, e o MATCH continua exigindo o rótulo, então um ID reaproveitado por outro
+# tipo de nó não casa.
+import os
+import threading
+
+from cachetools import LRUCache
+
+from schema_neo4j import MERGE_KEYS
+
+MAX_POR_ROTULO = int(os.getenv("DIM_CACHE_SIZE", "100000"))  # limite por rótulo (Bairro é o maior)
+
+def _todos(tx, label, keys, limit):
+    cols = ", ".join(f"n.{k}" for k in keys)
+    q = f"MATCH (n:{label}) RETURN [{cols}] AS key, elementId(n) AS id LIMIT $limit"
+    return [(tuple(rec["key"]), rec["id"]) for rec in tx.run(q, limit=limit)]
+
+def _resolver(tx, label, keys, wanted):
+    keymap = ", ".join(f"{k}: key[{i}]" for i, k in enumerate(keys))
+    q = f"""
+    UNWIND $wanted AS key
+    MATCH (n:{label} {{{keymap}}})
+    RETURN key, elementId(n) AS id
+    """
+    return [(tuple(rec["key"]), rec["id"]) for rec in tx.run(q, wanted=[list(k) for k in wanted])]
+
+class CacheDimensoes:
+    """Um LRU por rótulo (limitado a `maxsize` chaves), compartilhado pelos workers."""
+
+    def __init__(self, maxsize=MAX_POR_ROTULO):
+        self.maxsize = maxsize
+        self.caches = {}
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "ausentes": 0}
+
+    def _cache(self, label):
+        if label not in self.caches:
+            self.caches[label] = LRUCache(maxsize=self.maxsize)
+        return self.caches[label]
+
+    def preload(self, session, labels):
+        """Lê elementIds de cada rótulo (até maxsize; o resto entra sob demanda)."""
+        for label in labels:
+            pares = session.execute_read(_todos, label, MERGE_KEYS[label], self.maxsize)
+            with self.lock:
+                c = self._cache(label)
+                for key, eid in pares:
+                    c[key] = eid
+            print(f"[info] cache de IDs: {label} {len(pares)} nós")
+
+    def ids(self, session, label, keys):
+        """{chave: elementId} para as chaves pedidas; as que faltam são resolvidas
+        numa única leitura. Chaves sem nó no banco ficam fora do resultado."""
+        out, missing = {}, []
+        with self.lock:
+            c = self._cache(label)
+            for k in keys:
+                eid = c.get(k)
+                if eid is None:
+                    missing.append(k)
+                else:
+                    out[k] = eid
+            self.stats["hits"] += len(out)
+            self.stats["misses"] += len(missing)
+        if missing:
+            found = dict(session.execute_read(_resolver, label, MERGE_KEYS[label], missing))
+            with self.lock:
+                c = self._cache(label)
+                for k, eid in found.items():
+                    c[k] = eid
+                self.stats["ausentes"] += len(missing) - len(found)
+            out.update(found)
+        return out
+
+    def report(self):
+        s = self.stats
+        total = s["hits"] + s["misses"]
+        taxa = s["hits"] / total if total else 0.0
+        print(f"[info] cache de IDs: {s['hits']} acertos, {s['misses']} faltas "
+              f"({taxa:.1%} acerto), {s['ausentes']} chaves sem nó")
@@ -0,0 +1,80 @@
+# src/carga_incremental.py
+# Carga incremental: impressão digital (hash) por linha guardada em Ocorrencia.fingerprint.
+import pandas as pd
+
+from resumos import descontar
+
+PRUNE_PAGE = 10000  # chaves lidas/apagadas por transação no --prune
+
+def fingerprints(chunk, columns):
+    """Hash do conteúdo de cada linha (só das colunas que o loader usa), vetorizado."""
+    sub = chunk.reindex(columns=columns).astype("string").fillna("")
+    h = pd.util.hash_pandas_object(sub, index=False)
+    return h.map(lambda v: format(v, "016x"))
+
+def _existing(tx, reds):
+    q = """
+    UNWIND $reds AS r
+    MATCH (o:Ocorrencia {NUMERO_REDS: r})
+    RETURN r AS reds, o.fingerprint AS fp
+    """
+    return {rec["reds"]: rec["fp"] for rec in tx.run(q, reds=reds)}
+
+def filter_delta(session, oc_rows, rel_rows):
+    """Mantém só as Ocorrencias novas ou alteradas (e as relações delas).
+
+    Alteradas ganham row["changed"] = True: o writer apaga as relações antigas
+    antes de recriá-las.
+    """
+    existing = session.execute_read(_existing, [r["NUMERO_REDS"] for r in oc_rows])
+    keep = set()
+    out = []
+    for row in oc_rows:
+        reds = row["NUMERO_REDS"]
+        if reds in existing:
+            if existing[reds] == row["fingerprint"]:
+                continue
+            row["changed"] = True
+        keep.add(reds)
+        out.append(row)
+    rels = {}
+    for k, rows in rel_rows.items():
+        rows = [r for r in rows if r["NUMERO_REDS"] in keep]
+        if rows:
+            rels[k] = rows
+    return out, rels
+
+def delete_rels(tx, reds, types):
+    """Remove as relações de saída (dos tipos dados) das Ocorrencias alteradas."""
+    q = """
+    UNWIND $reds AS r
+    MATCH (o:Ocorrencia {NUMERO_REDS: r})-[rel]->()
+    WHERE type(rel) IN $types
+    DELETE rel
+    """
+    return tx.run(q, reds=reds, types=types).consume().counters
+
+def _page(tx, after):
+    q = """
+    MATCH (o:Ocorrencia) WHERE o.NUMERO_REDS > $after
+    RETURN o.NUMERO_REDS AS reds ORDER BY reds LIMIT $n
+    """
+    return [rec["reds"] for rec in tx.run(q, after=after, n=PRUNE_PAGE)]
+
+def _delete(tx, reds):
+    descontar(tx, reds)  # sai dos resumos na mesma transação em que é apagada
+    tx.run("UNWIND $reds AS r MATCH (o:Ocorrencia {NUMERO_REDS: r}) DETACH DELETE o", reds=reds)
+
+def prune(session, source_reds):
+    """Apaga Ocorrencias que não estão mais na planilha. Retorna quantas foram apagadas."""
+    after, removed = "", 0
+    while True:
+        page = session.execute_read(_page, after)
+        if not page:
+            break
+        gone = [r for r in page if r not in source_reds]
+        if gone:
+            session.execute_write(_delete, gone)
+            removed += len(gone)
+        after = page[-1]
+    return removed
@@ -0,0 +1,98 @@
+# src/catalogo_facetas.py
+# Catálogo de facetas (anos, municípios, bairros, naturezas, com nº de ocorrências)
+# gerado ao fim de cada carga e publicado como JSON estático em web/catalogo/:
+#   facetas-<versao>.json  imutável (nginx serve com cache longo)
+#   atual.json             ponteiro para a versão vigente (revalidado a cada abertura)
+# Assim os filtros da página carregam sem nenhuma consulta ao banco.
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from neo4j import GraphDatabase
+
+from schema_neo4j import URI, USER, PASS
+from versao_carga import Observador
+
+PASTA = Path(__file__).resolve().parents[1] / "web" / "catalogo"
+MANTER = 3  # versões antigas mantidas (abas abertas ainda podem pedir a anterior)
+
+# contagens pelo grau dos nós de dimensão (GetDegree: não percorre as ocorrências;
+# só Ocorrencia tem essas relações de saída, por isso o outro lado fica sem rótulo)
+FACETAS = {
+    "anos": """
+        MATCH (t:Tempo)
+        WITH t.ano AS ano, sum(COUNT { (t)<-[:NO_TEMPO]-() }) AS n
+        WHERE ano IS NOT NULL
+        RETURN ano, n ORDER BY ano DESC
+    """,
+    "municipios": """
+        MATCH (m:Municipio)
+        CALL {
+          WITH m
+          MATCH (m)<-[:FICA_EM]-(b:Bairro)
+          RETURN sum(COUNT { (b)<-[:OCORRE_EM]-() }) AS n
+        }
+        RETURN m.cod AS cod, m.nome AS nome, n ORDER BY nome
+    """,
+    "bairros": """
+        MATCH (b:Bairro)
+        RETURN b.municipio_cod AS municipio_cod, b.nome AS nome,
+               COUNT { (b)<-[:OCORRE_EM]-() } AS n
+        ORDER BY municipio_cod, nome
+    """,
+    "naturezas_principais": """
+        MATCH (x:NaturezaPrincipal)
+        RETURN x.codigo AS codigo, x.descricao AS descricao,
+               COUNT { (x)<-[:CLASSIFICADA_COM]-() } AS n
+        ORDER BY descricao
+    """,
+    "naturezas_secundarias": """
+        MATCH (x:NaturezaSecundaria)
+        RETURN x.codigo AS codigo, x.descricao AS descricao,
+               COUNT { (x)<-[:RELACIONA_SE]-() } AS n
+        ORDER BY descricao
+    """,
+}
+
+def _ler(tx, q):
+    return [rec.data() for rec in tx.run(q)]
+
+def _gravar(path: Path, obj):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str), encoding="utf-8")
+    os.replace(tmp, path)
+
+def gerar(driver, versao, pasta=PASTA):
+    """Consulta as facetas, grava facetas-<versao>.json e aponta atual.json para ele."""
+    with driver.session(default_access_mode="READ") as session:
+        cat = {nome: session.execute_read(_ler, q) for nome, q in FACETAS.items()}
+    cat["versao"] = versao
+    cat["gerado_em"] = datetime.now().isoformat(timespec="seconds")
+
+    pasta.mkdir(parents=True, exist_ok=True)
+    arquivo = pasta / f"facetas-{versao}.json"
+    _gravar(arquivo, cat)
+    _gravar(pasta / "atual.json", {"versao": versao, "arquivo": arquivo.name})
+
+    antigos = sorted(pasta.glob("facetas-*.json"), key=lambda p: p.stat().st_mtime)[:-MANTER]
+    for p in antigos:
+        p.unlink()
+    for nome in FACETAS:
+        print(f"[ok] catálogo {nome}: {len(cat[nome])}")
+    return arquivo
+
+def main():
+    ap = argparse.ArgumentParser(description="Regera o catálogo de facetas para a interface web.")
+    ap.add_argument("--out", type=Path, default=PASTA, help=f"pasta de saída (padrão {PASTA})")
+    args = ap.parse_args()
+    versao = Observador().atual() or datetime.now().strftime("%Y%m%d%H%M%S%f")
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        print(f"✔ {gerar(driver, versao, args.out)}")
+    finally:
+        driver.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# src/consultas_painel.py
+# Cypher dos painéis (app_streamlit.py), num módulo sem Streamlit para que o harness de
+# desempenho (bench/perf_consultas.py) meça exatamente o que o app manda ao banco.
+# Séries, rankings e mapa leem os resumos (resumos.py); a tabela lê as Ocorrencias.
+
+# filtros opcionais sobre um resumo `r` ($ano, $municipio = código, $natureza = código)
+RESUMO_WHERE = """
+WHERE ($ano IS NULL OR r.ano = $ano)
+  AND ($municipio IS NULL OR r.municipio_cod = $municipio)
+  AND ($natureza IS NULL OR r.natureza = $natureza)
+"""
+
+SERIE_MENSAL = f"""
+MATCH (r:ResumoMunicipio) {RESUMO_WHERE}
+RETURN r.ano AS ano, r.mes_num AS mes, sum(r.ocorrencias) AS ocorrencias,
+       sum(r.prisao) AS prisao, sum(r.imv) AS imv, sum(r.icvpe) AS icvpe, sum(r.icvpa) AS icvpa
+ORDER BY ano, mes
+"""
+
+TOP_NATUREZAS = f"""
+MATCH (r:ResumoMunicipio) {RESUMO_WHERE}
+WITH r.natureza AS codigo, sum(r.ocorrencias) AS ocorrencias
+ORDER BY ocorrencias DESC LIMIT $n
+OPTIONAL MATCH (x:NaturezaPrincipal {{codigo: codigo}})
+RETURN codigo, coalesce(x.descricao, codigo) AS natureza, ocorrencias
+"""
+
+TOP_BAIRROS = f"""
+MATCH (r:ResumoBairro) {RESUMO_WHERE}
+RETURN r.bairro AS bairro, sum(r.ocorrencias) AS ocorrencias, sum(r.prisao) AS prisao
+ORDER BY ocorrencias DESC LIMIT $n
+"""
+
+CELULAS = f"""
+MATCH (r:ResumoCelula {{nivel: $nivel}}) {RESUMO_WHERE}
+WITH r.celula AS celula, r.centro AS c, sum(r.ocorrencias) AS ocorrencias
+RETURN c.latitude AS lat, c.longitude AS lon, ocorrencias
+ORDER BY ocorrencias DESC LIMIT $limite
+"""
+
+# filtro presente -> predicado sobre `o` (um plano por combinação, valores como parâmetro)
+_EXISTS = {
+    "ano": "EXISTS { (o)-[:NO_TEMPO]->(:Tempo {ano: $ano}) }",
+    "municipio": "EXISTS { (o)-[:OCORRE_EM]->(:Bairro {municipio_cod: $municipio}) }",
+    "natureza": "EXISTS { (o)-[:CLASSIFICADA_COM]->(:NaturezaPrincipal {codigo: $natureza}) }",
+}
+
+def pagina(f):
+    """(texto, parâmetros) da tabela: as próximas $n ocorrências depois de NUMERO_REDS $after.
+    f = {"ano", "municipio", "natureza"} (None = sem filtro).
+    Parte do índice de NUMERO_REDS (seek por faixa, já na ordem: sem Sort) e testa os
+    filtros por ocorrência, parando nas $n primeiras que passam."""
+    params = {k: v for k, v in f.items() if v is not None}
+    where = "\n  AND ".join(["o.NUMERO_REDS > $after", *(_EXISTS[k] for k in _EXISTS if k in params)])
+    q = f"""
+MATCH (o:Ocorrencia) WHERE {where}
+WITH o ORDER BY o.NUMERO_REDS LIMIT $n
+RETURN o.NUMERO_REDS AS NUMERO_REDS, o.data AS data, o.hora AS hora,
+       head([(o)-[:OCORRE_EM]->(b:Bairro) | b.nome]) AS bairro,
+       head([(o)-[:CLASSIFICADA_COM]->(x:NaturezaPrincipal) | x.descricao]) AS natureza,
+       o.prisao AS prisao, o.imv AS imv, o.icvpe AS icvpe, o.icvpa AS icvpa
+"""
+    return q, params
@@ -0,0 +1,122 @@
+# src/diario_carga.py
+# Checkpoint da carga de ocorrencias: diário (JSON lines, fsync por registro) dos
+# intervalos de linhas já gravados, identificado pelo hash do arquivo de origem,
+# e arquivo de quarentena para linhas que o banco (ou o preparo) recusou.
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+PASTA = Path(__file__).resolve().parents[1] / "data" / "checkpoints"
+BLOCO = 1 << 20                                           # leitura do hash em blocos de 1 MiB
+MAX_REJEITOS = int(os.getenv("LOAD_MAX_REJEITOS", "1000"))  # acima disso o erro não é de linha
+
+def hash_arquivo(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(BLOCO), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _agora():
+    return datetime.now().isoformat(timespec="seconds")
+
+def _append(fh, rec):
+    fh.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+    fh.flush()
+    os.fsync(fh.fileno())  # o registro sobrevive a queda do processo/container
+
+class Diario:
+    """Intervalos [ini, fim) de linhas de ocorrencias já gravados no Neo4j.
+
+    Um arquivo por conteúdo de planilha (hash no nome); sem `retomar`, o diário
+    anterior do mesmo arquivo é descartado e a carga começa do zero.
+    """
+
+    def __init__(self, origem, pasta=PASTA, retomar=False):
+        self.hash = hash_arquivo(origem)
+        pasta.mkdir(parents=True, exist_ok=True)
+        self.path = pasta / f"{Path(origem).stem}_{self.hash[:16]}.jsonl"
+        self.lock = threading.Lock()
+        self.feitos = []
+        if retomar and self.path.exists():
+            self.feitos = self._ler()
+        elif self.path.exists():
+            self.path.unlink()
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _ler(self):
+        feitos = []
+        for linha in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                rec = json.loads(linha)
+            except json.JSONDecodeError:
+                continue  # última linha truncada por uma queda no meio da escrita
+            if rec.get("hash") == self.hash:
+                feitos.append((rec["ini"], rec["fim"]))
+        return feitos
+
+    def _intervalos(self):
+        out = []
+        for ini, fim in sorted(self.feitos):
+            if out and ini <= out[-1][1]:
+                out[-1][1] = max(out[-1][1], fim)
+            else:
+                out.append([ini, fim])
+        return out
+
+    def inicio(self):
+        """Primeira linha ainda não gravada (fim do trecho contíguo desde a linha 0)."""
+        with self.lock:
+            iv = self._intervalos()
+        return iv[0][1] if iv and iv[0][0] == 0 else 0
+
+    def feito(self, ini, fim):
+        with self.lock:
+            return any(a <= ini and fim <= b for a, b in self._intervalos())
+
+    def registrar(self, ini, fim, linhas):
+        """Chamado quando todas as partes do lote foram confirmadas (on_done do writer)."""
+        with self.lock:
+            _append(self._fh, {"hash": self.hash, "ini": ini, "fim": fim, "linhas": linhas, "ts": _agora()})
+            self.feitos.append((ini, fim))
+
+    def close(self):
+        self._fh.close()
+
+def rejeitos_path(paths, pasta=PASTA):
+    """Arquivo de quarentena da carga: ao lado do diário (uma planilha) ou um por
+    conjunto de planilhas (hash dos nomes, para o --resume reabrir o mesmo)."""
+    if len(paths) == 1:
+        p = Path(paths[0])
+        return pasta / f"{p.stem}_rejeitados.jsonl"
+    nomes = "\n".join(sorted(Path(p).name for p in paths))
+    return pasta / f"varias_{hashlib.sha256(nomes.encode('utf-8')).hexdigest()[:16]}_rejeitados.jsonl"
+
+class Rejeitos:
+    """Linhas em quarentena (JSON lines), com o erro, a fase e a planilha de origem."""
+
+    def __init__(self, path: Path, retomar=False):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not retomar and self.path.exists():
+            self.path.unlink()
+        self.lock = threading.Lock()
+        self.total = 0
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def add(self, row, erro, fase, linha=None, arquivo=None):
+        with self.lock:
+            self.total += 1
+            if self.total > MAX_REJEITOS:
+                raise RuntimeError(f"mais de {MAX_REJEITOS} linhas rejeitadas; "
+                                   f"o problema não parece ser de linha: {erro}") from erro
+            _append(self._fh, {"ts": _agora(), "fase": fase, "arquivo": arquivo, "linha": linha,
+                               "erro": f"{type(erro).__name__}: {erro}", "row": row})
+
+    def close(self):
+        self._fh.close()
+        if self.total:
+            print(f"[warn] {self.total} linhas rejeitadas em {self.path}")
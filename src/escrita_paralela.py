@@ -0,0 +1,139 @@
+# src/escrita_paralela.py
+# Gravação paralela das Ocorrencias: N threads, cada uma com sua sessão do pool do driver.
+import queue
+import random
+import threading
+import time
+import zlib
+
+from neo4j.exceptions import TransientError
+
+RETRIES = 8         # tentativas extras por transação em deadlock/erro transitório
+BACKOFF = 0.2       # segundos (dobra a cada tentativa, com jitter)
+QUEUE_SIZE = 2      # lotes pendentes por worker (limita memória e dá contrapressão)
+
+def execute_write_retry(session, fn, *args, stats=None, **kwargs):
+    """execute_write com novas tentativas em TransientError (inclui DeadlockDetected).
+
+    O driver já reexecuta transações gerenciadas, mas desiste após
+    max_transaction_retry_time; com vários workers disputando os mesmos Bairro/Tempo
+    isso acontece, então repetimos com backoff exponencial e jitter.
+    """
+    for attempt in range(RETRIES + 1):
+        try:
+            return session.execute_write(fn, *args, **kwargs)
+        except TransientError:
+            if attempt == RETRIES:
+                raise
+            if stats is not None:
+                stats["retries"] += 1
+            time.sleep(BACKOFF * (2 ** attempt) * (0.5 + random.random()))
+
+def partition_of(reds, n):
+    """Partição estável de um NUMERO_REDS (mesma ocorrência -> mesmo worker)."""
+    return zlib.crc32(reds.encode("utf-8")) % n
+
+def split_batch(oc_rows, rel_rows, n):
+    """Divide um lote em n partes por NUMERO_REDS."""
+    parts = [([], {}) for _ in range(n)]
+    for row in oc_rows:
+        parts[partition_of(row["NUMERO_REDS"], n)][0].append(row)
+    for k, rows in rel_rows.items():
+        for row in rows:
+            parts[partition_of(row["NUMERO_REDS"], n)][1].setdefault(k, []).append(row)
+    return parts
+
+class _Worker(threading.Thread):
+    def __init__(self, wid, driver, write_fn, nome="writer"):
+        super().__init__(name=f"{nome}-{wid}", daemon=True)
+        self.wid = wid
+        self.driver = driver
+        self.write_fn = write_fn
+        self.q = queue.Queue(maxsize=QUEUE_SIZE)
+        self.stats = {"rows": 0, "batches": 0, "retries": 0, "busy": 0.0}
+        self.error = None
+
+    def run(self):
+        with self.driver.session() as session:
+            while True:
+                item = self.q.get()
+                if item is None:
+                    break
+                if self.error is not None:
+                    continue  # drena a fila depois de uma falha
+                oc_rows, rel_rows, done = item
+                t0 = time.perf_counter()
+                try:
+                    self.write_fn(session, oc_rows, rel_rows, stats=self.stats)
+                except Exception as e:
+                    self.error = e
+                    continue
+                self.stats["busy"] += time.perf_counter() - t0
+                self.stats["rows"] += len(oc_rows)
+                self.stats["batches"] += 1
+                if done is not None:
+                    try:
+                        done()  # pode enfileirar em outra etapa, que também pode ter falhado
+                    except Exception as e:
+                        self.error = e
+
+class ParallelWriter:
+    """Distribui lotes entre workers; cada NUMERO_REDS vai sempre para o mesmo worker.
+
+    write_fn(session, oc_rows, rel_rows, stats=...) grava uma parte de lote.
+    `nome` identifica a etapa nas threads e no relatório.
+    """
+
+    def __init__(self, driver, workers, write_fn, nome="ocorrencias"):
+        self.nome = nome
+        self.workers = [_Worker(i, driver, write_fn, nome=f"writer-{nome}") for i in range(workers)]
+        for w in self.workers:
+            w.start()
+        self.t0 = time.perf_counter()
+
+    def submit(self, oc_rows, rel_rows, on_done=None):
+        """Enfileira um lote; on_done() é chamado quando todas as partes foram gravadas."""
+        self._raise_if_failed()
+        parts = [(w, oc, rel) for w, (oc, rel)
+                 in zip(self.workers, split_batch(oc_rows, rel_rows, len(self.workers))) if oc]
+        if not parts:
+            if on_done is not None:
+                on_done()
+            return
+        pending = [len(parts)]
+        lock = threading.Lock()
+
+        def part_done():
+            with lock:
+                pending[0] -= 1
+                last = pending[0] == 0
+            if last and on_done is not None:
+                on_done()
+
+        for w, oc, rel in parts:
+            w.q.put((oc, rel, part_done))
+
+    def close(self):
+        for w in self.workers:
+            w.q.put(None)
+        for w in self.workers:
+            w.join()
+        self.report()
+        self._raise_if_failed()
+
+    def _raise_if_failed(self):
+        for w in self.workers:
+            if w.error is not None:
+                raise RuntimeError(f"worker {w.wid} falhou") from w.error
+
+    def report(self):
+        wall = time.perf_counter() - self.t0
+        total = 0
+        for w in self.workers:
+            s = w.stats
+            total += s["rows"]
+            rate = s["rows"] / s["busy"] if s["busy"] else 0.0
+            print(f"[{self.nome} {w.wid}] {s['rows']} linhas em {s['batches']} lotes, "
+                  f"{rate:,.0f} linhas/s, {s['retries']} retries")
+        if wall:
+            print(f"[info] {self.nome}: {total} linhas, {total / wall:,.0f} linhas/s no total")
@@ -0,0 +1,151 @@
+# src/espacial.py
+# Modo espacial: Ocorrencia.local (point WGS-84, com índice POINT) gravado junto com
+# lat/lon, consultas por retângulo e por raio, e grade hierárquica de células para mapas
+# de calor. A célula de cada ocorrência é calculada em NumPy sobre o lote inteiro; as
+# contagens por célula × mês × natureza ficam nos resumos (ResumoCelula, resumos.py).
+import argparse
+
+import numpy as np
+from neo4j import GraphDatabase
+
+from schema_neo4j import URI, USER, PASS, ensure_schema
+
+# nível -> lado da célula em graus (~11 km, ~1,1 km, ~220 m); cada nível divide o anterior
+NIVEIS = {1: 0.1, 2: 0.01, 3: 0.002}
+_BASE = 500_000    # desloca ix/iy para ficarem positivos no identificador
+_MUL = 1_000_000   # identificador = nivel·10¹² + (iy+BASE)·10⁶ + (ix+BASE)
+PAGINA = 5000      # Ocorrencias por transação no --preencher
+
+# depois de `SET n += row` (loader) ou dos SETs do LOAD CSV: o point sai de n.lat/n.lon
+# (mesmo filtro de _validas; coordenada fora da faixa faria point() falhar o lote)
+SET_LOCAL = ("SET n.local = CASE WHEN n.lat IS NULL OR n.lon IS NULL OR abs(n.lat) > 90 OR abs(n.lon) > 180 "
+             "OR (n.lat = 0 AND n.lon = 0) THEN null ELSE point({latitude: n.lat, longitude: n.lon}) END")
+
+def _validas(lat, lon):
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    ok = (np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+          & ~((lat == 0) & (lon == 0)))  # 0,0 é coordenada não preenchida
+    return lat, lon, ok
+
+def celulas(lat, lon):
+    """Coordenadas de um lote -> {nível: array int64 de células} (-1 sem coordenada válida).
+    None/NaN viram NaN no float64, então o lote todo passa de uma vez."""
+    lat, lon, ok = _validas(lat, lon)
+    out = {}
+    for nivel, lado in NIVEIS.items():
+        ix = np.floor(np.where(ok, lon, 0) / lado).astype("int64")
+        iy = np.floor(np.where(ok, lat, 0) / lado).astype("int64")
+        cel = nivel * _MUL * _MUL + (iy + _BASE) * _MUL + (ix + _BASE)
+        out[nivel] = np.where(ok, cel, -1)
+    return out
+
+def centro(celula):
+    """Célula -> (nível, lat, lon) do centro (vetorizado se receber array)."""
+    celula = np.asarray(celula, dtype="int64")
+    nivel = celula // (_MUL * _MUL)
+    resto = celula % (_MUL * _MUL)
+    iy = resto // _MUL - _BASE
+    ix = resto % _MUL - _BASE
+    lado = np.vectorize(NIVEIS.get, otypes=["float64"])(nivel)
+    return nivel, np.round((iy + 0.5) * lado, 6), np.round((ix + 0.5) * lado, 6)
+
+# ---------- consultas (usam o índice POINT de Ocorrencia.local) ----------
+
+_CAMPOS = """o.NUMERO_REDS AS NUMERO_REDS, o.data AS data, o.lat AS lat, o.lon AS lon,
+       head([(o)-[:CLASSIFICADA_COM]->(x:NaturezaPrincipal) | x.descricao]) AS natureza"""
+
+def na_caixa(tx, sul, oeste, norte, leste, limite=1000):
+    """Ocorrências dentro do retângulo (graus)."""
+    q = f"""
+    MATCH (o:Ocorrencia)
+    WHERE point.withinBBox(o.local, point({{latitude: $sul, longitude: $oeste}}),
+                                    point({{latitude: $norte, longitude: $leste}}))
+    RETURN {_CAMPOS}
+    LIMIT $limite
+    """
+    return [rec.data() for rec in tx.run(q, sul=sul, oeste=oeste, norte=norte, leste=leste, limite=limite)]
+
+def no_raio(tx, lat, lon, metros, limite=1000):
+    """Ocorrências a até `metros` do ponto, da mais próxima para a mais distante."""
+    q = f"""
+    WITH point({{latitude: $lat, longitude: $lon}}) AS c
+    MATCH (o:Ocorrencia)
+    WHERE point.distance(o.local, c) <= $metros
+    WITH o, point.distance(o.local, c) AS d
+    ORDER BY d LIMIT $limite
+    RETURN {_CAMPOS}, round(d) AS distancia
+    """
+    return [rec.data() for rec in tx.run(q, lat=lat, lon=lon, metros=metros, limite=limite)]
+
+def hotspots(tx, nivel=2, municipio=None, ano=None, mes=None, natureza=None, limite=500):
+    """Células com mais ocorrências (lidas dos resumos, sem tocar nas coordenadas)."""
+    q = """
+    MATCH (r:ResumoCelula)
+    WHERE r.nivel = $nivel
+      AND ($municipio IS NULL OR r.municipio_cod = $municipio)
+      AND ($ano IS NULL OR r.ano = $ano)
+      AND ($mes IS NULL OR r.mes_num = $mes)
+      AND ($natureza IS NULL OR r.natureza = $natureza)
+    WITH r.celula AS celula, r.centro AS c, sum(r.ocorrencias) AS ocorrencias, sum(r.prisao) AS prisao
+    RETURN celula, c.latitude AS lat, c.longitude AS lon, ocorrencias, prisao
+    ORDER BY ocorrencias DESC LIMIT $limite
+    """
+    return [rec.data() for rec in tx.run(q, nivel=nivel, municipio=municipio, ano=ano, mes=mes,
+                                         natureza=natureza, limite=limite)]
+
+# ---------- preenchimento (grafos carregados antes do modo espacial / neo4j-admin import) ----------
+
+def _pagina(tx, after):
+    q = f"""
+    MATCH (n:Ocorrencia) WHERE n.NUMERO_REDS > $after
+    WITH n ORDER BY n.NUMERO_REDS LIMIT $n
+    {SET_LOCAL}
+    RETURN n.NUMERO_REDS AS reds
+    """
+    return [rec["reds"] for rec in tx.run(q, after=after, n=PAGINA)]
+
+def preencher(driver):
+    """Grava Ocorrencia.local para todas as Ocorrencias, em páginas por NUMERO_REDS."""
+    after, n = "", 0
+    with driver.session() as session:
+        while True:
+            page = session.execute_write(_pagina, after)
+            if not page:
+                break
+            n += len(page)
+            after = page[-1]
+            print(f"[info] local: {n} ocorrências")
+    return n
+
+def main():
+    ap = argparse.ArgumentParser(description="Consultas espaciais e preenchimento de Ocorrencia.local.")
+    ap.add_argument("--preencher", action="store_true", help="grava o point em todas as Ocorrencias")
+    ap.add_argument("--bbox", nargs=4, type=float, metavar=("SUL", "OESTE", "NORTE", "LESTE"))
+    ap.add_argument("--raio", nargs=3, type=float, metavar=("LAT", "LON", "METROS"))
+    ap.add_argument("--hotspots", metavar="MUNICIPIO_COD", help="células mais quentes do município")
+    ap.add_argument("--nivel", type=int, default=2, choices=sorted(NIVEIS))
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        if args.preencher:
+            ensure_schema(driver)
+            print(f"✔ {preencher(driver)} ocorrências com local")
+        with driver.session(default_access_mode="READ") as session:
+            if args.bbox:
+                linhas = session.execute_read(na_caixa, *args.bbox, limite=args.limit)
+            elif args.raio:
+                linhas = session.execute_read(no_raio, *args.raio, limite=args.limit)
+            elif args.hotspots:
+                linhas = session.execute_read(hotspots, args.nivel, args.hotspots, limite=args.limit)
+            else:
+                linhas = []
+        for linha in linhas:
+            print(linha)
+    finally:
+        driver.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# src/export_admin_import.py
+# Gera CSVs para `neo4j-admin database import full` (carga inicial / reconstrução).
+# Mesmos rótulos e relações do load_to_neo4j.py, mas sem passar pelo Bolt.
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from leitura_xlsx import iter_chunks
+from modelo import OC_COLUMNS, OC_REL_SPECS, INTEIROS, REAIS, oc_frames, dim_frames, load_dims
+from schema_neo4j import MERGE_KEYS
+
+OUT = Path(__file__).resolve().parents[1] / "data" / "import"
+CONTAINER_DIR = "/imports/import"  # ../data é montado em /imports no docker-compose
+SEP = "|"                          # separador das chaves compostas nos IDs
+BATCH = 5000                       # linhas de ocorrencias por leitura
+
+def _type(prop) -> str:
+    """Tipo do header pelo modelo (não pelo dtype do primeiro lote, que pode vir todo nulo)."""
+    return "long" if prop in INTEIROS else "double" if prop in REAIS else "string"
+
+def node_id(df: pd.DataFrame, fields) -> pd.Series:
+    """ID do nó no espaço do rótulo: chaves (na ordem de MERGE_KEYS) unidas por SEP."""
+    parts = [df[f].astype("string") for f in fields]
+    out = parts[0]
+    for p in parts[1:]:
+        out = out.str.cat(p, sep=SEP)
+    return out
+
+class Exporter:
+    """Acumula arquivos de nós e relações (header separado dos dados)."""
+
+    def __init__(self, out: Path):
+        self.out = out
+        self.nodes = {}   # rótulo -> arquivo de dados
+        self.rels = {}    # (tipo, A, B) -> arquivo de dados
+        self.counts = {}
+
+    def _append(self, name, header, df):
+        data = self.out / f"{name}.csv"
+        if not data.exists():
+            (self.out / f"{name}_header.csv").write_text(",".join(header) + "\n", encoding="utf-8")
+        df.to_csv(data, mode="a", header=False, index=False)
+        self.counts[name] = self.counts.get(name, 0) + len(df)
+
+    def add_nodes(self, label, df):
+        keys = MERGE_KEYS[label]
+        df = df.drop_duplicates(subset=keys, keep="last")
+        out = pd.concat([node_id(df, keys).rename("id"), df], axis=1)
+        header = [f":ID({label})"] + [f"{c}:{_type(c)}" for c in df.columns]
+        self._append(label, header, out)
+        self.nodes[label] = label
+
+    def add_rels(self, rel, a_label, a_fields, b_label, b_fields, df, props=()):
+        ids = pd.DataFrame({
+            "start": node_id(df, a_fields),
+            "end": node_id(df, b_fields),
+        })
+        for p in props:
+            ids[p] = df[p]
+        ids = ids.drop_duplicates(subset=["start", "end"], keep="last")
+        name = f"{rel}_{a_label}_{b_label}"
+        header = [f":START_ID({a_label})", f":END_ID({b_label})"] + [f"{p}:{_type(p)}" for p in props]
+        self._append(name, header, ids)
+        self.rels[(rel, a_label, b_label)] = name
+
+    def script(self, database="neo4j"):
+        """Comando neo4j-admin com todos os arquivos (caminhos vistos de dentro do container)."""
+        def files(name):
+            return f"{CONTAINER_DIR}/{name}_header.csv,{CONTAINER_DIR}/{name}.csv"
+        args = [f"  --nodes={label}={files(name)}" for label, name in self.nodes.items()]
+        args += [f"  --relationships={rel}={files(name)}" for (rel, _, _), name in self.rels.items()]
+        return (
+            "#!/bin/sh\n"
+            "# gerado por src/export_admin_import.py; rode com o banco PARADO, p.ex.:\n"
+            "#   docker compose stop neo4j\n"
+            "#   docker compose run --rm neo4j sh /imports/import/import.sh\n"
+            f"neo4j-admin database import full {database} --overwrite-destination \\\n"
+            "  --skip-bad-relationships --skip-duplicate-nodes --multiline-fields=true \\\n"
+            + " \\\n".join(args) + "\n"
+        )
+
+def export(path: Path, out: Path):
+    out.mkdir(parents=True, exist_ok=True)
+    for f in out.glob("*.csv"):
+        f.unlink()
+    ex = Exporter(out)
+
+    # dimensões (deduplicadas pela chave de MERGE)
+    dim_nodes, dim_rels = dim_frames(load_dims(path))
+    by_label = {}
+    for _, label, _, df in dim_nodes:
+        by_label.setdefault(label, []).append(df)
+    for label, parts in by_label.items():
+        ex.add_nodes(label, pd.concat(parts, ignore_index=True))
+    for rel, a_label, a_keys, b_label, b_keys, df in dim_rels:
+        ex.add_rels(rel, a_label, [a_keys[k] for k in MERGE_KEYS[a_label]],
+                    b_label, [b_keys[k] for k in MERGE_KEYS[b_label]], df)
+
+    # ocorrências em streaming; NUMERO_REDS repetido entre lotes fica só a 1ª vez
+    seen = set()
+    for chunk in iter_chunks(path, "ocorrencias", OC_COLUMNS, BATCH):
+        oc, rels = oc_frames(chunk)
+        oc = oc[~oc["NUMERO_REDS"].isin(seen)]
+        seen.update(oc["NUMERO_REDS"])
+        ex.add_nodes("Ocorrencia", oc)
+        for (rel, label), df in rels.items():
+            df = df[df["NUMERO_REDS"].isin(oc["NUMERO_REDS"])]
+            _, props = OC_REL_SPECS[(rel, label)]
+            ex.add_rels(rel, "Ocorrencia", ["NUMERO_REDS"], label, MERGE_KEYS[label], df, props)
+        print(f"[info] exportadas {len(seen)} ocorrências")
+
+    (out / "import.sh").write_text(ex.script(), encoding="utf-8")
+    for name, n in sorted(ex.counts.items()):
+        print(f"[ok] {name}: {n} linhas")
+    print("[info] depois do import, rode src/espacial.py --preencher (point) "
+          "e src/resumos.py (resumos/rollups)")
+    print(f"✔ Arquivos em {out} (rode import.sh no container)")
+
+def main():
+    ap = argparse.ArgumentParser(description="Exporta nós/relações em CSV para neo4j-admin import.")
+    ap.add_argument("--xlsx", type=Path, required=True, help="planilha de origem")
+    ap.add_argument("--out", type=Path, default=OUT, help=f"pasta de saída (padrão {OUT})")
+    args = ap.parse_args()
+    if not args.xlsx.exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {args.xlsx}")
+    export(args.xlsx, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# src/exportar.py
+# Exporta um subgrafo filtrado (ano/município/natureza) para exports/ em Parquet, CSV ou
+# GraphML, sem montar o resultado em memória:
+#   - uma partição por mês (nó Tempo); partições rodam em paralelo, cada uma com sua sessão;
+#     ocorrências sem NO_TEMPO (data inválida na planilha) vão para ano=__sem_tempo__;
+#   - o driver busca FETCH registros por vez e cada tabela grava blocos de BLOCO linhas
+#     (um row group no Parquet), então a memória não cresce com o tamanho do export;
+#   - cada partição vira um arquivo próprio (<saida>/<tabela>/ano=A/mes=M/parte.<ext>),
+#     escrito em .tmp e renomeado no fim: rodar de novo refaz só o que for pedido.
+# Tabelas: ocorrencias, uma por relação escolhida (NUMERO_REDS + chave do destino + props)
+# e uma por rótulo de dimensão (sem repetir nós dentro da partição).
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+from neo4j import GraphDatabase
+
+from modelo import OC_PROPS, OC_REL_SPECS, OC_REL_TYPES, INTEIROS, REAIS
+from schema_neo4j import URI, USER, PASS, MERGE_KEYS
+
+EXPORTS = Path(os.getenv("EXPORTS_DIR", Path(__file__).resolve().parents[1] / "exports"))
+FETCH = int(os.getenv("EXPORT_FETCH_SIZE", "2000"))   # registros por ida ao servidor
+BLOCO = int(os.getenv("EXPORT_BLOCO", "50000"))       # linhas por escrita (row group)
+SEP = "|"                                             # chaves compostas no id do GraphML
+SEM_TEMPO = "__sem_tempo__"                           # partição das ocorrências sem NO_TEMPO
+
+# propriedades exportadas de cada dimensão: chave + descritivas (as de modelo.dim_frames)
+DIM_PROPS = {
+    "Municipio": ["cod", "nome"],
+    "Bairro": ["municipio_cod", "nome"],
+    "NaturezaPrincipal": ["codigo", "descricao"],
+    "NaturezaSecundaria": ["codigo", "descricao"],
+    "UnidadeN5": ["nome"],
+    "UnidadeN6": ["codigo", "nome"],
+    "Setor": ["nome"],
+    "SubSetor": ["nome"],
+    "Causa": ["codigo", "descricao"],
+    "Tempo": ["ano", "mes_num", "mes_desc", "dia_semana_num", "dia_semana", "faixa_h1", "faixa_h6"],
+    "Meio": ["descricao"],
+}
+OC_CAMPOS = ["NUMERO_REDS", *OC_PROPS]
+
+def _schema(cols):
+    return pa.schema([(c, pa.int64() if c in INTEIROS else pa.float64() if c in REAIS else pa.string())
+                      for c in cols])
+
+def _specs(rels):
+    """Relações escolhidas -> [(tipo, rótulo, chaves do destino, props da relação)]."""
+    return [(rel, label, keys, props) for (rel, label), (keys, props) in sorted(OC_REL_SPECS.items())
+            if rel in rels]
+
+def _tabelas(specs):
+    """Nome da tabela -> colunas, na ordem em que são gravadas."""
+    out = {"ocorrencias": OC_CAMPOS}
+    for rel, label, keys, props in specs:
+        out[f"{rel}_{label}"] = ["NUMERO_REDS", *keys, *props]
+    for label in dict.fromkeys(label for _, label, _, _ in specs):
+        out[label] = DIM_PROPS[label]
+    return out
+
+def montar_consulta(specs, municipio=None, natureza=None, sem_tempo=False):
+    """Uma linha por Ocorrencia do mês ($ano, $mes) ou, com sem_tempo, das que não têm
+    NO_TEMPO; destinos de cada relação em listas."""
+    if sem_tempo:
+        linhas = ["MATCH (o:Ocorrencia)"]
+        where = ["NOT EXISTS { (o)-[:NO_TEMPO]->(:Tempo) }"]
+    else:
+        linhas = ["MATCH (o:Ocorrencia)-[:NO_TEMPO]->(:Tempo {ano: $ano, mes_num: $mes})"]
+        where = []
+    if municipio:
+        where.append("EXISTS { (o)-[:OCORRE_EM]->(:Bairro)-[:FICA_EM]->(m:Municipio) "
+                     "WHERE m.cod = $municipio OR m.nome = $municipio }")
+    if natureza:
+        where.append("EXISTS { (o)-[:CLASSIFICADA_COM|RELACIONA_SE]->(n) "
+                     "WHERE n.codigo = $natureza OR n.descricao = $natureza }")
+    if where:
+        linhas.append("WHERE " + " AND ".join(where))
+    campos = [f"o {{{', '.join('.' + c for c in OC_CAMPOS)}}} AS o"]
+    for i, (rel, label, keys, props) in enumerate(specs):
+        proj = [*(f".{p}" for p in dict.fromkeys([*keys, *DIM_PROPS[label]])), *(f"{p}: r.{p}" for p in props)]
+        campos.append(f"[(o)-[r:{rel}]->(d:{label}) | d {{{', '.join(proj)}}}] AS r{i}")
+    linhas.append("RETURN " + ",\n       ".join(campos))
+    return "\n".join(linhas)
+
+# ---------- escritores (um arquivo por tabela e partição) ----------
+
+class _Arquivo:
+    """Grava em <destino>.tmp e só troca pelo nome final em fechar()."""
+
+    def __init__(self, destino):
+        self.destino = Path(destino)
+        self.destino.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp = self.destino.with_name(self.destino.name + ".tmp")
+
+    def fechar(self):
+        os.replace(self.tmp, self.destino)
+
+    def abortar(self):
+        self.tmp.unlink(missing_ok=True)
+
+class _Tabular(_Arquivo):
+    def __init__(self, destino, cols, formato):
+        super().__init__(destino)
+        self.schema = _schema(cols)
+        if formato == "parquet":
+            self.w = pq.ParquetWriter(self.tmp, self.schema, compression="zstd")
+        else:
+            self.w = pcsv.CSVWriter(self.tmp, self.schema)
+        self.buf = []
+        self.linhas = 0
+
+    def add(self, row):
+        self.buf.append(row)
+        if len(self.buf) >= BLOCO:
+            self._descarregar()
+
+    def _descarregar(self):
+        if self.buf:
+            self.w.write_table(pa.Table.from_pylist(self.buf, schema=self.schema))
+            self.linhas += len(self.buf)
+            self.buf = []
+
+    def fechar(self):
+        self._descarregar()
+        self.w.close()
+        super().fechar()
+
+    def abortar(self):
+        self.w.close()
+        super().abortar()
+
+class _GraphML(_Arquivo):
+    """GraphML escrito nó a nó: chaves declaradas no cabeçalho, nós e arestas na ordem em que chegam."""
+
+    def __init__(self, destino, specs):
+        super().__init__(destino)
+        self.f = open(self.tmp, "w", encoding="utf-8")
+        nos = {"ocorrencias": OC_CAMPOS, **{label: DIM_PROPS[label] for _, label, _, _ in specs}}
+        props_no = dict.fromkeys(c for cols in nos.values() for c in cols)
+        props_rel = dict.fromkeys(p for _, _, _, props in specs for p in props)
+        self.f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                     '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                     '<key id="labels" for="node" attr.name="labels" attr.type="string"/>\n'
+                     '<key id="label" for="edge" attr.name="label" attr.type="string"/>\n')
+        for c in props_no:
+            self.f.write(f'<key id="n_{c}" for="node" attr.name="{c}" attr.type="{self._tipo(c)}"/>\n')
+        for c in props_rel:
+            self.f.write(f'<key id="e_{c}" for="edge" attr.name="{c}" attr.type="{self._tipo(c)}"/>\n')
+        self.f.write('<graph id="G" edgedefault="directed">\n')
+        self.linhas = 0
+
+    @staticmethod
+    def _tipo(c):
+        return "long" if c in INTEIROS else "double" if c in REAIS else "string"
+
+    @staticmethod
+    def _dados(prefixo, row, cols):
+        return "".join(f'<data key="{prefixo}_{c}">{escape(str(row[c]))}</data>'
+                       for c in cols if row.get(c) is not None)
+
+    def no(self, id_, label, row, cols):
+        self.f.write(f'<node id={quoteattr(id_)}><data key="labels">:{label}</data>'
+                     f'{self._dados("n", row, cols)}</node>\n')
+        self.linhas += 1
+
+    def aresta(self, a, b, tipo, row, props):
+        self.f.write(f'<edge source={quoteattr(a)} target={quoteattr(b)}><data key="label">{tipo}</data>'
+                     f'{self._dados("e", row, props)}</edge>\n')
+
+    def fechar(self):
+        self.f.write("</graph>\n</graphml>\n")
+        self.f.close()
+        super().fechar()
+
+    def abortar(self):
+        self.f.close()
+        super().abortar()
+
+def _id(label, row, keys):
+    return f"{label}:" + SEP.join(str(row[k]) for k in keys)
+
+# ---------- partições ----------
+
+def particoes(driver, anos=None):
+    """(ano, mes) de cada nó Tempo, opcionalmente só dos anos pedidos."""
+    q = """
+    MATCH (t:Tempo) WHERE $anos IS NULL OR t.ano IN $anos
+    RETURN t.ano AS ano, t.mes_num AS mes ORDER BY ano, mes
+    """
+    with driver.session(default_access_mode="READ") as session:
+        return [(rec["ano"], rec["mes"]) for rec in session.run(q, anos=anos or None)]
+
+def contar_sem_tempo(driver):
+    """Ocorrencias sem NO_TEMPO (não caem em nenhuma partição de mês)."""
+    q = "MATCH (o:Ocorrencia) WHERE NOT EXISTS { (o)-[:NO_TEMPO]->(:Tempo) } RETURN count(o) AS n"
+    with driver.session(default_access_mode="READ") as session:
+        return session.run(q).single()["n"]
+
+def _rotulo(ano, mes):
+    return SEM_TEMPO if ano is None else f"{ano}-{mes:02d}"
+
+def exportar_particao(driver, ano, mes, saida, formato, specs, municipio=None, natureza=None):
+    """Exporta um mês (ano None: as ocorrências sem NO_TEMPO); devolve o nº gravado."""
+    q = montar_consulta(specs, municipio, natureza, sem_tempo=ano is None)
+    parte = (f"ano={SEM_TEMPO}" if ano is None else f"ano={ano}/mes={mes:02d}") + f"/parte.{formato}"
+    if formato == "graphml":
+        g = _GraphML(Path(saida) / "grafo" / parte, specs)
+        arquivos = [g]
+    else:
+        ws = {t: _Tabular(Path(saida) / t / parte, cols, formato) for t, cols in _tabelas(specs).items()}
+        arquivos = list(ws.values())
+    vistos = set()  # dimensões já gravadas nesta partição (limitado ao nº de nós de dimensão)
+    n = 0
+    try:
+        with driver.session(default_access_mode="READ", fetch_size=FETCH) as session:
+            for rec in session.run(q, ano=ano, mes=mes, municipio=municipio, natureza=natureza):
+                o = rec["o"]
+                oid = _id("Ocorrencia", o, MERGE_KEYS["Ocorrencia"])
+                if formato == "graphml":
+                    g.no(oid, "Ocorrencia", o, OC_CAMPOS)
+                else:
+                    ws["ocorrencias"].add(o)
+                for i, (rel, label, keys, props) in enumerate(specs):
+                    for d in rec[f"r{i}"]:
+                        did = _id(label, d, keys)
+                        novo = did not in vistos
+                        vistos.add(did)
+                        if formato == "graphml":
+                            if novo:
+                                g.no(did, label, d, DIM_PROPS[label])
+                            g.aresta(oid, did, rel, d, props)
+                        else:
+                            ws[f"{rel}_{label}"].add({"NUMERO_REDS": o["NUMERO_REDS"], **d})
+                            if novo:
+                                ws[label].add(d)
+                n += 1
+    except BaseException:
+        for w in arquivos:
+            w.abortar()
+        raise
+    for w in arquivos:
+        w.fechar()
+    return n
+
+def exportar(driver, saida, formato="parquet", rels=OC_REL_TYPES, anos=None, municipio=None,
+             natureza=None, workers=4):
+    """Exporta todas as partições (meses) em paralelo; devolve {(ano, mes): ocorrências},
+    com (None, None) para as ocorrências sem NO_TEMPO."""
+    specs = _specs(rels)
+    partes = particoes(driver, anos)
+    sem_tempo = contar_sem_tempo(driver)
+    if sem_tempo and anos:
+        print(f"[warn] {sem_tempo} ocorrências sem NO_TEMPO ficam fora do filtro por ano")
+    elif sem_tempo:
+        partes.append((None, None))
+    feitos = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as pool:
+        futs = {pool.submit(exportar_particao, driver, ano, mes, saida, formato, specs,
+                            municipio, natureza): (ano, mes)
+                for ano, mes in partes}
+        for fut in as_completed(futs):
+            ano, mes = futs[fut]
+            feitos[(ano, mes)] = fut.result()
+            print(f"[ok] {_rotulo(ano, mes)}: {feitos[(ano, mes)]} ocorrências")
+    return feitos
+
+def main():
+    ap = argparse.ArgumentParser(description="Exporta um subgrafo filtrado para Parquet, CSV ou GraphML.")
+    ap.add_argument("--formato", choices=["parquet", "csv", "graphml"], default="parquet")
+    ap.add_argument("--saida", type=Path, default=EXPORTS / "reds", help="pasta de destino")
+    ap.add_argument("--ano", type=int, nargs="*", help="um ou mais anos (padrão: todos)")
+    ap.add_argument("--municipio", help="código ou nome do município")
+    ap.add_argument("--natureza", help="código ou descrição da natureza (principal ou secundária)")
+    ap.add_argument("--rels", nargs="*", choices=OC_REL_TYPES, default=OC_REL_TYPES,
+                    help="relações/dimensões incluídas (padrão: todas)")
+    ap.add_argument("--workers", type=int, default=4, help="meses exportados em paralelo")
+    args = ap.parse_args()
+
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        feitos = exportar(driver, args.saida, args.formato, args.rels, args.ano,
+                          args.municipio, args.natureza, args.workers)
+    finally:
+        driver.close()
+    print(f"✔ {sum(feitos.values())} ocorrências em {len(feitos)} partições -> {args.saida}")
+
+if __name__ == "__main__":
+    main()
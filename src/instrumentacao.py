@@ -0,0 +1,173 @@
+# src/instrumentacao.py
+# Métricas da carga: tempo (relógio e CPU) por fase, contadores do servidor
+# (ResultSummary.counters), linhas ignoradas e linhas/s. Saída em JSON lines
+# e, opcionalmente, num textfile do Prometheus (node_exporter textfile collector).
+# O CPU é o da thread que executou a fase (thread_time), então fases rodadas nos
+# workers de escrita não se misturam com a leitura/limpeza da thread principal.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+COUNTERS = [
+    "nodes_created", "nodes_deleted", "relationships_created",
+    "relationships_deleted", "properties_set",
+]
+
+class Metricas:
+    def __init__(self, job, jsonl=None, prom=None):
+        self.job = job
+        self.jsonl = jsonl
+        self.prom = prom
+        self.lock = threading.Lock()
+        self.t0 = time.perf_counter()
+        self.phases = {}    # nome -> {"wall": s, "cpu": s}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.rows = 0
+        self.skipped = {}   # motivo -> linhas
+        self.tx = 0
+        self._fh = None
+        if jsonl:
+            Path(jsonl).parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(jsonl, "a", encoding="utf-8")
+        self.emit("start", pid=os.getpid())
+
+    # ---- coleta ----
+    @contextmanager
+    def phase(self, name):
+        """Acumula relógio e CPU de um bloco; a mesma fase pode repetir (por lote)."""
+        w0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - w0, time.thread_time() - c0
+            with self.lock:
+                p = self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+                p["wall"] += wall
+                p["cpu"] += cpu
+
+    def timed(self, name, it):
+        """Itera `it` contando o tempo de cada next() na fase `name` (p.ex. leitura)."""
+        it = iter(it)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def add_counters(self, *counters):
+        """Soma SummaryCounters (ou None) devolvidos pelas transações."""
+        with self.lock:
+            for c in counters:
+                if c is None:
+                    continue
+                self.tx += 1
+                for k in COUNTERS:
+                    self.counters[k] += getattr(c, k, 0)
+
+    def add_rows(self, n):
+        with self.lock:
+            self.rows += n
+
+    def skip(self, reason, n):
+        if n:
+            with self.lock:
+                self.skipped[reason] = self.skipped.get(reason, 0) + n
+
+    def merge(self, snap):
+        """Soma o snapshot() de outras Metricas (p.ex. de um processo de leitura)."""
+        with self.lock:
+            for name, p in snap["phases"].items():
+                q = self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+                q["wall"] += p["wall"]
+                q["cpu"] += p["cpu"]
+            for k, v in snap["counters"].items():
+                self.counters[k] = self.counters.get(k, 0) + v
+            for reason, n in snap["skipped"].items():
+                self.skipped[reason] = self.skipped.get(reason, 0) + n
+            self.rows += snap["rows"]
+            self.tx += snap["tx"]
+
+    def rate(self):
+        dt = time.perf_counter() - self.t0
+        return self.rows / dt if dt else 0.0
+
+    # ---- saída ----
+    def emit(self, event, **fields):
+        if self._fh is None:
+            return
+        rec = {"ts": datetime.now().isoformat(timespec="milliseconds"), "job": self.job, "event": event, **fields}
+        with self.lock:
+            self._fh.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+            self._fh.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "rows": self.rows,
+                "rows_s": round(self.rate(), 1),
+                "tx": self.tx,
+                "skipped": dict(self.skipped),
+                "counters": dict(self.counters),
+                "phases": {k: {kk: round(vv, 3) for kk, vv in v.items()} for k, v in self.phases.items()},
+            }
+
+    def progress(self, **fields):
+        """Evento de progresso (JSON) + atualização do textfile do Prometheus."""
+        snap = self.snapshot()
+        self.emit("progress", rows=snap["rows"], rows_s=snap["rows_s"], tx=snap["tx"],
+                  skipped=snap["skipped"], counters=snap["counters"], phases=snap["phases"], **fields)
+        self.write_prom(snap)
+
+    def write_prom(self, snap=None):
+        if not self.prom:
+            return
+        snap = snap or self.snapshot()
+        job = self.job
+        lines = [
+            "# TYPE reds_load_rows_total counter",
+            f'reds_load_rows_total{{job="{job}"}} {snap["rows"]}',
+            "# TYPE reds_load_rows_per_second gauge",
+            f'reds_load_rows_per_second{{job="{job}"}} {snap["rows_s"]}',
+            "# TYPE reds_load_transactions_total counter",
+            f'reds_load_transactions_total{{job="{job}"}} {snap["tx"]}',
+            "# TYPE reds_load_skipped_rows_total counter",
+        ]
+        lines += [f'reds_load_skipped_rows_total{{job="{job}",reason="{r}"}} {n}'
+                  for r, n in snap["skipped"].items()]
+        for k, v in snap["counters"].items():
+            lines += [f"# TYPE reds_load_{k}_total counter", f'reds_load_{k}_total{{job="{job}"}} {v}']
+        lines.append("# TYPE reds_load_phase_seconds gauge")
+        for name, p in snap["phases"].items():
+            lines.append(f'reds_load_phase_seconds{{job="{job}",phase="{name}",clock="wall"}} {p["wall"]}')
+            lines.append(f'reds_load_phase_seconds{{job="{job}",phase="{name}",clock="cpu"}} {p["cpu"]}')
+        tmp = f"{self.prom}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prom)  # troca atômica: o coletor nunca lê arquivo pela metade
+
+    def close(self):
+        snap = self.snapshot()
+        self.emit("summary", **snap)
+        self.write_prom(snap)
+        for name, p in snap["phases"].items():
+            print(f"[metrics] {name}: {p['wall']:.2f}s relógio, {p['cpu']:.2f}s CPU")
+        c = snap["counters"]
+        print(f"[metrics] {snap['rows']} linhas, {snap['tx']} tx, nós +{c['nodes_created']}, "
+              f"relações +{c['relationships_created']}, props {c['properties_set']}, "
+              f"ignoradas {snap['skipped']}")
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+def add_metrics_args(ap):
+    """--metrics / --prom nos argparse dos scripts (padrão vem do ambiente)."""
+    ap.add_argument("--metrics", default=os.getenv("LOAD_METRICS_JSONL"),
+                    help="arquivo JSON lines com fases, contadores e progresso")
+    ap.add_argument("--prom", default=os.getenv("LOAD_METRICS_PROM"),
+                    help="textfile do Prometheus atualizado a cada lote")
@@ -0,0 +1,138 @@
+# src/leitura_paralela.py
+# Várias planilhas de uma vez (um .xlsx por mês/unidade): expansão de pasta/glob e
+# leitura em pool de processos — o parsing do openpyxl é CPU puro e, com threads,
+# fica serializado pelo GIL.
+import glob
+import os
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from pathlib import Path
+
+PROCS = int(os.getenv("LOAD_PROCS", "1"))  # processos lendo planilhas
+FILA = 2  # itens prontos por arquivo esperando o consumidor (map_streamed)
+_FIM = "__fim__"
+
+def expand_inputs(spec):
+    """Arquivo, pasta (todos os .xlsx dela) ou glob -> lista ordenada de planilhas.
+
+    Ignora os `~$arquivo.xlsx` que o Excel cria enquanto a planilha está aberta.
+    """
+    p = Path(spec)
+    if p.is_dir():
+        paths = p.glob("*.xlsx")
+    elif glob.has_magic(str(spec)):
+        paths = (Path(x) for x in glob.glob(str(spec), recursive=True))
+    else:
+        if not p.exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {p}")
+        paths = [p]
+    out = sorted(x for x in paths if x.is_file() and not x.name.startswith("~$"))
+    if not out:
+        raise FileNotFoundError(f"Nenhuma planilha em: {spec}")
+    return out
+
+def map_ordered(fn, items, procs=PROCS, window=None):
+    """Gera (item, fn(item)) na ordem de `items`.
+
+    Com procs > 1, fn roda em processos (precisa ser função de módulo, picklable)
+    e no máximo `window` resultados ficam pendentes (padrão procs + 1), o que
+    limita a memória a alguns arquivos lidos por vez.
+    """
+    if procs <= 1:
+        for it in items:
+            yield it, fn(it)
+        return
+    window = window or procs + 1
+    with ProcessPoolExecutor(max_workers=procs) as pool:
+        pending = deque()
+        for it in items:
+            pending.append((it, pool.submit(fn, it)))
+            if len(pending) >= window:
+                first, fut = pending.popleft()
+                yield first, fut.result()
+        while pending:
+            first, fut = pending.popleft()
+            yield first, fut.result()
+
+def _produzir(fn, item, fila, parar):
+    """Roda no processo do pool: põe cada item gerado por fn(item) na fila (espera
+    quando ela está cheia) e devolve o valor de retorno do gerador. Sai sem terminar
+    se o consumidor desistir (`parar`)."""
+    it = fn(item)
+    while True:
+        try:
+            v = next(it)
+        except StopIteration as e:
+            v, ret = _FIM, e.value
+        while not parar.is_set():
+            try:
+                fila.put(v, timeout=1)
+                break
+            except queue.Full:
+                continue
+        else:
+            return None
+        if v is _FIM:
+            return ret
+
+def _consumir(fila, fut):
+    while True:
+        try:
+            v = fila.get(timeout=1)
+        except queue.Empty:
+            if fut.done() and fut.exception() is not None:
+                raise fut.exception()
+            continue
+        if isinstance(v, str) and v == _FIM:
+            return
+        yield v
+
+def map_streamed(fn, items, procs=PROCS, window=None, ao_terminar=None):
+    """Como map_ordered, mas fn(item) é um gerador: gera (item, valor) na ordem de
+    `items` e, dentro de cada item, na ordem em que fn produziu.
+
+    Com procs > 1, cada item roda num processo e manda os valores por uma fila de
+    FILA posições, então o que fica em memória são alguns valores por arquivo, não
+    o arquivo inteiro. ao_terminar(item, retorno) recebe o `return` do gerador
+    (p.ex. as métricas do processo filho) quando o item acaba.
+    """
+    if procs <= 1:
+        for it in items:
+            gen = fn(it)
+            while True:
+                try:
+                    v = next(gen)
+                except StopIteration as e:
+                    ret = e.value
+                    break
+                yield it, v
+            if ao_terminar is not None:
+                ao_terminar(it, ret)
+        return
+    window = window or procs + 1
+    with Manager() as mgr, ProcessPoolExecutor(max_workers=procs) as pool:
+        pending = deque()
+        parar = mgr.Event()  # consumidor parou no meio (erro ou break): filhos saem da espera
+
+        def proximo():
+            it, fila, fut = pending.popleft()
+            for v in _consumir(fila, fut):
+                yield it, v
+            ret = fut.result()
+            if ao_terminar is not None:
+                ao_terminar(it, ret)
+
+        try:
+            for it in items:
+                fila = mgr.Queue(maxsize=FILA)
+                pending.append((it, fila, pool.submit(_produzir, fn, it, fila, parar)))
+                if len(pending) >= window:
+                    yield from proximo()
+            while pending:
+                yield from proximo()
+        finally:
+            parar.set()
+            for _, _, fut in pending:
+                fut.cancel()
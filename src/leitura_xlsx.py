@@ -0,0 +1,60 @@
+# src/leitura_xlsx.py
+# Leitura em streaming das planilhas: memória limitada ao tamanho do lote.
+import pandas as pd
+from openpyxl import load_workbook
+
+def sheet_names(path):
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def count_rows(path, sheet):
+    """Linhas de dados segundo a dimensão gravada na aba (None se o arquivo não informa)."""
+    wb = load_workbook(path, read_only=True)
+    try:
+        n = wb[sheet].max_row
+        return None if n is None else max(n - 1, 0)
+    finally:
+        wb.close()
+
+def iter_chunks(path, sheet, columns, size, start=0):
+    """Gera DataFrames de até `size` linhas com só as `columns` pedidas.
+
+    Usa openpyxl em modo read_only (iter_rows), então nunca há mais que um lote
+    em memória. Colunas ausentes na aba vêm como None; linhas totalmente vazias
+    são descartadas (e não contam para `start`, o nº de linhas a pular sem montar
+    DataFrame — usado para retomar uma carga).
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        pos = {name: i for i, name in enumerate(header) if name is not None}
+        idx = [pos.get(c) for c in columns]
+        buf = []
+        for r in rows:
+            if all(v is None for v in r):
+                continue
+            if start:
+                start -= 1
+                continue
+            buf.append([r[i] if i is not None and i < len(r) else None for i in idx])
+            if len(buf) >= size:
+                yield pd.DataFrame(buf, columns=columns, dtype="object")
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=columns, dtype="object")
+    finally:
+        wb.close()
+
+def read_sheets(path, names):
+    """Lê só as abas pedidas que existirem no arquivo (as dimensões são pequenas)."""
+    available = set(sheet_names(path))
+    present = [n for n in names if n in available]
+    if not present:
+        return {}
+    return pd.read_excel(path, sheet_name=present, dtype="object")
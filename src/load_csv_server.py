@@ -0,0 +1,183 @@
+# src/load_csv_server.py
+# Ingestão do lado do servidor: prepara CSVs em data/staging/ (montado em /imports)
+# e dispara LOAD CSV ... CALL { ... } IN TRANSACTIONS, um passe por rótulo/relação.
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from neo4j import GraphDatabase
+
+from leitura_xlsx import iter_chunks
+from modelo import OC_COLUMNS, OC_REL_SPECS, INTEIROS, REAIS, oc_frames, dim_frames, load_dims
+from schema_neo4j import MERGE_KEYS, ensure_schema
+from migrar_chaves import pendentes
+from versao_carga import publicar
+from catalogo_facetas import gerar as gerar_catalogo
+from resumos import reconstruir as reconstruir_resumos
+from espacial import SET_LOCAL
+from load_to_neo4j import xlsx_path, URI, USER, PASS, BATCH
+
+IMPORT_DIR = Path(__file__).resolve().parents[1] / "data"  # montado em /imports = server.directories.import
+STAGING = IMPORT_DIR / "staging"
+TX_ROWS = 10000                   # linhas por transação dentro do CALL { } IN TRANSACTIONS
+
+class Stager:
+    """Grava frames em CSV com header; guarda as colunas de cada arquivo para o Cypher."""
+
+    def __init__(self, pasta: Path):
+        self.pasta = pasta
+        self.base_url = staging_url(pasta)
+        self.types = {}   # arquivo -> colunas do header
+
+    def append(self, name, df):
+        path = self.pasta / f"{name}.csv"
+        first = name not in self.types
+        if first:
+            self.types[name] = list(df.columns)
+        df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+    def url(self, name):
+        return f"{self.base_url}/{name}.csv"
+
+def staging_url(pasta: Path) -> str:
+    """Pasta local -> URL do LOAD CSV. Só o que está sob data/ (o import do servidor) é visível."""
+    try:
+        rel = Path(pasta).resolve().relative_to(IMPORT_DIR.resolve())
+    except ValueError:
+        rel = None
+    # subpasta própria: os *.csv dela são apagados antes e depois da carga
+    if rel is None or not rel.parts:
+        raise ValueError(f"--staging precisa ser uma subpasta de {IMPORT_DIR} (montado em /imports "
+                         f"no docker-compose); {pasta} o servidor não enxerga")
+    return "file:///" + rel.as_posix()
+
+def _cast(prop, field=None):
+    """row.<field> convertido conforme o tipo declarado da propriedade (modelo.INTEIROS/REAIS)."""
+    v = f"row.{field or prop}"
+    if prop in INTEIROS:
+        return f"toInteger({v})"
+    if prop in REAIS:
+        return f"toFloat({v})"
+    return v
+
+def node_pass(url, label, keys, types, extra=""):
+    """LOAD CSV que faz MERGE dos nós de um rótulo (tipos conforme o modelo).
+    extra: cláusula aplicada depois dos SETs (p.ex. SET_LOCAL)."""
+    keymap = ", ".join(f"{k}: {_cast(k)}" for k in keys)
+    sets = ", ".join(f"n.{c} = {_cast(c)}" for c in types if c not in keys)
+    where = " AND ".join(f"row.{k} IS NOT NULL" for k in keys)
+    return f"""
+    LOAD CSV WITH HEADERS FROM '{url}' AS row
+    WITH row WHERE {where}
+    CALL {{
+      WITH row
+      MERGE (n:{label} {{{keymap}}})
+      {f"SET {sets}" if sets else ""}
+      {extra}
+    }} IN TRANSACTIONS OF {TX_ROWS} ROWS
+    """
+
+def rel_pass(url, rel, a_label, a_keys, b_label, b_keys, types, props=()):
+    """LOAD CSV que liga nós existentes (MATCH pelas chaves) com MERGE da relação."""
+    match_a = ", ".join(f"{k}: {_cast(k, f)}" for k, f in a_keys.items())
+    match_b = ", ".join(f"{k}: {_cast(k, f)}" for k, f in b_keys.items())
+    sets = ", ".join(f"r.{p} = {_cast(p)}" for p in props)
+    return f"""
+    LOAD CSV WITH HEADERS FROM '{url}' AS row
+    CALL {{
+      WITH row
+      MATCH (a:{a_label} {{{match_a}}})
+      MATCH (b:{b_label} {{{match_b}}})
+      MERGE (a)-[r:{rel}]->(b)
+      {f"SET {sets}" if sets else ""}
+    }} IN TRANSACTIONS OF {TX_ROWS} ROWS
+    """
+
+def stage(path: Path, stager: Stager):
+    """Escreve dimensões e ocorrências limpas em CSV; devolve a lista de passes."""
+    passes = []
+    dim_nodes, dim_rels = dim_frames(load_dims(path))
+    for _, label, keys, df in dim_nodes:
+        stager.append(label, df)
+        passes.append((label, node_pass, {"label": label, "keys": keys}))
+    for rel, a_label, a_keys, b_label, b_keys, df in dim_rels:
+        name = f"{rel}_{a_label}_{b_label}"
+        stager.append(name, df)
+        passes.append((name, rel_pass, {"rel": rel, "a_label": a_label, "a_keys": a_keys,
+                                        "b_label": b_label, "b_keys": b_keys}))
+
+    n = 0
+    oc_rels = set()
+    for chunk in iter_chunks(path, "ocorrencias", OC_COLUMNS, BATCH):
+        oc, rels = oc_frames(chunk)
+        stager.append("Ocorrencia", oc)
+        for (rel, label), df in rels.items():
+            stager.append(f"{rel}_{label}", df)
+            oc_rels.add((rel, label))
+        n += len(oc)
+        print(f"[info] staging: {n} ocorrências")
+    if n:
+        passes.append(("Ocorrencia", node_pass, {"label": "Ocorrencia", "keys": MERGE_KEYS["Ocorrencia"],
+                                                      "extra": SET_LOCAL}))
+    for rel, label in sorted(oc_rels):
+        keys, props = OC_REL_SPECS[(rel, label)]
+        passes.append((f"{rel}_{label}", rel_pass, {
+            "rel": rel, "a_label": "Ocorrencia", "a_keys": {"NUMERO_REDS": "NUMERO_REDS"},
+            "b_label": label, "b_keys": {k: k for k in keys}, "props": props,
+        }))
+    return passes
+
+def run_passes(driver, stager: Stager, passes):
+    """Um LOAD CSV por passe (transação implícita, exigida pelo IN TRANSACTIONS)."""
+    with driver.session() as session:
+        for name, build, spec in passes:
+            q = build(stager.url(name), types=stager.types[name], **spec)
+            t0 = time.perf_counter()
+            c = session.run(q).consume().counters
+            dt = time.perf_counter() - t0
+            print(f"[pass] {name}: {dt:.1f}s, nós +{c.nodes_created}, relações +{c.relationships_created}, "
+                  f"props {c.properties_set}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Carga via LOAD CSV no servidor (CALL IN TRANSACTIONS).")
+    ap.add_argument("--xlsx", type=Path, default=xlsx_path, help="planilha de origem")
+    ap.add_argument("--staging", type=Path, default=STAGING,
+                    help=f"pasta dentro de {IMPORT_DIR} (o import do servidor; padrão {STAGING})")
+    ap.add_argument("--keep", action="store_true", help="não apaga os CSVs de staging no fim")
+    args = ap.parse_args()
+    if not args.xlsx.exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {args.xlsx}")
+    try:
+        staging_url(args.staging)
+    except ValueError as e:
+        ap.error(str(e))
+
+    args.staging.mkdir(parents=True, exist_ok=True)
+    for f in args.staging.glob("*.csv"):
+        f.unlink()
+    stager = Stager(args.staging)
+    passes = stage(args.xlsx, stager)
+
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        ensure_schema(driver)
+        antigas = pendentes(driver)
+        if antigas:
+            sys.exit(f"[erro] chaves de código numéricas no grafo ({antigas}); "
+                     "rode antes: python src/migrar_chaves.py")
+        run_passes(driver, stager, passes)
+        # LOAD CSV não passa pelos lotes do loader: resumos refeitos a partir do grafo
+        reconstruir_resumos(driver)
+        versao = publicar(origem=[args.xlsx.name], modo="load_csv")
+        print(f"[info] versão dos dados: {versao}")
+        gerar_catalogo(driver, versao)
+    finally:
+        driver.close()
+    if not args.keep:
+        for f in args.staging.glob("*.csv"):
+            f.unlink()
+    print("✔ Carga (LOAD CSV) concluída.")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,34 @@
 # src/load_to_neo4j.py
-import math
+import argparse
 import os
+import sys
+from collections import namedtuple
+from functools import partial
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from neo4j import GraphDatabase
+from neo4j.exceptions import AuthError, ClientError, Forbidden
 from dotenv import load_dotenv
 
+from schema_neo4j import MERGE_KEYS, ensure_schema, check_schema, report
+from migrar_chaves import pendentes
+from escrita_paralela import ParallelWriter, execute_write_retry
+from leitura_xlsx import iter_chunks, count_rows
+from preparo import records, clean_code
+from modelo import OC_COLUMNS, OC_REL_TYPES, OC_REL_SPECS, oc_frames, dim_frames, load_dims
+from popular_dimensoes_v2 import combinar_dimensoes
+from carga_incremental import filter_delta, delete_rels, prune
+from resumos import RESUMOS, atualizar, congelar, marcar, acertar_pendentes
+from espacial import SET_LOCAL, celulas
+from instrumentacao import Metricas, add_metrics_args
+from diario_carga import Diario, Rejeitos, rejeitos_path
+from versao_carga import publicar
+from catalogo_facetas import gerar as gerar_catalogo
+from cache_dimensoes import CacheDimensoes
+from leitura_paralela import PROCS, expand_inputs, map_ordered, map_streamed
+
 # ====== CONFIG ======
 # use exatamente o caminho que você passou:
 xlsx_path = Path(r"E:\TCC\Interface\Projeto_Grafo_TCC\data\modelo_grafo_REDS_v2_backup_20250924_062234.xlsx")
@@ -18,259 +40,437 @@ URI  = os.getenv("NEO4J_URI",  "bolt://localhost:7687")
 USER = os.getenv("NEO4J_USER", "neo4j")
 PASS = os.getenv("NEO4J_PASS", "senha-forte")
 
-BATCH = 5000  # tamanho do lote de gravação
-
-def is_ok(v):
-    if v is None: return False
-    if isinstance(v, float) and math.isnan(v): return False
-    s = str(v).strip()
-    return s != "" and s.lower() != "nan"
-
-def to_int(v):
-    try:
-        return int(float(v))
-    except:
-        return None
-
-def to_float(v):
-    try:
-        return float(str(v).replace(",", "."))
-    except:
-        return None
-
-def merge_node(tx, label, keydict: dict, props: dict):
-    keys = ", ".join([f"{k}: $key['{k}']" for k in keydict.keys()])
-    q = f"MERGE (n:{label} {{{keys}}}) SET n += $props"
-    tx.run(q, key=keydict, props=props)
+BATCH = 5000  # tamanho do lote de gravação (e de leitura da planilha)
+WORKERS = int(os.getenv("LOAD_WORKERS", "1"))  # threads gravando Ocorrencias
+
+def merge_nodes(tx, label, keys, rows, extra=""):
+    """MERGE em lote: cada item de rows é o mapa de propriedades do nó (inclui as chaves).
+    extra: cláusula Cypher aplicada depois do SET (p.ex. SET_LOCAL)."""
+    keymap = ", ".join(f"{k}: row.{k}" for k in keys)
+    q = f"UNWIND $rows AS row MERGE (n:{label} {{{keymap}}}) SET n += row {extra}"
+    return tx.run(q, rows=rows).consume().counters
+
+def relate_many(tx, a_label, a_keys, b_label, b_keys, rel, rows, props=()):
+    """Relações em lote. a_keys/b_keys: {propriedade do nó: campo da linha};
+    props: campos da linha gravados como propriedades da relação."""
+    match_a = ", ".join(f"{k}: row.{f}" for k, f in a_keys.items())
+    match_b = ", ".join(f"{k}: row.{f}" for k, f in b_keys.items())
+    q = f"""
+    UNWIND $rows AS row
+    MATCH (a:{a_label} {{{match_a}}})
+    MATCH (b:{b_label} {{{match_b}}})
+    MERGE (a)-[r:{rel}]->(b)
+    """
+    if props:
+        q += " SET " + ", ".join(f"r.{p} = row.{p}" for p in props)
+    return tx.run(q, rows=rows).consume().counters
 
-def relate(tx, a_label, a_key, b_label, b_key, rel, rel_props=None):
-    keys_a = " AND ".join([f"a.{k} = $a_key['{k}']" for k in a_key.keys()])
-    keys_b = " AND ".join([f"b.{k} = $b_key['{k}']" for k in b_key.keys()])
+def relate_by_id(tx, a_label, a_keys, b_label, rel, rows, props=()):
+    """Como relate_many, mas o destino vem pelo elementId em row.b_id (cache de dimensões)."""
+    match_a = ", ".join(f"{k}: row.{f}" for k, f in a_keys.items())
     q = f"""
-    MATCH (a:{a_label}), (b:{b_label})
-    WHERE {keys_a} AND {keys_b}
+    UNWIND $rows AS row
+    MATCH (a:{a_label} {{{match_a}}})
+    MATCH (b:{b_label}) WHERE elementId(b) = row.b_id
     MERGE (a)-[r:{rel}]->(b)
     """
-    if rel_props:
-        q += " SET r += $rel_props"
-    tx.run(q, a_key=a_key, b_key=b_key, rel_props=rel_props or {})
+    if props:
+        q += " SET " + ", ".join(f"r.{p} = row.{p}" for p in props)
+    return tx.run(q, rows=rows).consume().counters
+
+def with_ids(session, cache, label, rows):
+    """Linhas da relação com b_id (elementId do destino); sem nó no banco, a linha sai."""
+    keys = MERGE_KEYS[label]
+    ids = cache.ids(session, label, {tuple(r[k] for k in keys) for r in rows})
+    out = []
+    for r in rows:
+        eid = ids.get(tuple(r[k] for k in keys))
+        if eid is not None:
+            out.append({"NUMERO_REDS": r["NUMERO_REDS"], "b_id": eid,
+                        **{k: v for k, v in r.items() if k not in keys and k != "NUMERO_REDS"}})
+    return out
+
+def write_batched(session, fn, rows, *args, **kwargs):
+    """Envia rows em transações de até BATCH itens (uma ida ao servidor por lote).
+    Devolve os contadores de cada transação."""
+    return [session.execute_write(fn, *args, rows=rows[i:i+BATCH], **kwargs)
+            for i in range(0, len(rows), BATCH)]
+
+def build_oc_batch(chunk):
+    """Monta os parâmetros de um lote: linhas de Ocorrencia e linhas por tipo de relação.
+
+    Tudo vetorizado sobre o DataFrame preparado; o único passo por linha é o
+    to_dict final em records().
+    """
+    oc, rels = oc_frames(chunk)
+    oc["celulas"] = celulas_do_lote(oc)
+    return records(oc), {k: records(v) for k, v in rels.items()}
+
+def celulas_do_lote(oc):
+    """Células da grade (uma por nível) de cada Ocorrencia do lote, de uma vez em NumPy;
+    vão para Ocorrencia.celulas e a etapa de resumos as usa sem recalcular.
+    None sem coordenada válida."""
+    if oc.empty or "lat" not in oc or "lon" not in oc:
+        return None
+    grade = celulas(oc["lat"].to_numpy("float64", na_value=np.nan),
+                    oc["lon"].to_numpy("float64", na_value=np.nan))
+    ids = np.column_stack(list(grade.values()))
+    return [row if row[0] >= 0 else None for row in ids.tolist()]
+
+def _gravar_lote(tx, oc_rows, rel_rows, changed, reds, m, resumos):
+    """Corpo da transação de um lote; devolve os contadores de cada comando.
+    Com `resumos`, só a própria Ocorrencia é tocada (retrato e marca de pendente):
+    os nós de resumo ficam para a etapa única de write_resumos."""
+    out = []
+    if resumos:
+        # antes de qualquer escrita: relações e medidas ainda são as que foram somadas
+        with m.phase("resumos:congelar"):
+            out += congelar(tx, reds)
+    if changed:
+        with m.phase("delete_rels"):
+            out.append(delete_rels(tx, changed, OC_REL_TYPES))
+    with m.phase("oc_merge"):
+        out.append(merge_nodes(tx, "Ocorrencia", ["NUMERO_REDS"], oc_rows, extra=SET_LOCAL))
+    for (rel, label), (rows, by_id) in rel_rows.items():
+        keys, props = OC_REL_SPECS[(rel, label)]
+        with m.phase(f"rel:{rel}->{label}"):
+            if by_id:
+                out.append(relate_by_id(tx, "Ocorrencia", {"NUMERO_REDS": "NUMERO_REDS"},
+                                        label, rel, rows, props=props))
+            else:
+                out.append(relate_many(tx, "Ocorrencia", {"NUMERO_REDS": "NUMERO_REDS"},
+                                       label, {k: k for k in keys}, rel, rows, props=props))
+    if resumos:
+        out.append(marcar(tx, reds))
+    return out
+
+def write_oc_batch(session, oc_rows, rel_rows, stats=None, metricas=None, cache=None, resumos=True):
+    """Grava um lote numa única transação: Ocorrencias e relações (com `resumos`, marcadas
+    como pendentes para write_resumos). Com `cache`, o destino de cada relação é casado
+    por elementId (resolvido antes, fora da transação de escrita)."""
+    m = metricas or Metricas("oc_batch")
+    changed = [r["NUMERO_REDS"] for r in oc_rows if r.pop("changed", False)]
+    reds = [r["NUMERO_REDS"] for r in oc_rows]
+    rels = {}
+    for (rel, label), rows in rel_rows.items():
+        if cache is not None:
+            with m.phase(f"ids:{label}"):
+                rows = with_ids(session, cache, label, rows)
+            if not rows:
+                continue
+        rels[(rel, label)] = (rows, cache is not None)
+    m.add_counters(*execute_write_retry(session, _gravar_lote, oc_rows, rels, changed, reds, m, resumos,
+                                        stats=stats))
+    m.add_rows(len(oc_rows))
+
+def write_resumos(session, oc_rows, rel_rows, stats=None, metricas=None):
+    """Etapa de resumos de um lote já gravado (um único worker, depois do commit):
+    os workers das Ocorrencias não serializam nos nós ResumoMunicipio/ResumoBairro."""
+    m = metricas or Metricas("resumos")
+    with m.phase("resumos"):
+        m.add_counters(*execute_write_retry(session, atualizar, [r["NUMERO_REDS"] for r in oc_rows],
+                                            stats=stats))
+
+def estagio_resumos(driver, metricas=None):
+    """ParallelWriter de um worker para write_resumos; recebe os lotes no on_done da escrita."""
+    return ParallelWriter(driver, 1, partial(write_resumos, metricas=metricas), nome="resumos")
+
+def ao_gravar(resumidor, oc_rows, on_done=None):
+    """on_done de um lote na escrita: com `resumidor`, passa o lote (só os NUMERO_REDS)
+    para a etapa de resumos, e on_done só roda depois dela."""
+    if resumidor is None:
+        return on_done
+    reds = [{"NUMERO_REDS": r["NUMERO_REDS"]} for r in oc_rows]
+    return partial(resumidor.submit, reds, {}, on_done=on_done)
+
+def fechar_escritores(escritores, erro=None):
+    """Fecha os escritores na ordem (todos são fechados). A primeira falha sobe, a menos
+    que `erro` (a exceção que já está subindo) exista: aí as falhas só são avisadas."""
+    falha = None
+    for w in escritores:
+        try:
+            w.close()
+        except Exception as e:
+            if erro is None and falha is None:
+                falha = e
+            elif e.__cause__ is not getattr(erro or falha, "__cause__", None):
+                print(f"[warn] escrita também falhou: {e}: {e.__cause__}")
+    if falha is not None:
+        raise falha
+
+def build_oc_batch_safe(chunk, ini):
+    """build_oc_batch; se o lote falhar no preparo, refaz linha a linha.
+    Devolve (oc_rows, rel_rows, ruins) com ruins = [(linha original, erro, nº da linha)]."""
+    try:
+        return (*build_oc_batch(chunk), [])
+    except (ValueError, TypeError) as e:
+        print(f"[warn] lote {ini}: falha no preparo ({e}); separando linhas ruins")
+    ok, ruins = [], []
+    for j in range(len(chunk)):
+        try:
+            build_oc_batch(chunk.iloc[[j]])
+            ok.append(j)
+        except (ValueError, TypeError) as e:
+            ruins.append((chunk.iloc[j].to_dict(), e, ini + j))
+    return (*build_oc_batch(chunk.iloc[ok]), ruins)
+
+def reds_rejeitados(ruins):
+    """NUMERO_REDS legíveis das linhas rejeitadas no preparo (o --prune não as apaga)."""
+    reds = pd.Series([row.get("NUMERO_REDS") for row, _, _ in ruins], dtype=object)
+    return set(clean_code(reds).dropna())
+
+# um lote lido e preparado; oc_rows None = lote já no diário (reds só com --prune)
+Lote = namedtuple("Lote", "ini fim oc_rows rel_rows ruins reds")
+
+def parse_batches(path, start=0, done=(), with_reds=False, metricas=None):
+    """Lê e prepara os lotes de ocorrencias de uma planilha a partir da linha `start`.
+    Lotes cobertos pelos intervalos `done` não são preparados."""
+    m = metricas or Metricas("parse_batches")
+    i = start
+    for chunk in m.timed("read", iter_chunks(path, "ocorrencias", OC_COLUMNS, BATCH, start=start)):
+        ini, fim = i, i + len(chunk)
+        i = fim
+        if any(a <= ini and fim <= b for a, b in done):
+            reds = list(clean_code(chunk["NUMERO_REDS"]).dropna()) if with_reds else []
+            yield Lote(ini, fim, None, None, [], reds)
+            continue
+        with m.phase("build"):
+            oc_rows, rel_rows, ruins = build_oc_batch_safe(chunk, ini)
+        yield Lote(ini, fim, oc_rows, rel_rows, ruins, [])
+
+def parse_file(job):
+    """parse_batches de uma planilha num processo do pool: job = (path, start, done, with_reds).
+    Os lotes saem um a um (map_streamed); o retorno são as métricas de leitura/preparo do filho."""
+    path, start, done, with_reds = job
+    m = Metricas("parse_file")
+    yield from parse_batches(path, start, done, with_reds, metricas=m)
+    return m.snapshot()
+
+def write_oc_batch_safe(session, oc_rows, rel_rows, stats=None, metricas=None, rejeitos=None, cache=None,
+                        resumos=True):
+    """write_oc_batch com quarentena: em erro do cliente (tipo/valor inválido), divide
+    o lote ao meio até isolar as Ocorrencias recusadas e grava o resto.
+    Erros de conexão/autenticação continuam abortando (a carga é retomada com --resume)."""
+    changed = {r["NUMERO_REDS"] for r in oc_rows if r.get("changed")}
+    try:
+        write_oc_batch(session, oc_rows, rel_rows, stats=stats, metricas=metricas, cache=cache,
+                       resumos=resumos)
+        return
+    except ClientError as e:
+        if rejeitos is None or isinstance(e, (AuthError, Forbidden)):
+            raise
+        erro = e
+    for r in oc_rows:  # write_oc_batch consome a marca; a nova tentativa precisa dela
+        if r["NUMERO_REDS"] in changed:
+            r["changed"] = True
+    if len(oc_rows) == 1:
+        rejeitos.add(oc_rows[0], erro, "gravacao")
+        if metricas is not None:
+            metricas.skip("rejeitada", 1)
+        return
+    meio = len(oc_rows) // 2
+    for parte in (oc_rows[:meio], oc_rows[meio:]):
+        reds = {r["NUMERO_REDS"] for r in parte}
+        rels = {k: [r for r in rows if r["NUMERO_REDS"] in reds] for k, rows in rel_rows.items()}
+        write_oc_batch_safe(session, parte, {k: v for k, v in rels.items() if v},
+                            stats=stats, metricas=metricas, rejeitos=rejeitos, cache=cache,
+                            resumos=resumos)
+
+def load_all_dims(paths, procs, metricas=None):
+    """Dimensões de todas as planilhas, unidas e deduplicadas (lidas em paralelo)."""
+    if len(paths) == 1:
+        return load_dims(paths[0], metricas)
+    partes = [dims for _, dims in map_ordered(load_dims, paths, procs)]
+    return combinar_dimensoes(partes, metricas)
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Carrega a planilha REDS no Neo4j.")
+    ap.add_argument("--input", default=str(xlsx_path),
+                    help="planilha, pasta com .xlsx ou glob (p.ex. 'data/2024/*.xlsx')")
+    ap.add_argument("--procs", type=int, default=PROCS,
+                    help=f"processos lendo planilhas em paralelo (padrão {PROCS})")
+    ap.add_argument("--check", action="store_true",
+                    help="só verifica se toda chave de MERGE tem índice e sai")
+    ap.add_argument("--workers", type=int, default=WORKERS,
+                    help=f"threads gravando Ocorrencias em paralelo (padrão {WORKERS})")
+    ap.add_argument("--incremental", action="store_true",
+                    help="grava só ocorrências novas ou alteradas (compara Ocorrencia.fingerprint)")
+    ap.add_argument("--prune", action="store_true",
+                    help="apaga do grafo as ocorrências que não estão mais na planilha")
+    ap.add_argument("--resume", action="store_true",
+                    help="retoma a carga de ocorrencias a partir do diário (pula lotes já gravados)")
+    ap.add_argument("--no-id-cache", action="store_true",
+                    help="relações por MATCH de propriedade (sem o cache de elementId das dimensões)")
+    ap.add_argument("--no-rollups", action="store_true",
+                    help="não atualiza os resumos por lote (carga inicial grande): todos, inclusive "
+                         "ResumoCelula, ficam desatualizados até rodar src/resumos.py")
+    add_metrics_args(ap)
+    return ap.parse_args()
 
 def main():
-    if not xlsx_path.exists():
-        raise FileNotFoundError(f"Arquivo não encontrado: {xlsx_path}")
-
-    print(f"[info] Lendo planilha: {xlsx_path}")
-    sheets = pd.read_excel(xlsx_path, sheet_name=None, dtype="object")
-    df = sheets["ocorrencias"]
-    print(f"[info] ocorrencias: {len(df)} linhas")
+    args = parse_args()
+    if args.check:
+        driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+        try:
+            code = report(check_schema(driver))
+        finally:
+            driver.close()
+        sys.exit(code)
+
+    paths = expand_inputs(args.input)
+    procs = max(1, min(args.procs, len(paths)))
+
+    m = Metricas("load_to_neo4j", jsonl=args.metrics, prom=args.prom)
+    for path in paths:
+        print(f"[info] Lendo planilha: {path}")
+    # só as dimensões vão inteiras para a memória; ocorrencias é lida em streaming
+    with m.phase("load_dims"):
+        sheets = load_all_dims(paths, procs, m)
+    counts = [count_rows(p, "ocorrencias") for p in paths]
+    total = None if None in counts else sum(counts)
+    print(f"[info] ocorrencias: {total if total is not None else '?'} linhas em {len(paths)} planilha(s)")
 
     driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    # constraints/índices antes de qualquer escrita (MERGE sem índice varre o rótulo)
+    with m.phase("schema"):
+        ensure_schema(driver)
+        # grafo do loader antigo (códigos numéricos): carregar por cima duplicaria as dimensões
+        antigas = pendentes(driver)
+    if antigas:
+        driver.close()
+        sys.exit(f"[erro] chaves de código numéricas no grafo ({antigas}); "
+                 "rode antes: python src/migrar_chaves.py")
+    # --- Upsert dimensões (se existirem no arquivo): primeiro os nós, depois as relações ---
+    # rótulos/relações com nós ou arestas novas (projeções do GDS só são refeitas para eles)
+    alterados = set()
+    dim_nodes, dim_rels = dim_frames(sheets)
     with driver.session() as session:
-        # --- Upsert dimensões (se existirem no arquivo) ---
-        def upsert_dim(sheet, fn):
-            if sheet in sheets and len(sheets[sheet]) > 0:
-                fn(sheets[sheet].copy())
-                print(f"[ok] {sheet}: {len(sheets[sheet])} linhas")
-
-        def dim_municipio(tab):
-            for _, r in tab.iterrows():
-                if is_ok(r.get("CODIGO_MUNICIPIO")):
-                    session.execute_write(
-                        merge_node, "Municipio",
-                        {"cod": r["CODIGO_MUNICIPIO"]},
-                        {"cod": r["CODIGO_MUNICIPIO"], "nome": r.get("MUNICIPIO")}
-                    )
-
-        def dim_bairro(tab):
-            for _, r in tab.iterrows():
-                if is_ok(r.get("MUNICIPIO_COD")) and is_ok(r.get("BAIRRO")):
-                    session.execute_write(
-                        merge_node, "Bairro",
-                        {"municipio_cod": r["MUNICIPIO_COD"], "nome": r["BAIRRO"]},
-                        {"municipio_cod": r["MUNICIPIO_COD"], "nome": r["BAIRRO"]}
-                    )
-                    session.execute_write(
-                        relate, "Bairro",
-                        {"municipio_cod": r["MUNICIPIO_COD"], "nome": r["BAIRRO"]},
-                        "Municipio", {"cod": r["MUNICIPIO_COD"]},
-                        "FICA_EM"
-                    )
-
-        def dim_nat_p(tab):
-            for _, r in tab.iterrows():
-                if is_ok(r.get("CODIGO_NATUREZA_PRINCIPAL")):
-                    session.execute_write(
-                        merge_node, "NaturezaPrincipal",
-                        {"codigo": r["CODIGO_NATUREZA_PRINCIPAL"]},
-                        {"codigo": r["CODIGO_NATUREZA_PRINCIPAL"], "descricao": r.get("DESCR_NATUREZA_PRINCIPAL")}
-                    )
-
-        def dim_nat_s(tab):
-            # pode ter colunas com nomes já normalizados
-            col_cod = "CODIGO_NATUREZA_SECUNDARIA" if "CODIGO_NATUREZA_SECUNDARIA" in tab.columns else "codigo"
-            col_desc = "DESCR_NATUREZA_SECUNDARIA" if "DESCR_NATUREZA_SECUNDARIA" in tab.columns else "descricao"
-            for _, r in tab.iterrows():
-                if is_ok(r.get(col_cod)):
-                    session.execute_write(
-                        merge_node, "NaturezaSecundaria",
-                        {"codigo": r[col_cod]},
-                        {"codigo": r[col_cod], "descricao": r.get(col_desc)}
-                    )
-
-        def dim_unidade(tab):
-            for _, r in tab.iterrows():
-                u5 = r.get("UNID_AREA_NIVEL_5")
-                codigo = r.get("CODIGO_UNID_AREA_NIVEL_6") or r.get("codigo")
-                nome = r.get("UNID_AREA_NIVEL_6") or r.get("nome")
-                if is_ok(u5):
-                    session.execute_write(merge_node, "UnidadeN5", {"nome": u5}, {"nome": u5})
-                if is_ok(codigo):
-                    session.execute_write(merge_node, "UnidadeN6", {"codigo": codigo}, {"codigo": codigo, "nome": nome})
-                    if is_ok(u5):
-                        session.execute_write(relate, "UnidadeN6", {"codigo": codigo}, "UnidadeN5", {"nome": u5}, "PERTENCE_A")
-
-        def dim_setor(tab):
-            for _, r in tab.iterrows():
-                if is_ok(r.get("SETOR")):
-                    session.execute_write(merge_node, "Setor", {"nome": r["SETOR"]}, {"nome": r["SETOR"]})
-
-        def dim_subsetor(tab):
-            for _, r in tab.iterrows():
-                sub = r.get("SUB_SETOR")
-                set_ = r.get("SETOR")
-                if is_ok(sub):
-                    session.execute_write(merge_node, "SubSetor", {"nome": sub}, {"nome": sub})
-                    if is_ok(set_):
-                        session.execute_write(relate, "SubSetor", {"nome": sub}, "Setor", {"nome": set_}, "PERTENCE_A")
-
-        def dim_causa(tab):
-            for _, r in tab.iterrows():
-                if is_ok(r.get("CODIGO_CAUSA_PRESUMIDA")):
-                    session.execute_write(
-                        merge_node, "Causa",
-                        {"codigo": r["CODIGO_CAUSA_PRESUMIDA"]},
-                        {"codigo": r["CODIGO_CAUSA_PRESUMIDA"], "descricao": r.get("CAUSA_PRESUMIDA")}
-                    )
-
-        def dim_tempo(tab):
-            # espera colunas: ANO, MES_NUMERICO, MES_DESCRICAO, DIA_DA_SEMANA_NUMERICO, DIA_DA_SEMANA_FATO, FAIXA_HORA_1, FAIXA_HORA_6
-            for _, r in tab.iterrows():
-                ano = to_int(r.get("ANO"))
-                mes = to_int(r.get("MES_NUMERICO"))
-                if ano is None or mes is None:
-                    continue
-                props = {
-                    "ano": ano, "mes_num": mes,
-                    "mes_desc": r.get("MES_DESCRICAO"),
-                    "dia_semana_num": to_int(r.get("DIA_DA_SEMANA_NUMERICO")),
-                    "dia_semana": r.get("DIA_DA_SEMANA_FATO"),
-                    "faixa_h1": r.get("FAIXA_HORA_1"),
-                    "faixa_h6": r.get("FAIXA_HORA_6"),
-                }
-                session.execute_write(merge_node, "Tempo", {"ano": ano, "mes_num": mes}, props)
-
-        def dim_meio(tab):
-            for _, r in tab.iterrows():
-                if is_ok(r.get("DESCRICAO_MEIO_UTILIZADO")):
-                    session.execute_write(
-                        merge_node, "Meio",
-                        {"descricao": r["DESCRICAO_MEIO_UTILIZADO"]},
-                        {"descricao": r["DESCRICAO_MEIO_UTILIZADO"]}
-                    )
-
-        upsert_dim("dim_municipio",          dim_municipio)
-        upsert_dim("dim_bairro",             dim_bairro)
-        upsert_dim("dim_natureza_principal", dim_nat_p)
-        upsert_dim("dim_natureza_secundaria",dim_nat_s)
-        upsert_dim("dim_unidade",            dim_unidade)
-        upsert_dim("dim_setor",              dim_setor)
-        upsert_dim("dim_subsetor",           dim_subsetor)
-        upsert_dim("dim_causa",              dim_causa)
-        upsert_dim("dim_tempo",              dim_tempo)
-        upsert_dim("dim_meio",               dim_meio)
-
-        # --- Ocorrencias + relações ---
-        total = len(df)
-        for i in range(0, total, BATCH):
-            chunk = df.iloc[i:i+BATCH]
-            print(f"[info] carregando ocorrencias {i+1}-{i+len(chunk)} / {total}")
-            for _, r in chunk.iterrows():
-                oc_key = {"NUMERO_REDS": str(r.get("NUMERO_REDS"))}
-                if not is_ok(oc_key["NUMERO_REDS"]):
+        for sheet, label, keys, df in dim_nodes:
+            with m.phase(f"upsert:{sheet}"):
+                cs = write_batched(session, merge_nodes, records(df), label, keys)
+            m.add_counters(*cs)
+            if any(c.nodes_created for c in cs):
+                alterados.add(label)
+            print(f"[ok] {sheet}: {len(df)} {label}")
+        for rel, a_label, a_keys, b_label, b_keys, df in dim_rels:
+            with m.phase(f"rel:{a_label}-{rel}->{b_label}"):
+                cs = write_batched(session, relate_many, records(df), a_label, a_keys, b_label, b_keys, rel)
+            m.add_counters(*cs)
+            if any(c.relationships_created for c in cs):
+                alterados.add(rel)
+            print(f"[ok] {a_label}-[:{rel}]->{b_label}: {len(df)}")
+    m.progress(stage="dimensoes")
+
+    # --- elementId de cada dimensão, uma vez; as relações das ocorrências usam o ID ---
+    cache = None
+    if not args.no_id_cache:
+        cache = CacheDimensoes()
+        with driver.session() as session, m.phase("id_cache"):
+            cache.preload(session, sorted({label for _, label in OC_REL_SPECS}))
+
+    # --- Ocorrencias + relações (UNWIND por lote, particionado por NUMERO_REDS) ---
+    # cada lote confirmado vai para o diário da sua planilha; --resume pula o que já está lá
+    diarios = {p: Diario(p, retomar=args.resume) for p in paths}
+    rejeitos = Rejeitos(rejeitos_path(paths), retomar=args.resume)
+    # com --prune é preciso ver todos os NUMERO_REDS, então relê desde o início
+    jobs = []
+    for p, d in diarios.items():
+        start = d.inicio() if args.resume and not args.prune else 0
+        if args.resume:
+            print(f"[info] resume: {p.name} (diário {d.path.name}), retomando na linha {start + 1}")
+        m.skip("ja_gravadas", start)
+        jobs.append((p, start, list(d.feitos), args.prune))
+    if procs > 1:
+        # o parsing vai para o pool; a gravação continua numa única etapa, na ordem dos arquivos
+        print(f"[info] lendo {len(paths)} planilhas em {procs} processos")
+        lotes = ((job[0], lote) for job, lote in map_streamed(
+            parse_file, jobs, procs, ao_terminar=lambda job, snap: m.merge(snap)))
+    else:
+        lotes = ((job[0], lote) for job in jobs for lote in parse_batches(*job, metricas=m))
+
+    if not args.no_rollups:
+        # lotes de uma carga anterior interrompida entre a escrita e a etapa de resumos
+        with m.phase("resumos"):
+            n = acertar_pendentes(driver)
+        if n:
+            print(f"[info] resumos: {n} ocorrências pendentes acertadas")
+    writer = ParallelWriter(driver, max(1, args.workers),
+                            partial(write_oc_batch_safe, metricas=m, rejeitos=rejeitos, cache=cache,
+                                    resumos=not args.no_rollups))
+    # resumos numa etapa única depois de cada commit (o diário só registra depois dela)
+    resumidor = None if args.no_rollups else estagio_resumos(driver, m)
+    source_reds = set()
+    lidas = 0
+    erro = None
+    try:
+        with driver.session() as session:
+            while True:
+                with m.phase("parse_wait"):
+                    path, lote = next(lotes, (None, None))
+                if lote is None:
+                    break
+                lidas += lote.fim - lote.ini
+                if lote.oc_rows is None:
+                    m.skip("ja_gravadas", lote.fim - lote.ini)
+                    source_reds.update(lote.reds)
                     continue
-
-                oc_props = {
-                    "NUMERO_REDS": oc_key["NUMERO_REDS"],
-                    "data": str(r.get("DATA_FATO")),
-                    "hora": str(r.get("HORARIO_FATO")),
-                    "lat": to_float(r.get("LATITUDE")),
-                    "lon": to_float(r.get("LONGITUDE")),
-                    "prisao": to_int(r.get("QTDE_PRISAO")),
-                    "imv": to_int(r.get("IMV_TOTAL")),
-                    "icvpe": to_int(r.get("ICVPE_TOTAL")),
-                    "icvpa": to_int(r.get("ICVPA_TOTAL")),
-                }
-                session.execute_write(merge_node, "Ocorrencia", oc_key, oc_props)
-
-                # Bairro / Município
-                if is_ok(r.get("BAIRRO")) and is_ok(r.get("CODIGO_MUNICIPIO")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                         "Bairro", {"municipio_cod": r["CODIGO_MUNICIPIO"], "nome": r["BAIRRO"]},
-                                         "OCORRE_EM")
-
-                # Unidades
-                if is_ok(r.get("UNID_AREA_NIVEL_5")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "UnidadeN5", {"nome": r["UNID_AREA_NIVEL_5"]},
-                                          "AREA_N5")
-                if is_ok(r.get("CODIGO_UNID_AREA_NIVEL_6")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "UnidadeN6", {"codigo": r["CODIGO_UNID_AREA_NIVEL_6"]},
-                                          "AREA_N6")
-
-                # Setor / Subsetor
-                if is_ok(r.get("SETOR")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "Setor", {"nome": r["SETOR"]},
-                                          "SETOR")
-                if is_ok(r.get("SUB_SETOR")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "SubSetor", {"nome": r["SUB_SETOR"]},
-                                          "SUBSETOR")
-
-                # Naturezas
-                if is_ok(r.get("CODIGO_NATUREZA_PRINCIPAL")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "NaturezaPrincipal", {"codigo": r["CODIGO_NATUREZA_PRINCIPAL"]},
-                                          "CLASSIFICADA_COM",
-                                          {"tentcons": r.get("TENTADO_CONSUMADO_PRINCIPAL")})
-                if is_ok(r.get("CODIGO_NATUREZA_SECUNDARIA1")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "NaturezaSecundaria", {"codigo": r["CODIGO_NATUREZA_SECUNDARIA1"]},
-                                          "RELACIONA_SE",
-                                          {"tentcons": r.get("TENTADO_CONSUMADO_SECUNDARIA1")})
-                if is_ok(r.get("CODIGO_NATUREZA_SECUNDARIA2")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "NaturezaSecundaria", {"codigo": r["CODIGO_NATUREZA_SECUNDARIA2"]},
-                                          "RELACIONA_SE",
-                                          {"tentcons": r.get("TENTADO_CONSUMADO_SECUNDARIA2")})
-
-                # Tempo
-                if is_ok(r.get("ANO_FATO")) and is_ok(r.get("MES_NUMERICO")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "Tempo", {"ano": to_int(r["ANO_FATO"]), "mes_num": to_int(r["MES_NUMERICO"])},
-                                          "NO_TEMPO")
-
-                # Causa e Meio
-                if is_ok(r.get("CODIGO_CAUSA_PRESUMIDA")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "Causa", {"codigo": r["CODIGO_CAUSA_PRESUMIDA"]},
-                                          "CAUSA")
-                if is_ok(r.get("DESCRICAO_MEIO_UTILIZADO")):
-                    session.execute_write(relate, "Ocorrencia", oc_key,
-                                          "Meio", {"descricao": r["DESCRICAO_MEIO_UTILIZADO"]},
-                                          "MEIO")
+                print(f"[info] carregando ocorrencias {path.name} {lote.ini+1}-{lote.fim} "
+                      f"({lidas} / {total or '?'}, {m.rate():,.0f} linhas/s)")
+                oc_rows, rel_rows = lote.oc_rows, lote.rel_rows
+                for row, falha, linha in lote.ruins:
+                    rejeitos.add(row, falha, "preparo", linha=linha, arquivo=path.name)
+                # linhas sem NUMERO_REDS (ou rejeitadas no preparo) não viram Ocorrencia
+                m.skip("sem_numero_reds", lote.fim - lote.ini - len(oc_rows) - len(lote.ruins))
+                m.skip("rejeitada", len(lote.ruins))
+                if args.prune:
+                    source_reds.update(r["NUMERO_REDS"] for r in oc_rows)
+                    # rejeitada no preparo continua na planilha: a versão gravada antes fica
+                    source_reds.update(reds_rejeitados(lote.ruins))
+                if args.incremental:
+                    n = len(oc_rows)
+                    with m.phase("delta"):
+                        oc_rows, rel_rows = filter_delta(session, oc_rows, rel_rows)
+                    m.skip("sem_alteracao", n - len(oc_rows))
+                # submit bloqueia quando as filas dos workers estão cheias (contrapressão)
+                with m.phase("submit_wait"):
+                    writer.submit(oc_rows, rel_rows, on_done=ao_gravar(resumidor, oc_rows, partial(
+                        diarios[path].registrar, lote.ini, lote.fim, lote.fim - lote.ini)))
+                m.progress(stage="ocorrencias", lidas=lidas, total=total, arquivo=path.name)
+    except BaseException as e:
+        erro = e
+        raise
+    finally:
+        try:
+            # a escrita antes da etapa de resumos (os últimos lotes chegam nela no close);
+            # a falha da leitura/submissão é a que sobe, a de um worker só é avisada
+            fechar_escritores([writer, *filter(None, [resumidor])], erro)
+        finally:
+            # diários e rejeitos são fechados mesmo se o close dos workers falhar
+            for d in diarios.values():
+                d.close()
+            rejeitos.close()
+            if cache is not None:
+                cache.report()
+    if args.incremental:
+        print(f"[info] incremental: {m.skipped.get('sem_alteracao', 0)} ocorrências sem alteração ignoradas")
+    removidas = 0
+    if args.prune:
+        with driver.session() as session, m.phase("prune"):
+            removidas = prune(session, source_reds)
+            print(f"[info] prune: {removidas} ocorrências removidas")
+    if m.rows or removidas:
+        alterados.update(["Ocorrencia", *OC_REL_TYPES])
+        # os resumos mudam junto (o --prune desconta mesmo com --no-rollups)
+        if removidas or not args.no_rollups:
+            alterados.update(RESUMOS)
+    # nova versão dos dados: caches de leitura (servico_consultas) são descartados
+    # e o catálogo de facetas da interface é regerado para ela
+    versao = publicar(origem=[p.name for p in paths], linhas=m.rows, rotulos=sorted(alterados))
+    print(f"[info] versão dos dados: {versao}")
+    with m.phase("catalogo"):
+        gerar_catalogo(driver, versao)
     driver.close()
+    m.close()
     print("✔ Carga concluída.")
 
 if __name__ == "__main__":
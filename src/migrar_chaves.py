@@ -0,0 +1,93 @@
+# src/migrar_chaves.py
+# Migração única das chaves de código para texto.
+# O loader original gravava os códigos como vinham do Excel (3106200 ou 3106200.0); desde a
+# preparação vetorizada (preparo.clean_code) eles são texto ("3106200"). Número e texto são
+# valores distintos para MERGE e para as constraints de unicidade, então recarregar um grafo
+# antigo sem migrar criaria nós de dimensão duplicados.
+# Para cada chave numérica: se já existe o nó com a chave em texto (carga nova por cima da
+# antiga), os dois são fundidos nele (apoc.refactor.mergeNodes, relações preservadas); senão
+# a chave só é convertida. Rodar de novo não muda nada.
+import argparse
+import sys
+
+from neo4j import GraphDatabase
+
+from schema_neo4j import URI, USER, PASS, MERGE_KEYS
+
+# rótulo -> propriedades da chave que saem de colunas de código (clean_code em preparo.py)
+CODIGOS = {
+    "Ocorrencia": ["NUMERO_REDS"],
+    "Municipio": ["cod"],
+    "Bairro": ["municipio_cod"],
+    "NaturezaPrincipal": ["codigo"],
+    "NaturezaSecundaria": ["codigo"],
+    "UnidadeN6": ["codigo"],
+    "Causa": ["codigo"],
+}
+LOTE = 10000  # nós por transação
+
+def _texto(var, p):
+    # 3106200.0 -> "3106200", como clean_code faz com o que vem do Excel
+    return (f"CASE WHEN {var}.{p} = toInteger({var}.{p}) THEN toString(toInteger({var}.{p})) "
+            f"ELSE toString({var}.{p}) END")
+
+def _numerica(label, var="x"):
+    return " OR ".join(f"NOT {var}.{p} IS :: STRING" for p in CODIGOS[label])
+
+def pendentes(driver):
+    """{rótulo: nós com alguma chave de código ainda numérica} (só os que têm algum)."""
+    out = {}
+    with driver.session(default_access_mode="READ") as session:
+        for label in CODIGOS:
+            n = session.run(f"MATCH (x:{label}) WHERE {_numerica(label)} RETURN count(x) AS n").single()["n"]
+            if n:
+                out[label] = n
+    return out
+
+def migrar(driver):
+    """Funde/converte as chaves numéricas; devolve {rótulo: (fundidos, convertidos)}."""
+    out = {}
+    with driver.session() as session:
+        for label, props in CODIGOS.items():
+            chave = ", ".join(f"{k}: {_texto('x', k) if k in props else 'x.' + k}" for k in MERGE_KEYS[label])
+            fundidos = session.run(f"""
+                MATCH (x:{label}) WHERE {_numerica(label)}
+                MATCH (y:{label} {{{chave}}}) WHERE y <> x
+                CALL {{
+                  WITH x, y
+                  CALL apoc.refactor.mergeNodes([y, x], {{properties: 'discard', mergeRels: true}}) YIELD node
+                  RETURN count(node) AS n
+                }} IN TRANSACTIONS OF {LOTE} ROWS
+                RETURN sum(n) AS n
+            """).single()["n"] or 0
+            convertidos = session.run(f"""
+                MATCH (x:{label}) WHERE {_numerica(label)}
+                CALL {{
+                  WITH x
+                  SET {", ".join(f"x.{p} = {_texto('x', p)}" for p in props)}
+                }} IN TRANSACTIONS OF {LOTE} ROWS
+                RETURN count(x) AS n
+            """).single()["n"]
+            out[label] = (fundidos, convertidos)
+            print(f"[ok] {label}: {fundidos} fundidos, {convertidos} convertidos para texto")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Converte chaves de código numéricas (loader antigo) para texto.")
+    ap.add_argument("--check", action="store_true", help="só conta os nós pendentes")
+    args = ap.parse_args()
+
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        if args.check:
+            falta = pendentes(driver)
+            for label, n in falta.items():
+                print(f"[falta] {label}: {n} nós com chave numérica")
+            sys.exit(1 if falta else 0)
+        migrar(driver)
+    finally:
+        driver.close()
+    print("✔ Chaves de código em texto.")
+
+if __name__ == "__main__":
+    main()
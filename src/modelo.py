@@ -0,0 +1,183 @@
+# src/modelo.py
+# Modelo do grafo: rótulos, chaves, relações e como derivá-los das planilhas.
+# Usado pelo loader (Bolt), pelo export para neo4j-admin import e pelo LOAD CSV.
+import pandas as pd
+
+from preparo import INT_COLS, FLOAT_COLS, prepare, select
+from leitura_xlsx import read_sheets
+from popular_dimensoes_v2 import sidecar_dir, ler_sidecar, dimensoes_da_planilha
+from carga_incremental import fingerprints
+from busca import ORIGEM as BUSCA_ORIGEM, chave_busca
+
+DIM_SHEETS = [
+    "dim_municipio", "dim_bairro", "dim_natureza_principal", "dim_natureza_secundaria",
+    "dim_unidade", "dim_setor", "dim_subsetor", "dim_causa", "dim_tempo", "dim_meio",
+]
+
+# Relações Ocorrencia -> dimensão:
+# (tipo, rótulo destino, {chave destino: coluna}, {prop da relação: coluna})
+OC_RELS = [
+    ("OCORRE_EM",        "Bairro",             {"municipio_cod": "CODIGO_MUNICIPIO", "nome": "BAIRRO"}, {}),
+    ("AREA_N5",          "UnidadeN5",          {"nome": "UNID_AREA_NIVEL_5"},                           {}),
+    ("AREA_N6",          "UnidadeN6",          {"codigo": "CODIGO_UNID_AREA_NIVEL_6"},                  {}),
+    ("SETOR",            "Setor",              {"nome": "SETOR"},                                       {}),
+    ("SUBSETOR",         "SubSetor",           {"nome": "SUB_SETOR"},                                   {}),
+    ("CLASSIFICADA_COM", "NaturezaPrincipal",  {"codigo": "CODIGO_NATUREZA_PRINCIPAL"},                 {"tentcons": "TENTADO_CONSUMADO_PRINCIPAL"}),
+    ("RELACIONA_SE",     "NaturezaSecundaria", {"codigo": "CODIGO_NATUREZA_SECUNDARIA1"},               {"tentcons": "TENTADO_CONSUMADO_SECUNDARIA1"}),
+    ("RELACIONA_SE",     "NaturezaSecundaria", {"codigo": "CODIGO_NATUREZA_SECUNDARIA2"},               {"tentcons": "TENTADO_CONSUMADO_SECUNDARIA2"}),
+    ("NO_TEMPO",         "Tempo",              {"ano": "ANO_FATO", "mes_num": "MES_NUMERICO"},          {}),
+    ("CAUSA",            "Causa",              {"codigo": "CODIGO_CAUSA_PRESUMIDA"},                    {}),
+    ("MEIO",             "Meio",               {"descricao": "DESCRICAO_MEIO_UTILIZADO"},               {}),
+]
+OC_REL_TYPES = sorted({rel for rel, *_ in OC_RELS})
+# (tipo, rótulo) -> (chaves do destino, props da relação) já com os nomes usados nas linhas
+OC_REL_SPECS = {(rel, label): (list(keycols), list(propcols)) for rel, label, keycols, propcols in OC_RELS}
+
+# propriedades da Ocorrencia -> coluna de origem
+OC_PROPS = {
+    "data": "DATA_FATO", "hora": "HORARIO_FATO",
+    # também na Ocorrencia (não só via Bairro): sem bairro ela ainda conta no município
+    "municipio_cod": "CODIGO_MUNICIPIO",
+    "lat": "LATITUDE", "lon": "LONGITUDE",
+    "prisao": "QTDE_PRISAO", "imv": "IMV_TOTAL", "icvpe": "ICVPE_TOTAL", "icvpa": "ICVPA_TOTAL",
+}
+# propriedades do Tempo -> coluna da aba dim_tempo
+TEMPO_PROPS = {
+    "ano": "ANO", "mes_num": "MES_NUMERICO",
+    "mes_desc": "MES_DESCRICAO",
+    "dia_semana_num": "DIA_DA_SEMANA_NUMERICO",
+    "dia_semana": "DIA_DA_SEMANA_FATO",
+    "faixa_h1": "FAIXA_HORA_1",
+    "faixa_h6": "FAIXA_HORA_6",
+}
+# propriedades numéricas (o resto é texto), pelo tipo da coluna de origem no preparo:
+# LOAD CSV e os exports tipam por aqui, não pelo dtype do primeiro lote (que pode vir vazio)
+_ORIGEM = {**TEMPO_PROPS, **OC_PROPS,
+           **{p: c for _, _, keycols, propcols in OC_RELS for p, c in {**keycols, **propcols}.items()}}
+INTEIROS = {p for p, c in _ORIGEM.items() if c in INT_COLS}
+REAIS = {p for p, c in _ORIGEM.items() if c in FLOAT_COLS}
+
+# todas as colunas de ocorrencias que o loader lê (entram também na impressão digital)
+OC_COLUMNS = sorted(
+    {"NUMERO_REDS", *OC_PROPS.values()}
+    | {c for _, _, keycols, propcols in OC_RELS for c in [*keycols.values(), *propcols.values()]}
+)
+
+def oc_frames(chunk):
+    """Lote de ocorrencias -> (nós Ocorrencia, {(tipo, rótulo): linhas da relação}).
+
+    As linhas de relação têm NUMERO_REDS + as chaves do destino (+ props),
+    ordenadas pela chave do destino.
+    """
+    df = prepare(chunk)
+    df = df[df["NUMERO_REDS"].notna()]
+    oc = select(df, {"NUMERO_REDS": "NUMERO_REDS", **OC_PROPS}, required=["NUMERO_REDS"])
+    oc["fingerprint"] = fingerprints(df, OC_COLUMNS)
+
+    frames = {}
+    for rel, label, keycols, propcols in OC_RELS:
+        sub = select(df, {"NUMERO_REDS": "NUMERO_REDS", **keycols, **propcols},
+                     required=["NUMERO_REDS", *keycols])
+        if len(sub):
+            frames.setdefault((rel, label), []).append(sub)
+    rels = {}
+    for k, parts in frames.items():
+        keys = OC_REL_SPECS[k][0]
+        rels[k] = pd.concat(parts, ignore_index=True).sort_values(keys)
+    return oc, rels
+
+def load_dims(path, metricas=None):
+    """Dimensões, na ordem de preferência: Parquet (popular_dimensoes_v2),
+    abas dim_* da planilha, ou derivadas na hora de ocorrencias (uma leitura)."""
+    pasta = sidecar_dir(path)
+    if pasta.is_dir():
+        print(f"[info] dimensões de {pasta}")
+        return ler_sidecar(pasta)
+    sheets = read_sheets(path, DIM_SHEETS)
+    if sheets:
+        return sheets
+    print("[info] sem dimensões prontas; derivando de ocorrencias")
+    return dimensoes_da_planilha(path, metricas)
+
+def _first_col(tab, *names):
+    # pode ter colunas com nomes já normalizados
+    return next((n for n in names if n in tab.columns), names[0])
+
+def dim_frames(sheets):
+    """Abas dim_* -> (nós, relações entre dimensões).
+
+    nós: [(aba, rótulo, chaves, DataFrame)]
+    relações: [(tipo, rótulo A, {chave A: campo}, rótulo B, {chave B: campo}, DataFrame)]
+    """
+    nodes, rels = [], []
+
+    def tab(name):
+        if name in sheets and len(sheets[name]) > 0:
+            return prepare(sheets[name])
+        return None
+
+    t = tab("dim_municipio")
+    if t is not None:
+        nodes.append(("dim_municipio", "Municipio", ["cod"],
+                      select(t, {"cod": "CODIGO_MUNICIPIO", "nome": "MUNICIPIO"}, required=["cod"])))
+
+    t = tab("dim_bairro")
+    if t is not None:
+        b = select(t, {"municipio_cod": "MUNICIPIO_COD", "nome": "BAIRRO"})
+        nodes.append(("dim_bairro", "Bairro", ["municipio_cod", "nome"], b))
+        rels.append(("FICA_EM", "Bairro", {"municipio_cod": "municipio_cod", "nome": "nome"},
+                     "Municipio", {"cod": "municipio_cod"}, b))
+
+    t = tab("dim_natureza_principal")
+    if t is not None:
+        nodes.append(("dim_natureza_principal", "NaturezaPrincipal", ["codigo"],
+                      select(t, {"codigo": "CODIGO_NATUREZA_PRINCIPAL",
+                                 "descricao": "DESCR_NATUREZA_PRINCIPAL"}, required=["codigo"])))
+
+    t = tab("dim_natureza_secundaria")
+    if t is not None:
+        col_cod = _first_col(t, "CODIGO_NATUREZA_SECUNDARIA", "codigo")
+        col_desc = _first_col(t, "DESCR_NATUREZA_SECUNDARIA", "descricao")
+        nodes.append(("dim_natureza_secundaria", "NaturezaSecundaria", ["codigo"],
+                      select(t, {"codigo": col_cod, "descricao": col_desc}, required=["codigo"])))
+
+    t = tab("dim_unidade")
+    if t is not None:
+        col_cod = _first_col(t, "CODIGO_UNID_AREA_NIVEL_6", "codigo")
+        col_nome = _first_col(t, "UNID_AREA_NIVEL_6", "nome")
+        nodes.append(("dim_unidade", "UnidadeN5", ["nome"], select(t, {"nome": "UNID_AREA_NIVEL_5"})))
+        nodes.append(("dim_unidade", "UnidadeN6", ["codigo"],
+                      select(t, {"codigo": col_cod, "nome": col_nome}, required=["codigo"])))
+        rels.append(("PERTENCE_A", "UnidadeN6", {"codigo": "codigo"}, "UnidadeN5", {"nome": "n5"},
+                     select(t, {"codigo": col_cod, "n5": "UNID_AREA_NIVEL_5"})))
+
+    t = tab("dim_setor")
+    if t is not None:
+        nodes.append(("dim_setor", "Setor", ["nome"], select(t, {"nome": "SETOR"})))
+
+    t = tab("dim_subsetor")
+    if t is not None:
+        nodes.append(("dim_subsetor", "SubSetor", ["nome"], select(t, {"nome": "SUB_SETOR"})))
+        rels.append(("PERTENCE_A", "SubSetor", {"nome": "sub"}, "Setor", {"nome": "setor"},
+                     select(t, {"sub": "SUB_SETOR", "setor": "SETOR"})))
+
+    t = tab("dim_causa")
+    if t is not None:
+        nodes.append(("dim_causa", "Causa", ["codigo"],
+                      select(t, {"codigo": "CODIGO_CAUSA_PRESUMIDA",
+                                 "descricao": "CAUSA_PRESUMIDA"}, required=["codigo"])))
+
+    t = tab("dim_tempo")
+    if t is not None:
+        nodes.append(("dim_tempo", "Tempo", ["ano", "mes_num"],
+                      select(t, TEMPO_PROPS, required=["ano", "mes_num"])))
+
+    t = tab("dim_meio")
+    if t is not None:
+        nodes.append(("dim_meio", "Meio", ["descricao"], select(t, {"descricao": "DESCRICAO_MEIO_UTILIZADO"})))
+
+    # chave de busca sem acento para o índice full-text (busca.py)
+    nodes = [(sheet, label, keys, df.assign(chave_busca=chave_busca(df[BUSCA_ORIGEM[label]]))
+              if BUSCA_ORIGEM.get(label) in df.columns else df)
+             for sheet, label, keys, df in nodes]
+    return nodes, rels
@@ -1,113 +1,93 @@
+import argparse
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 
+from preparo import clean_df
+from leitura_xlsx import iter_chunks
+from instrumentacao import Metricas, add_metrics_args
+from leitura_paralela import PROCS, expand_inputs, map_ordered
+
 ARQ = Path(r"E:\TCC\Interface\Projeto_Grafo_TCC\data\modelo_grafo_REDS_v2.xlsx")
 
-def clean_series(s: pd.Series) -> pd.Series:
-    s = s.astype("string")  # dtype string (pandas) ajuda nas limpezas
-    # remove NBSP e normaliza espaços
-    s = s.str.replace("\u00A0", " ", regex=False)
-    s = s.str.replace(r"\s+", " ", regex=True).str.strip()
-    # trata vazios comuns
-    return s.replace({"": pd.NA, "nan": pd.NA, "NaN": pd.NA, "None": pd.NA})
-
-def clean_df(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    for c in out.columns:
-        out[c] = clean_series(out[c])
-    return out
+CHUNK = 20000  # linhas de ocorrencias por leitura
+
+# colunas de ocorrencias que alimentam as dimensões
+DIM_COLUMNS = [
+    "CODIGO_MUNICIPIO", "MUNICIPIO", "BAIRRO",
+    "CODIGO_NATUREZA_PRINCIPAL", "DESCR_NATUREZA_PRINCIPAL",
+    "CODIGO_NATUREZA_SECUNDARIA1", "DESCR_NATUREZA_SECUNDARIA1",
+    "CODIGO_NATUREZA_SECUNDARIA2", "DESCR_NATUREZA_SECUNDARIA2",
+    "UNID_AREA_NIVEL_5", "CODIGO_UNID_AREA_NIVEL_6", "UNID_AREA_NIVEL_6",
+    "SETOR", "SUB_SETOR",
+    "CODIGO_CAUSA_PRESUMIDA", "CAUSA_PRESUMIDA",
+    "ANO_FATO", "MES_NUMERICO", "MES_DESCRICAO",
+    "DIA_DA_SEMANA_NUMERICO", "DIA_DA_SEMANA_FATO", "FAIXA_HORA_1", "FAIXA_HORA_6",
+    "DESCRICAO_MEIO_UTILIZADO",
+]
+
+# aba -> colunas de ordenação
+DIM_SORT = {
+    "dim_municipio":           ["MUNICIPIO", "CODIGO_MUNICIPIO"],
+    "dim_bairro":              ["MUNICIPIO_COD", "BAIRRO"],
+    "dim_natureza_principal":  ["DESCR_NATUREZA_PRINCIPAL", "CODIGO_NATUREZA_PRINCIPAL"],
+    "dim_natureza_secundaria": ["DESCR_NATUREZA_SECUNDARIA", "CODIGO_NATUREZA_SECUNDARIA"],
+    "dim_unidade":             ["UNID_AREA_NIVEL_5", "UNID_AREA_NIVEL_6", "CODIGO_UNID_AREA_NIVEL_6"],
+    "dim_setor":               ["SETOR"],
+    "dim_subsetor":            ["SETOR", "SUB_SETOR"],
+    "dim_causa":               ["CAUSA_PRESUMIDA", "CODIGO_CAUSA_PRESUMIDA"],
+    "dim_tempo":               ["ANO", "MES_NUMERICO"],
+    "dim_meio":                ["DESCRICAO_MEIO_UTILIZADO"],
+}
 
 def preview_count(name, df):
     print(f"[preview] {name}: {len(df)} linhas")
 
-def main():
-    if not ARQ.exists():
-        raise FileNotFoundError(f"Arquivo não encontrado: {ARQ}")
-
-    print(f"--> Lendo: {ARQ}")
-    df = pd.read_excel(ARQ, sheet_name="ocorrencias", dtype="object")
-    print(f"[info] ocorrencias lidas: {len(df)}")
-    if len(df) == 0:
-        raise RuntimeError("A aba 'ocorrencias' está vazia (ou não foi lida).")
-
-    df = clean_df(df)
+def sidecar_dir(path: Path) -> Path:
+    """Pasta com as dimensões em Parquet, ao lado da planilha."""
+    return path.with_name(f"{path.stem}_dims")
 
-    # --------- Dimensões ---------
+def construir_dimensoes(df: pd.DataFrame) -> dict:
+    """Deriva as dez dimensões (sem ordenar) de um DataFrame já limpo de ocorrencias."""
+    dims = {}
     # MUNICÍPIO
-    dim_municipio = (
-        df[["CODIGO_MUNICIPIO", "MUNICIPIO"]]
-        .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["MUNICIPIO", "CODIGO_MUNICIPIO"], na_position="last")
-    )
-    preview_count("dim_municipio", dim_municipio)
+    dims["dim_municipio"] = df[["CODIGO_MUNICIPIO", "MUNICIPIO"]].dropna(how="all")
 
     # BAIRRO (chave composta: municipio + bairro)
-    dim_bairro = (
+    dims["dim_bairro"] = (
         df[["CODIGO_MUNICIPIO", "BAIRRO"]]
         .rename(columns={"CODIGO_MUNICIPIO": "MUNICIPIO_COD"})
         .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["MUNICIPIO_COD", "BAIRRO"], na_position="last")
     )
-    preview_count("dim_bairro", dim_bairro)
 
     # NATUREZA PRINCIPAL
-    dim_nat_p = (
-        df[["CODIGO_NATUREZA_PRINCIPAL", "DESCR_NATUREZA_PRINCIPAL"]]
-        .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["DESCR_NATUREZA_PRINCIPAL", "CODIGO_NATUREZA_PRINCIPAL"], na_position="last")
+    dims["dim_natureza_principal"] = (
+        df[["CODIGO_NATUREZA_PRINCIPAL", "DESCR_NATUREZA_PRINCIPAL"]].dropna(how="all")
     )
-    preview_count("dim_natureza_principal", dim_nat_p)
 
     # NATUREZA SECUNDÁRIA (une 1 e 2)
     n1 = df[["CODIGO_NATUREZA_SECUNDARIA1", "DESCR_NATUREZA_SECUNDARIA1"]].dropna(how="all")
     n1.columns = ["CODIGO_NATUREZA_SECUNDARIA", "DESCR_NATUREZA_SECUNDARIA"]
     n2 = df[["CODIGO_NATUREZA_SECUNDARIA2", "DESCR_NATUREZA_SECUNDARIA2"]].dropna(how="all")
     n2.columns = ["CODIGO_NATUREZA_SECUNDARIA", "DESCR_NATUREZA_SECUNDARIA"]
-    dim_nat_s = (
-        pd.concat([n1, n2], ignore_index=True)
-        .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["DESCR_NATUREZA_SECUNDARIA", "CODIGO_NATUREZA_SECUNDARIA"], na_position="last")
-    )
-    preview_count("dim_natureza_secundaria", dim_nat_s)
+    dims["dim_natureza_secundaria"] = pd.concat([_plain(n1), _plain(n2)], ignore_index=True)
 
     # UNIDADE (N5/N6)
-    dim_unidade = (
-        df[["UNID_AREA_NIVEL_5", "CODIGO_UNID_AREA_NIVEL_6", "UNID_AREA_NIVEL_6"]]
-        .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["UNID_AREA_NIVEL_5", "UNID_AREA_NIVEL_6", "CODIGO_UNID_AREA_NIVEL_6"], na_position="last")
+    dims["dim_unidade"] = (
+        df[["UNID_AREA_NIVEL_5", "CODIGO_UNID_AREA_NIVEL_6", "UNID_AREA_NIVEL_6"]].dropna(how="all")
     )
-    preview_count("dim_unidade", dim_unidade)
 
     # SETOR
-    dim_setor = df[["SETOR"]].dropna(how="all").drop_duplicates().sort_values(["SETOR"], na_position="last")
-    preview_count("dim_setor", dim_setor)
+    dims["dim_setor"] = df[["SETOR"]].dropna(how="all")
 
     # SUBSETOR
-    dim_subsetor = (
-        df[["SUB_SETOR", "SETOR"]]
-        .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["SETOR", "SUB_SETOR"], na_position="last")
-    )
-    preview_count("dim_subsetor", dim_subsetor)
+    dims["dim_subsetor"] = df[["SUB_SETOR", "SETOR"]].dropna(how="all")
 
     # CAUSA PRESUMIDA
-    dim_causa = (
-        df[["CODIGO_CAUSA_PRESUMIDA", "CAUSA_PRESUMIDA"]]
-        .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["CAUSA_PRESUMIDA", "CODIGO_CAUSA_PRESUMIDA"], na_position="last")
-    )
-    preview_count("dim_causa", dim_causa)
+    dims["dim_causa"] = df[["CODIGO_CAUSA_PRESUMIDA", "CAUSA_PRESUMIDA"]].dropna(how="all")
 
     # TEMPO
-    dim_tempo = (
+    dims["dim_tempo"] = (
         df[[
             "ANO_FATO","MES_NUMERICO","MES_DESCRICAO",
             "DIA_DA_SEMANA_NUMERICO","DIA_DA_SEMANA_FATO",
@@ -115,49 +95,123 @@ def main():
         ]]
         .rename(columns={"ANO_FATO": "ANO"})
         .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["ANO", "MES_NUMERICO"], na_position="last")
     )
-    preview_count("dim_tempo", dim_tempo)
 
     # MEIO
-    dim_meio = (
-        df[["DESCRICAO_MEIO_UTILIZADO"]]
-        .dropna(how="all")
-        .drop_duplicates()
-        .sort_values(["DESCRICAO_MEIO_UTILIZADO"], na_position="last")
-    )
-    preview_count("dim_meio", dim_meio)
+    dims["dim_meio"] = df[["DESCRICAO_MEIO_UTILIZADO"]].dropna(how="all")
+
+    return {k: _plain(v).drop_duplicates() for k, v in dims.items()}
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    # category -> string, para concatenar lotes com categorias diferentes
+    return df.astype({c: "string" for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+def combinar_dimensoes(partes, metricas=None) -> dict:
+    """Une dimensões de vários lotes (ou arquivos), deduplica e ordena.
+    Com `metricas`, o tempo de cada dimensão entra na fase de mesmo nome."""
+    m = metricas or Metricas("combinar_dimensoes")
+    partes = [p for p in partes if p]
+    out = {}
+    for nome, ordem in DIM_SORT.items():
+        frames = [p[nome] for p in partes if nome in p]
+        with m.phase(nome):
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ordem)
+            out[nome] = df.drop_duplicates().sort_values(ordem, na_position="last", ignore_index=True)
+    return out
 
+def dimensoes_da_planilha(path: Path, metricas=None) -> dict:
+    """Uma única leitura (streaming, só DIM_COLUMNS) de ocorrencias -> dez dimensões."""
+    m = metricas or Metricas("dimensoes_da_planilha")
+    acc, lidas = {}, 0
+    for chunk in m.timed("dim_read", iter_chunks(path, "ocorrencias", DIM_COLUMNS, CHUNK)):
+        lidas += len(chunk)
+        with m.phase("dim_clean"):
+            limpo = clean_df(chunk)
+        with m.phase("dim_build"):
+            novas = construir_dimensoes(limpo)
+        acc = combinar_dimensoes([acc, novas], m)
+        m.progress(stage="dimensoes", lidas=lidas)
+    print(f"[info] ocorrencias lidas: {lidas}")
+    if lidas == 0:
+        raise RuntimeError("A aba 'ocorrencias' está vazia (ou não foi lida).")
+    return acc
+
+def gravar_sidecar(dims: dict, pasta: Path):
+    """Grava cada dimensão como Parquet e confere o nº de linhas pelos metadados."""
+    import pyarrow.parquet as pq
+
+    pasta.mkdir(parents=True, exist_ok=True)
+    for nome, df in dims.items():
+        df.to_parquet(pasta / f"{nome}.parquet", index=False)
+    for nome, df in dims.items():
+        n = pq.read_metadata(pasta / f"{nome}.parquet").num_rows
+        if n != len(df):
+            raise RuntimeError(f"{nome}: {n} linhas gravadas, {len(df)} esperadas")
+        print(f"[check] {nome}: {n} linhas")
+
+def ler_sidecar(pasta: Path) -> dict:
+    """Dimensões em Parquet (as que existirem), no formato das abas dim_*."""
+    return {p.stem: pd.read_parquet(p) for p in sorted(pasta.glob("dim_*.parquet"))}
+
+def gravar_xlsx(dims: dict, arq: Path = ARQ):
     # --------- Backup + Escrita ---------
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup = ARQ.with_name(f"{ARQ.stem}_backup_{ts}{ARQ.suffix}")
-    ARQ.replace(backup)  # move o original para backup
+    backup = arq.with_name(f"{arq.stem}_backup_{ts}{arq.suffix}")
+    arq.replace(backup)  # move o original para backup
     print(f"[info] backup criado: {backup}")
 
     # regrava tudo: ocorrencias (a partir do backup) + dimensões
     base = pd.read_excel(backup, sheet_name=None)  # lê TODAS as abas do backup
-    with pd.ExcelWriter(ARQ, engine="openpyxl", mode="w") as writer:
+    with pd.ExcelWriter(arq, engine="openpyxl", mode="w") as writer:
         # escreve de volta a ocorrencias do backup
         base["ocorrencias"].to_excel(writer, index=False, sheet_name="ocorrencias")
         # escreve as dimensões
-        dim_municipio.to_excel(writer, index=False, sheet_name="dim_municipio")
-        dim_bairro.to_excel(writer, index=False, sheet_name="dim_bairro")
-        dim_nat_p.to_excel(writer, index=False, sheet_name="dim_natureza_principal")
-        dim_nat_s.to_excel(writer, index=False, sheet_name="dim_natureza_secundaria")
-        dim_unidade.to_excel(writer, index=False, sheet_name="dim_unidade")
-        dim_setor.to_excel(writer, index=False, sheet_name="dim_setor")
-        dim_subsetor.to_excel(writer, index=False, sheet_name="dim_subsetor")
-        dim_causa.to_excel(writer, index=False, sheet_name="dim_causa")
-        dim_tempo.to_excel(writer, index=False, sheet_name="dim_tempo")
-        dim_meio.to_excel(writer, index=False, sheet_name="dim_meio")
+        for nome, df in dims.items():
+            df.to_excel(writer, index=False, sheet_name=nome)
 
     # --------- Validação pós-escrita ---------
-    check = pd.read_excel(ARQ, sheet_name=None)
-    for k in ["dim_municipio","dim_bairro","dim_natureza_principal","dim_natureza_secundaria",
-              "dim_unidade","dim_setor","dim_subsetor","dim_causa","dim_tempo","dim_meio"]:
+    check = pd.read_excel(arq, sheet_name=None)
+    for k in DIM_SORT:
         print(f"[check] {k}: {len(check[k])} linhas")
 
+def main():
+    ap = argparse.ArgumentParser(description="Gera as tabelas de dimensão a partir de ocorrencias.")
+    ap.add_argument("--xlsx", action="store_true",
+                    help="modo antigo: regrava a planilha inteira com as abas dim_* "
+                         "(padrão: Parquet em <planilha>_dims/, sem tocar na planilha)")
+    ap.add_argument("--input", default=str(ARQ),
+                    help="planilha, pasta com .xlsx ou glob (uma pasta _dims/ por planilha)")
+    ap.add_argument("--procs", type=int, default=PROCS,
+                    help=f"processos lendo planilhas em paralelo (padrão {PROCS})")
+    add_metrics_args(ap)
+    args = ap.parse_args()
+
+    paths = expand_inputs(args.input)
+    procs = max(1, min(args.procs, len(paths)))
+    m = Metricas("popular_dimensoes_v2", jsonl=args.metrics, prom=args.prom)
+    for path in paths:
+        print(f"--> Lendo: {path}")
+    if len(paths) == 1:
+        resultados = [(paths[0], dimensoes_da_planilha(paths[0], m))]
+    else:
+        # cada processo lê uma planilha inteira; a gravação fica aqui, na ordem dos arquivos
+        resultados = map_ordered(dimensoes_da_planilha, paths, procs)
+
+    partes = []
+    for path, dims in resultados:
+        with m.phase("write"):
+            if args.xlsx:
+                gravar_xlsx(dims, path)
+            else:
+                gravar_sidecar(dims, sidecar_dir(path))
+                print(f"[info] dimensões em: {sidecar_dir(path)}")
+        partes.append(dims)
+
+    # visão unida (deduplicada entre planilhas), como o loader vai gravar
+    for nome, df in combinar_dimensoes(partes, m).items():
+        preview_count(nome, df)
+    m.close()
+
     print("✔ Dimensões atualizadas (e verificadas) com sucesso.")
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+# src/preparo.py
+# Preparação vetorizada compartilhada (loader e popular_dimensoes_v2):
+# limpeza de texto, coerção de tipos e montagem dos parâmetros enviados ao Neo4j.
+import numpy as np
+import pandas as pd
+
+NA_TOKENS = {"": pd.NA, "nan": pd.NA, "NaN": pd.NA, "None": pd.NA, "NaT": pd.NA}
+
+# colunas com poucos valores distintos e muita repetição -> category
+CATEGORY_COLS = {
+    "MUNICIPIO", "BAIRRO", "CODIGO_MUNICIPIO", "MUNICIPIO_COD",
+    "CODIGO_NATUREZA_PRINCIPAL", "DESCR_NATUREZA_PRINCIPAL", "TENTADO_CONSUMADO_PRINCIPAL",
+    "CODIGO_NATUREZA_SECUNDARIA1", "DESCR_NATUREZA_SECUNDARIA1", "TENTADO_CONSUMADO_SECUNDARIA1",
+    "CODIGO_NATUREZA_SECUNDARIA2", "DESCR_NATUREZA_SECUNDARIA2", "TENTADO_CONSUMADO_SECUNDARIA2",
+    "UNID_AREA_NIVEL_5", "CODIGO_UNID_AREA_NIVEL_6", "UNID_AREA_NIVEL_6",
+    "SETOR", "SUB_SETOR", "CODIGO_CAUSA_PRESUMIDA", "CAUSA_PRESUMIDA",
+    "DESCRICAO_MEIO_UTILIZADO", "MES_DESCRICAO", "DIA_DA_SEMANA_FATO",
+    "FAIXA_HORA_1", "FAIXA_HORA_6",
+}
+INT_COLS = {
+    "QTDE_PRISAO", "IMV_TOTAL", "ICVPE_TOTAL", "ICVPA_TOTAL",
+    "ANO", "ANO_FATO", "MES_NUMERICO", "DIA_DA_SEMANA_NUMERICO",
+}
+FLOAT_COLS = {"LATITUDE", "LONGITUDE"}
+
+def clean_series(s: pd.Series) -> pd.Series:
+    s = s.astype("string")  # dtype string (pandas) ajuda nas limpezas
+    # remove NBSP e normaliza espaços
+    s = s.str.replace("\u00A0", " ", regex=False)
+    s = s.str.replace(r"\s+", " ", regex=True).str.strip()
+    # trata vazios comuns
+    return s.replace(NA_TOKENS)
+
+def clean_code(s: pd.Series) -> pd.Series:
+    """Códigos lidos como número no Excel (3106200.0) viram o mesmo texto que '3106200'."""
+    return clean_series(s).str.replace(r"^(-?\d+)\.0+$", r"\1", regex=True)
+
+def to_int_series(s: pd.Series) -> pd.Series:
+    # trunca como o loader original (int(float(v))): 2,7 -> 2, -2,7 -> -2
+    return np.trunc(to_float_series(s)).astype("Int64")
+
+def to_float_series(s: pd.Series) -> pd.Series:
+    # aceita vírgula decimal (-19,9167)
+    return pd.to_numeric(clean_series(s).str.replace(",", ".", regex=False), errors="coerce").astype("Float64")
+
+def prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Limpa e tipa todas as colunas de uma vez (ints, floats, códigos, categorias)."""
+    out = {}
+    for c in df.columns:
+        if c in INT_COLS:
+            out[c] = to_int_series(df[c])
+        elif c in FLOAT_COLS:
+            out[c] = to_float_series(df[c])
+        elif c == "NUMERO_REDS" or "COD" in c:
+            out[c] = clean_code(df[c])
+        else:
+            out[c] = clean_series(df[c])
+        if c in CATEGORY_COLS:
+            out[c] = out[c].astype("category")
+    return pd.DataFrame(out, index=df.index)
+
+def clean_df(df: pd.DataFrame) -> pd.DataFrame:
+    return prepare(df)
+
+def records(df: pd.DataFrame) -> list:
+    """Linhas como dicts de tipos nativos (NA -> None), prontas para $rows."""
+    out = df.astype(object)
+    return out.where(out.notna(), None).to_dict("records")
+
+def select(df: pd.DataFrame, mapping: dict, required=None) -> pd.DataFrame:
+    """Renomeia colunas para propriedades ({prop: coluna}) e descarta linhas sem as chaves."""
+    sub = df.reindex(columns=list(mapping.values()))
+    sub.columns = list(mapping.keys())
+    return sub.dropna(subset=list(required or mapping.keys())).drop_duplicates()
@@ -0,0 +1,235 @@
+# src/resumos.py
+# Agregados materializados (rollups) para dashboards: nº de ocorrências e somas de
+# prisao/imv/icvpe/icvpa por município/bairro/setor/unidade N6 × ano-mês × natureza
+# principal, e por célula da grade espacial (espacial.py) para mapas de calor.
+# Atualizados a cada lote gravado, sem varrer as Ocorrencias, numa etapa única depois
+# do commit do lote (os workers do loader não disputam os nós de resumo):
+#   - cada Ocorrencia guarda em o.resumo o retrato (JSON) do que ela somou nos resumos;
+#   - o lote gravado fica com o.resumida = false; a etapa lê o estado atual, desconta o
+#     retrato antigo, soma o novo e marca o.resumida = true na mesma transação.
+# Retrato igual ao atual não mexe em nada, então repetir um lote (retry, --resume, carga
+# completa de novo) não conta duas vezes; o que ficou com resumida = false por uma queda
+# entre as duas transações é acertado por acertar_pendentes() na carga seguinte.
+import argparse
+import json
+from collections import defaultdict
+
+from neo4j import GraphDatabase
+
+from schema_neo4j import URI, USER, PASS, MERGE_KEYS, ensure_schema
+from espacial import celulas, centro
+from versao_carga import publicar
+
+# rótulo do resumo -> chaves (as mesmas do MERGE, com constraint em schema_neo4j)
+RESUMOS = {label: MERGE_KEYS[label] for label in
+           ("ResumoMunicipio", "ResumoBairro", "ResumoSetor", "ResumoUnidadeN6", "ResumoCelula")}
+MEDIDAS = ["prisao", "imv", "icvpe", "icvpa"]
+PAGINA = 5000  # Ocorrencias por transação no --rebuild
+# propriedades gravadas só na criação do resumo (derivadas da chave)
+CRIACAO = {"ResumoCelula": "x.nivel = row.nivel, x.centro = point({latitude: row.lat, longitude: row.lon})"}
+
+# campos do retrato de uma Ocorrencia, na ordem gravada em o.resumo
+CAMPOS = ["municipio_cod", "bairro", "ano", "mes_num", "natureza", "setor", "unidade_n6",
+          *MEDIDAS, "lat", "lon", "celulas"]
+
+# uma linha por Ocorrencia; head([...]) evita multiplicar linhas se houver relação repetida.
+# O município vem da própria Ocorrencia (cargas antigas, sem a propriedade: do Bairro)
+_CONTRIB = """
+UNWIND $reds AS r
+MATCH (o:Ocorrencia {NUMERO_REDS: r})
+WHERE NOT $legado OR (o.resumida = true AND o.resumo IS NULL)
+WITH o,
+     head([(o)-[:OCORRE_EM]->(b:Bairro) | b]) AS b,
+     head([(o)-[:NO_TEMPO]->(t:Tempo) | t]) AS t
+RETURN o.NUMERO_REDS AS reds, o.resumo AS antes,
+       coalesce(o.municipio_cod, b.municipio_cod) AS municipio_cod, b.nome AS bairro,
+       t.ano AS ano, t.mes_num AS mes_num,
+       head([(o)-[:CLASSIFICADA_COM]->(n:NaturezaPrincipal) | n.codigo]) AS natureza,
+       head([(o)-[:SETOR]->(s:Setor) | s.nome]) AS setor,
+       head([(o)-[:AREA_N6]->(u:UnidadeN6) | u.codigo]) AS unidade_n6,
+       o.prisao AS prisao, o.imv AS imv, o.icvpe AS icvpe, o.icvpa AS icvpa,
+       o.lat AS lat, o.lon AS lon, o.celulas AS celulas
+"""
+
+def _retrato(row):
+    return json.dumps([row[c] for c in CAMPOS], separators=(",", ":"))
+
+def _de_retrato(texto):
+    return dict(zip(CAMPOS, json.loads(texto)))
+
+def _somar(itens, keys):
+    """[(contribuição, sinal)] por Ocorrencia -> uma linha por chave do resumo (deltas).
+    Ocorrencias sem alguma das chaves (sem bairro, sem tempo...) ficam de fora."""
+    tot = defaultdict(lambda: [0] * (1 + len(MEDIDAS)))
+    for c, sinal in itens:
+        k = tuple(c[key] for key in keys)
+        if None in k:
+            continue
+        acc = tot[k]
+        acc[0] += sinal
+        for i, med in enumerate(MEDIDAS, 1):
+            acc[i] += sinal * (c[med] or 0)
+    # ordem fixa das chaves: a etapa de resumos e o --prune travam os nós na mesma ordem
+    return [{**dict(zip(keys, k)), "ocorrencias": v[0], **dict(zip(MEDIDAS, v[1:]))}
+            for k, v in sorted(tot.items(), key=lambda kv: tuple(map(str, kv[0])))
+            if any(v)]
+
+def _por_celula(itens):
+    """Uma contribuição por Ocorrencia e nível da grade. As células vêm da carga
+    (o.celulas, calculadas por lote no loader); sem elas (LOAD CSV, neo4j-admin import,
+    retratos antigos) saem de lat/lon, em NumPy sobre as que faltam de uma vez."""
+    faltam = [i for i, (c, _) in enumerate(itens) if c.get("celulas") is None]
+    grade = celulas([itens[i][0]["lat"] for i in faltam], [itens[i][0]["lon"] for i in faltam])
+    calculadas = dict(zip(faltam, zip(*grade.values())))
+    out = []
+    for i, (c, sinal) in enumerate(itens):
+        ids = c["celulas"] if c.get("celulas") is not None else calculadas[i]
+        out += [({**c, "celula": int(cel)}, sinal) for cel in ids if cel >= 0]
+    return out
+
+def _com_centro(rows):
+    nivel, lat, lon = centro([r["celula"] for r in rows])
+    for r, n, la, lo in zip(rows, nivel.tolist(), lat.tolist(), lon.tolist()):
+        r.update(nivel=n, lat=la, lon=lo)
+    return rows
+
+def _merge_resumo(tx, label, keys, rows):
+    keymap = ", ".join(f"{k}: row.{k}" for k in keys)
+    cols = ["ocorrencias", *MEDIDAS]
+    criacao = ", ".join([*(f"x.{c} = 0" for c in cols), *filter(None, [CRIACAO.get(label)])])
+    q = f"""
+    UNWIND $rows AS row
+    MERGE (x:{label} {{{keymap}}})
+    ON CREATE SET {criacao}
+    SET {", ".join(f"x.{c} = x.{c} + row.{c}" for c in cols)}
+    WITH x WHERE x.ocorrencias <= 0
+    DELETE x
+    """
+    return tx.run(q, rows=rows).consume().counters
+
+def _aplicar(tx, itens, retratos):
+    """Aplica os deltas [(contribuição, sinal)] em cada resumo e grava os retratos
+    ({reds, resumo}; resumo None = fora dos resumos), tudo numa transação."""
+    out = []
+    if itens:
+        for label, keys in RESUMOS.items():
+            if label == "ResumoCelula":
+                rows = _com_centro(_somar(_por_celula(itens), keys))
+            else:
+                rows = _somar(itens, keys)
+            if rows:
+                out.append(_merge_resumo(tx, label, keys, rows))
+    if retratos:
+        q = """
+        UNWIND $rows AS row
+        MATCH (o:Ocorrencia {NUMERO_REDS: row.reds})
+        SET o.resumo = row.resumo, o.resumida = CASE WHEN row.resumo IS NULL THEN null ELSE true END
+        """
+        out.append(tx.run(q, rows=retratos).consume().counters)
+    return out
+
+def congelar(tx, reds):
+    """Cargas anteriores ao retrato (o.resumida = true sem o.resumo): grava o retrato do
+    estado atual. Roda antes de alterar as Ocorrencias e só escreve nelas mesmas."""
+    rows = [{"reds": c["reds"], "resumo": _retrato(c)}
+            for c in tx.run(_CONTRIB, reds=reds, legado=True)]
+    if not rows:
+        return []
+    q = "UNWIND $rows AS row MATCH (o:Ocorrencia {NUMERO_REDS: row.reds}) SET o.resumo = row.resumo"
+    return [tx.run(q, rows=rows).consume().counters]
+
+def marcar(tx, reds):
+    """Marca Ocorrencias recém-gravadas como pendentes para a etapa de resumos."""
+    q = "UNWIND $reds AS r MATCH (o:Ocorrencia {NUMERO_REDS: r}) SET o.resumida = false"
+    return tx.run(q, reds=reds).consume().counters
+
+def atualizar(tx, reds):
+    """Leva aos resumos o estado atual das Ocorrencias `reds`: desconta o retrato gravado
+    e soma o de agora. Ocorrencia com retrato igual ao atual só é marcada como resumida."""
+    itens, retratos = [], []
+    for c in tx.run(_CONTRIB, reds=reds, legado=False):
+        novo = _retrato(c)
+        if novo != c["antes"]:
+            if c["antes"] is not None:
+                itens.append((_de_retrato(c["antes"]), -1))
+            itens.append((_de_retrato(novo), 1))
+        retratos.append({"reds": c["reds"], "resumo": novo})
+    return _aplicar(tx, itens, retratos)
+
+def descontar(tx, reds):
+    """Retira dos resumos o que as Ocorrencias `reds` somaram (antes de apagá-las)."""
+    out = congelar(tx, reds)
+    q = """
+    UNWIND $reds AS r
+    MATCH (o:Ocorrencia {NUMERO_REDS: r}) WHERE o.resumo IS NOT NULL
+    RETURN o.NUMERO_REDS AS reds, o.resumo AS antes
+    """
+    rows = tx.run(q, reds=reds).data()
+    return out + _aplicar(tx, [(_de_retrato(c["antes"]), -1) for c in rows],
+                          [{"reds": c["reds"], "resumo": None} for c in rows])
+
+def _pendentes(tx):
+    q = "MATCH (o:Ocorrencia) WHERE o.resumida = false RETURN o.NUMERO_REDS AS reds LIMIT $n"
+    return [rec["reds"] for rec in tx.run(q, n=PAGINA)]
+
+def acertar_pendentes(driver):
+    """Resume as Ocorrencias gravadas cuja etapa de resumos não chegou a rodar (queda
+    entre as duas transações). Devolve quantas foram acertadas."""
+    n = 0
+    with driver.session() as session:
+        while True:
+            page = session.execute_read(_pendentes)
+            if not page:
+                return n
+            session.execute_write(atualizar, page)
+            n += len(page)
+            print(f"[info] resumos pendentes: {n} ocorrências")
+
+def _pagina(tx, after):
+    q = """
+    MATCH (o:Ocorrencia) WHERE o.NUMERO_REDS > $after
+    RETURN o.NUMERO_REDS AS reds ORDER BY reds LIMIT $n
+    """
+    return [rec["reds"] for rec in tx.run(q, after=after, n=PAGINA)]
+
+def _zerar(tx):
+    for label in RESUMOS:
+        tx.run(f"MATCH (x:{label}) DETACH DELETE x").consume()
+    tx.run("MATCH (o:Ocorrencia) WHERE o.resumida IS NOT NULL OR o.resumo IS NOT NULL "
+           "REMOVE o.resumida, o.resumo").consume()
+
+def reconstruir(driver):
+    """Refaz todos os resumos do zero (cargas que não passam pelo loader em lotes:
+    LOAD CSV, neo4j-admin import). Percorre as Ocorrencias em páginas por NUMERO_REDS."""
+    with driver.session() as session:
+        session.execute_write(_zerar)
+        after, n = "", 0
+        while True:
+            page = session.execute_read(_pagina, after)
+            if not page:
+                break
+            session.execute_write(atualizar, page)
+            n += len(page)
+            after = page[-1]
+            print(f"[info] resumos: {n} ocorrências")
+        total = {label: session.run(f"MATCH (x:{label}) RETURN count(x) AS n").single()["n"]
+                 for label in RESUMOS}
+    for label, k in total.items():
+        print(f"[ok] {label}: {k}")
+    return total
+
+def main():
+    ap = argparse.ArgumentParser(description="Reconstrói os resumos (rollups) a partir das Ocorrencias.")
+    ap.parse_args()
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        ensure_schema(driver)
+        reconstruir(driver)
+        # projeções do GDS montadas sobre os resumos (analises_gds) passam a ser refeitas
+        print(f"[info] versão dos dados: {publicar(rotulos=sorted(RESUMOS), modo='resumos')}")
+    finally:
+        driver.close()
+    print("✔ Resumos reconstruídos.")
+
+if __name__ == "__main__":
+    main()
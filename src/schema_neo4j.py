@@ -0,0 +1,134 @@
+# src/schema_neo4j.py
+# Constraints e índices para todas as chaves usadas em MERGE/MATCH pelo loader.
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from neo4j import GraphDatabase
+from neo4j.exceptions import ClientError
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).resolve().parents[1] / ".env")
+URI  = os.getenv("NEO4J_URI",  "bolt://localhost:7687")
+USER = os.getenv("NEO4J_USER", "neo4j")
+PASS = os.getenv("NEO4J_PASS", "senha-forte")
+
+AWAIT_SECONDS = 300  # tempo máximo esperando os índices ficarem ONLINE
+
+# rótulo -> propriedades da chave de MERGE (mesma ordem usada no loader)
+MERGE_KEYS = {
+    "Ocorrencia":         ["NUMERO_REDS"],
+    "Municipio":          ["cod"],
+    "Bairro":             ["municipio_cod", "nome"],
+    "NaturezaPrincipal":  ["codigo"],
+    "NaturezaSecundaria": ["codigo"],
+    "UnidadeN5":          ["nome"],
+    "UnidadeN6":          ["codigo"],
+    "Setor":              ["nome"],
+    "SubSetor":           ["nome"],
+    "Causa":              ["codigo"],
+    "Tempo":              ["ano", "mes_num"],
+    "Meio":               ["descricao"],
+    # resumos materializados (resumos.py)
+    "ResumoMunicipio":    ["municipio_cod", "ano", "mes_num", "natureza"],
+    "ResumoBairro":       ["municipio_cod", "bairro", "ano", "mes_num", "natureza"],
+    "ResumoSetor":        ["setor", "ano", "mes_num", "natureza"],
+    "ResumoUnidadeN6":    ["unidade_n6", "ano", "mes_num", "natureza"],
+    "ResumoCelula":       ["celula", "municipio_cod", "ano", "mes_num", "natureza"],
+}
+
+# índices full-text: nome -> (rótulos, propriedades) (busca.py)
+FULLTEXT = {
+    "dimensoes_busca": (["Bairro", "Municipio", "NaturezaPrincipal", "NaturezaSecundaria", "Causa", "Meio"],
+                        ["chave_busca"]),
+}
+
+# índices POINT: nome -> (rótulo, propriedade) (espacial.py)
+POINT = {"ocorrencia_local": ("Ocorrencia", "local")}
+# índices RANGE de consulta (fora das chaves de MERGE): nome -> (rótulo, propriedades)
+RANGE = {"resumocelula_municipio_nivel": ("ResumoCelula", ["municipio_cod", "nivel"]),
+         "ocorrencia_resumida": ("Ocorrencia", ["resumida"])}
+
+def _name(label, props, kind):
+    return f"{label.lower()}_{'_'.join(p.lower() for p in props)}_{kind}"
+
+def _props(var, props):
+    return ", ".join(f"{var}.{p}" for p in props)
+
+def ensure_schema(driver, keys=MERGE_KEYS):
+    """Cria constraint de unicidade (com índice de apoio) para cada chave.
+
+    Se já houver duplicatas no banco a constraint não pode ser criada; nesse
+    caso cai para um índice RANGE comum, para que MERGE/MATCH ao menos usem índice.
+    """
+    with driver.session() as session:
+        for label, props in keys.items():
+            try:
+                session.run(
+                    f"CREATE CONSTRAINT {_name(label, props, 'uniq')} IF NOT EXISTS "
+                    f"FOR (n:{label}) REQUIRE ({_props('n', props)}) IS UNIQUE"
+                ).consume()
+            except ClientError as e:
+                print(f"[warn] constraint {label}({', '.join(props)}) não criada: {e.message}")
+                session.run(
+                    f"CREATE RANGE INDEX {_name(label, props, 'idx')} IF NOT EXISTS "
+                    f"FOR (n:{label}) ON ({_props('n', props)})"
+                ).consume()
+        for nome, (labels, props) in FULLTEXT.items():
+            session.run(
+                f"CREATE FULLTEXT INDEX {nome} IF NOT EXISTS "
+                f"FOR (n:{'|'.join(labels)}) ON EACH [{_props('n', props)}]"
+            ).consume()
+        for nome, (label, prop) in POINT.items():
+            session.run(f"CREATE POINT INDEX {nome} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})").consume()
+        for nome, (label, props) in RANGE.items():
+            session.run(f"CREATE RANGE INDEX {nome} IF NOT EXISTS FOR (n:{label}) ON ({_props('n', props)})").consume()
+        session.run("CALL db.awaitIndexes($t)", t=AWAIT_SECONDS).consume()
+    print(f"[ok] schema: {len(keys)} chaves com índice, {len(FULLTEXT)} full-text, {len(POINT)} point")
+
+def check_schema(driver, keys=MERGE_KEYS):
+    """Retorna a lista de (rótulo, props, motivo) sem índice ONLINE de apoio."""
+    with driver.session() as session:
+        idx = session.run(
+            "SHOW INDEXES YIELD labelsOrTypes, properties, state, type, entityType "
+            "WHERE entityType = 'NODE' AND type = 'RANGE' "
+            "RETURN labelsOrTypes, properties, state"
+        ).data()
+    online = {}
+    for i in idx:
+        for lbl in i["labelsOrTypes"] or []:
+            online[(lbl, tuple(i["properties"] or []))] = i["state"]
+    faltando = []
+    for label, props in keys.items():
+        state = online.get((label, tuple(props)))
+        if state is None:
+            faltando.append((label, props, "sem índice"))
+        elif state != "ONLINE":
+            faltando.append((label, props, f"índice {state}"))
+    return faltando
+
+def report(faltando):
+    if not faltando:
+        print("[ok] todas as chaves de MERGE têm índice ONLINE")
+        return 0
+    for label, props, motivo in faltando:
+        print(f"[falta] {label}({', '.join(props)}): {motivo}")
+    return 1
+
+def main():
+    ap = argparse.ArgumentParser(description="Cria/verifica constraints e índices do grafo REDS.")
+    ap.add_argument("--check", action="store_true", help="só verifica; não cria nada")
+    args = ap.parse_args()
+
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    try:
+        if not args.check:
+            ensure_schema(driver)
+        code = report(check_schema(driver))
+    finally:
+        driver.close()
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# src/servico_consultas.py
+# Serviço de leitura para o Neovis/dashboards: filtro ano/município/natureza/busca/limite
+# como Cypher parametrizado (um plano por combinação de filtros presentes, não por valor),
+# resposta em JSON de nós/arestas (formato vis-network, o mesmo que o Neovis desenha) e
+# cache em memória TTL/LRU, limpo quando o loader publica uma nova versão dos dados.
+# A busca livre resolve o termo nas dimensões pelo índice full-text (busca.py) e só
+# então expande para as Ocorrencias ligadas a elas. Consultas espaciais (retângulo, raio,
+# células mais quentes) usam o índice POINT e os resumos por célula (espacial.py).
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.ioloop
+import tornado.web
+from cachetools import TTLCache
+from neo4j import GraphDatabase
+from neo4j.exceptions import AuthError, ClientError, ServiceUnavailable, SessionExpired
+
+from schema_neo4j import URI, USER, PASS
+from versao_carga import Observador
+from busca import INDICE, lucene, buscar
+from espacial import NIVEIS, na_caixa, no_raio, hotspots
+
+PORT = int(os.getenv("SERVICO_PORT", "8000"))
+CACHE_MAX = int(os.getenv("SERVICO_CACHE_MAX", "256"))    # respostas guardadas (LRU)
+CACHE_TTL = int(os.getenv("SERVICO_CACHE_TTL", "300"))    # segundos
+THREADS = int(os.getenv("SERVICO_THREADS", "8"))          # consultas simultâneas ao Neo4j
+CORS = os.getenv("SERVICO_CORS", "*")                     # origem do Neovis (nginx :8080)
+LIMIT_DEFAULT, LIMIT_MIN, LIMIT_MAX = 200, 10, 5000
+
+# propriedade usada como legenda de cada rótulo
+CAPTION = {
+    "Ocorrencia": "NUMERO_REDS", "Tempo": "ano", "Bairro": "nome", "Municipio": "nome",
+    "NaturezaPrincipal": "descricao", "NaturezaSecundaria": "descricao",
+    "UnidadeN5": "nome", "UnidadeN6": "nome", "Setor": "nome", "SubSetor": "nome",
+    "Causa": "descricao", "Meio": "descricao",
+}
+# relações desenhadas a partir de cada Ocorrencia
+REL_TIPOS = "NO_TEMPO|OCORRE_EM|CLASSIFICADA_COM|RELACIONA_SE"
+
+def ler_filtros(arg):
+    """Normaliza os parâmetros da URL; `arg(nome)` devolve a string ou None."""
+    def texto(nome):
+        v = (arg(nome) or "").strip()
+        return v or None
+    ano = texto("ano")
+    try:
+        limit = int(texto("limit") or LIMIT_DEFAULT)
+    except ValueError:
+        limit = LIMIT_DEFAULT
+    return {
+        "ano": int(ano) if ano and ano.isdigit() else None,
+        "municipio": texto("municipio"),
+        "natureza": texto("natureza"),
+        "busca": lucene(texto("busca")),  # já dobrada (sem acento) e em sintaxe Lucene
+        "limit": max(LIMIT_MIN, min(LIMIT_MAX, limit)),
+    }
+
+def montar_consulta(f):
+    """Texto da consulta conforme os filtros presentes; os valores vão sempre como parâmetros,
+    então o servidor reaproveita o plano (no máximo 16 formas de consulta)."""
+    if f["busca"]:
+        # dimensões pelo índice -> Ocorrencias ligadas (direto ou via Bairro, para Municipio)
+        linhas = [
+            f"CALL db.index.fulltext.queryNodes('{INDICE}', $busca) YIELD node AS d",
+            "CALL {",
+            "  WITH d MATCH (o:Ocorrencia)-[:OCORRE_EM|CLASSIFICADA_COM|RELACIONA_SE|CAUSA|MEIO]->(d) RETURN o",
+            "  UNION",
+            "  WITH d MATCH (o:Ocorrencia)-[:OCORRE_EM]->(:Bairro)-[:FICA_EM]->(d:Municipio) RETURN o",
+            "}",
+            "WITH DISTINCT o",
+        ]
+    else:
+        linhas = ["MATCH (o:Ocorrencia)"]
+    if f["ano"] is not None:
+        linhas.append("MATCH (o)-[:NO_TEMPO]->(:Tempo {ano: $ano})")
+    if f["municipio"]:
+        # código do município (municipio_cod), como nos resumos e no catálogo de facetas
+        linhas.append("MATCH (o)-[:OCORRE_EM]->(:Bairro {municipio_cod: $municipio})")
+    where = []
+    if f["natureza"]:
+        where.append("EXISTS { (o)-[:CLASSIFICADA_COM|RELACIONA_SE]->(n) WHERE n.descricao = $natureza }")
+    if where:
+        linhas.append("WHERE " + " AND ".join(where))
+    linhas += [
+        "WITH DISTINCT o LIMIT $limit",
+        f"OPTIONAL MATCH (o)-[r:{REL_TIPOS}]->(d)",
+        "OPTIONAL MATCH (d:Bairro)-[rb:FICA_EM]->(mun:Municipio)",
+        "RETURN o, r, d, rb, mun",
+    ]
+    params = {k: v for k, v in f.items() if v is not None}
+    return "\n".join(linhas), params
+
+def _node(n):
+    label = next(iter(n.labels), "")
+    props = dict(n)
+    cap = props.get(CAPTION.get(label, ""), label)
+    return {"id": n.element_id, "label": str(cap), "group": label, "labels": sorted(n.labels),
+            "title": f"{label}: {cap}", "properties": props}
+
+def _edge(r):
+    return {"id": r.element_id, "from": r.start_node.element_id, "to": r.end_node.element_id,
+            "label": r.type, "type": r.type, "properties": dict(r)}
+
+def _grafo(tx, q, params):
+    nodes, edges = {}, {}
+    for rec in tx.run(q, **params):
+        for key in ("o", "d", "mun"):
+            n = rec[key]
+            if n is not None and n.element_id not in nodes:
+                nodes[n.element_id] = _node(n)
+        for key in ("r", "rb"):
+            r = rec[key]
+            if r is not None and r.element_id not in edges:
+                edges[r.element_id] = _edge(r)
+    return {"nodes": list(nodes.values()), "edges": list(edges.values())}
+
+class Servico:
+    """Cache de respostas (já serializadas) por filtro + deduplicação de consultas em voo."""
+
+    def __init__(self, driver, maxsize=CACHE_MAX, ttl=CACHE_TTL, threads=THREADS):
+        self.driver = driver
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="cypher")
+        self.inflight = {}
+        self.obs = Observador()
+        self.versao = self.obs.atual()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+    def _checar_versao(self):
+        v = self.obs.atual()
+        if v != self.versao:
+            self.cache.clear()
+            self.versao = v
+            self.stats["invalidations"] += 1
+
+    def _consultar(self, filtros):
+        q, params = montar_consulta(filtros)
+        t0 = time.perf_counter()
+        with self.driver.session(default_access_mode="READ", fetch_size=1000) as session:
+            out = session.execute_read(_grafo, q, params)
+        out["meta"] = {"filtros": filtros, "versao": self.versao,
+                       "ms": round((time.perf_counter() - t0) * 1000, 1)}
+        return json.dumps(out, ensure_ascii=False, default=str).encode("utf-8")
+
+    def _buscar(self, termo, limite):
+        with self.driver.session(default_access_mode="READ") as session:
+            out = session.execute_read(buscar, termo, limite)
+        return json.dumps({"termo": termo, "consulta": lucene(termo), "resultados": out, "versao": self.versao},
+                          ensure_ascii=False, default=str).encode("utf-8")
+
+    def _ler(self, fn, *args):
+        with self.driver.session(default_access_mode="READ") as session:
+            out = session.execute_read(fn, *args)
+        return json.dumps({"resultados": out, "versao": self.versao},
+                          ensure_ascii=False, default=str).encode("utf-8")
+
+    async def ler(self, fn, *args):
+        """Resposta JSON de uma leitura fn(tx, *args), em cache pela função e argumentos."""
+        return await self._obter((fn.__name__, *args), self._ler, fn, *args)
+
+    async def grafo(self, filtros):
+        """Corpo JSON da resposta e se veio do cache."""
+        return await self._obter(("grafo", *sorted(filtros.items())), self._consultar, filtros)
+
+    async def busca(self, termo, limite):
+        return await self._obter(("busca", lucene(termo), limite), self._buscar, termo, limite)
+
+    async def _obter(self, key, fn, *args):
+        """Resposta do cache ou de fn(*args) no pool de threads. Roda no IOLoop (sem locks)."""
+        self._checar_versao()
+        body = self.cache.get(key)
+        if body is not None:
+            self.stats["hits"] += 1
+            return body, True
+        fut = self.inflight.get(key)
+        if fut is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(fut), True
+        self.stats["misses"] += 1
+        versao = self.versao
+        fut = asyncio.ensure_future(
+            asyncio.get_running_loop().run_in_executor(self.pool, fn, *args))
+        self.inflight[key] = fut
+        try:
+            body = await fut
+        finally:
+            del self.inflight[key]
+        if versao == self.versao:  # não guarda resultado de antes de uma carga que terminou agora
+            self.cache[key] = body
+        return body, False
+
+class BaseHandler(tornado.web.RequestHandler):
+    def set_default_headers(self):
+        self.set_header("Access-Control-Allow-Origin", CORS)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+
+    def write_error(self, status_code, **kwargs):
+        """Erros também em JSON ({"erro": ...}): Neo4j fora do ar vira 503 e consulta
+        recusada pelo servidor (ClientError), 400."""
+        erro = kwargs.get("exc_info", (None, None, None))[1]
+        if isinstance(erro, (ServiceUnavailable, SessionExpired, AuthError)):
+            status_code, msg = 503, "Neo4j indisponível"
+        elif isinstance(erro, ClientError):
+            status_code, msg = 400, erro.message
+        elif isinstance(erro, tornado.web.HTTPError) and erro.log_message:
+            msg = erro.log_message
+        else:
+            msg = self._reason
+        self.set_status(status_code)
+        self.finish({"erro": msg})
+
+class GrafoHandler(BaseHandler):
+    async def get(self):
+        servico = self.settings["servico"]
+        body, cached = await servico.grafo(ler_filtros(lambda n: self.get_query_argument(n, None)))
+        self.set_header("X-Cache", "HIT" if cached else "MISS")
+        self.write(body)  # Tornado calcula o ETag e responde 304 se o navegador já tiver
+
+class BuscaHandler(BaseHandler):
+    async def get(self):
+        """Dimensões (bairro, município, naturezas, causa, meio) que casam com ?q=, sem acento."""
+        servico = self.settings["servico"]
+        try:
+            limite = max(1, min(100, int(self.get_query_argument("limit", "20"))))
+        except ValueError:
+            limite = 20
+        body, cached = await servico.busca(self.get_query_argument("q", ""), limite)
+        self.set_header("X-Cache", "HIT" if cached else "MISS")
+        self.write(body)
+
+class AreaHandler(BaseHandler):
+    async def get(self):
+        """?bbox=sul,oeste,norte,leste ou ?lat=&lon=&raio=metros (índice POINT)."""
+        arg = self.get_query_argument
+        try:
+            limite = max(1, min(LIMIT_MAX, int(arg("limit", str(LIMIT_DEFAULT)))))
+            if arg("bbox", None):
+                sul, oeste, norte, leste = (float(v) for v in arg("bbox").split(","))
+                fn, args = na_caixa, (sul, oeste, norte, leste, limite)
+            else:
+                fn, args = no_raio, (float(arg("lat")), float(arg("lon")), float(arg("raio", "500")), limite)
+        except (TypeError, ValueError):
+            raise tornado.web.HTTPError(400, "use bbox=sul,oeste,norte,leste ou lat, lon e raio")
+        body, cached = await self.settings["servico"].ler(fn, *args)
+        self.set_header("X-Cache", "HIT" if cached else "MISS")
+        self.write(body)
+
+class CelulasHandler(BaseHandler):
+    async def get(self):
+        """Células da grade com mais ocorrências: ?nivel=&municipio=&ano=&mes=&natureza=&limit="""
+        def arg(nome, conv=str):
+            v = (self.get_query_argument(nome, "") or "").strip()
+            return conv(v) if v else None
+        try:
+            nivel = arg("nivel", int) or 2
+            args = (nivel, arg("municipio"), arg("ano", int), arg("mes", int), arg("natureza"),
+                    max(1, min(LIMIT_MAX, arg("limit", int) or 500)))
+        except ValueError:
+            raise tornado.web.HTTPError(400, "nivel, ano, mes e limit são inteiros")
+        if nivel not in NIVEIS:
+            raise tornado.web.HTTPError(400, f"nivel deve ser um de {sorted(NIVEIS)}")
+        body, cached = await self.settings["servico"].ler(hotspots, *args)
+        self.set_header("X-Cache", "HIT" if cached else "MISS")
+        self.write(body)
+
+class StatusHandler(BaseHandler):
+    def get(self):
+        s = self.settings["servico"]
+        self.write({"versao": s.versao, "cache": len(s.cache), "cache_max": s.cache.maxsize,
+                    "ttl": s.cache.ttl, **s.stats})
+
+def make_app(servico):
+    return tornado.web.Application([
+        (r"/api/grafo", GrafoHandler),
+        (r"/api/busca", BuscaHandler),
+        (r"/api/area", AreaHandler),
+        (r"/api/celulas", CelulasHandler),
+        (r"/api/status", StatusHandler),
+    ], servico=servico)
+
+def main():
+    ap = argparse.ArgumentParser(description="Serviço de consultas (JSON para o Neovis) com cache.")
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--ttl", type=int, default=CACHE_TTL, help="validade de uma resposta em cache (s)")
+    ap.add_argument("--max", type=int, default=CACHE_MAX, help="respostas em cache (LRU)")
+    args = ap.parse_args()
+
+    driver = GraphDatabase.driver(URI, auth=(USER, PASS))
+    servico = Servico(driver, maxsize=args.max, ttl=args.ttl)
+    make_app(servico).listen(args.port)
+    print(f"[info] serviço em http://localhost:{args.port}/api/grafo (versão dos dados: {servico.versao})")
+    try:
+        tornado.ioloop.IOLoop.current().start()
+    finally:
+        driver.close()
+
+if __name__ == "__main__":
+    main()
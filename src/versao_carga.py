@@ -0,0 +1,68 @@
+# src/versao_carga.py
+# Versão dos dados no grafo: o loader grava data/versao_carga.json ao terminar uma carga;
+# quem guarda resultados em cache (serviço de consultas, catálogo) compara a versão;
+# projeções do GDS comparam só a versão dos rótulos que usam (versao_de).
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+ARQUIVO = Path(os.getenv("CARGA_VERSAO", Path(__file__).resolve().parents[1] / "data" / "versao_carga.json"))
+
+def _ler(arquivo):
+    try:
+        return json.loads(Path(arquivo).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def publicar(arquivo=ARQUIVO, rotulos=None, **info):
+    """Grava uma nova versão (troca atômica do arquivo) e devolve o identificador.
+
+    rotulos: rótulos/tipos de relação que a carga alterou (None = todos). Cada um guarda
+    a versão em que mudou pela última vez; os demais ficam com a versão `base`.
+    """
+    agora = datetime.now()
+    versao = agora.strftime("%Y%m%d%H%M%S%f")
+    arquivo = Path(arquivo)
+    anterior = _ler(arquivo)
+    if rotulos is None or not anterior:
+        base, mapa = versao, {}
+    else:
+        base = anterior.get("base", anterior.get("versao"))
+        mapa = {**anterior.get("rotulos", {}), **{r: versao for r in rotulos}}
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    tmp = arquivo.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"versao": versao, "ts": agora.isoformat(timespec="seconds"),
+                               "base": base, "rotulos": mapa, **info},
+                              ensure_ascii=False, default=str), encoding="utf-8")
+    os.replace(tmp, arquivo)
+    return versao
+
+def versao_de(rotulos, arquivo=ARQUIVO):
+    """Última versão em que algum dos rótulos mudou (None se nunca houve carga)."""
+    d = _ler(arquivo)
+    if not d:
+        return None
+    base = d.get("base", d["versao"])
+    return max(d.get("rotulos", {}).get(r, base) for r in rotulos)
+
+class Observador:
+    """Lê a versão atual só quando o arquivo muda (um stat por chamada)."""
+
+    def __init__(self, arquivo=ARQUIVO):
+        self.arquivo = Path(arquivo)
+        self._mtime = None
+        self._versao = None
+
+    def atual(self):
+        try:
+            mtime = self.arquivo.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._mtime:
+            try:
+                self._versao = json.loads(self.arquivo.read_text(encoding="utf-8")).get("versao")
+            except (OSError, json.JSONDecodeError):
+                return self._versao
+            self._mtime = mtime
+        return self._versao